@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Compliance result storage: memory and statistics time per representation
+
+Fills comparison results for a large specification across several documents
+the way ComparisonEngine does, once as a list of ComplianceItem objects (each
+with its own formatted evidence strings) and once as ComplianceResults arrays
+sharing the requirement dicts and a pool of chunk contents, then reports the
+traced allocation of each and the time to compute the status counts.
+
+Usage:
+    python benchmarks/bench_compliance_results.py --requirements 10000 --documents 5
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from comparison_engine import (
+    EVIDENCE_PER_ITEM, STATUS_BY_CODE, ComplianceItem, ComplianceResults, ComplianceStatus
+)
+
+
+def fake_hits(rng: np.random.Generator, chunks: list, top_k: int):
+    """Retrieval results over a shared chunk pool, best first"""
+    ids = rng.choice(len(chunks), top_k, replace=False)
+    scores = np.sort(rng.uniform(0.2, 0.95, top_k))[::-1]
+    return [{"chunk_id": int(i), "content": chunks[i], "similarity_score": float(s)} for i, s in zip(ids, scores)]
+
+
+def status_for(hits: list, threshold: float) -> ComplianceStatus:
+    best = hits[0]["similarity_score"]
+    if best >= threshold:
+        return ComplianceStatus.COMPLIANT
+    if best >= threshold * 0.7:
+        return ComplianceStatus.PARTIAL
+    return ComplianceStatus.NON_COMPLIANT
+
+
+def as_items(requirements: list, answers: list, threshold: float) -> list:
+    """Pre-array representation: one ComplianceItem per requirement"""
+    items = []
+    for req, hits in zip(requirements, answers):
+        items.append(ComplianceItem(
+            requirement_id=req.get("id", "UNKNOWN"),
+            requirement_text=req.get("text", ""),
+            expected_value=req.get("expected", None),
+            found_value=hits[0].get("content", "Found"),
+            status=status_for(hits, threshold),
+            evidence=[
+                f"{r.get('content', '')[:100]}... (Score: {r.get('similarity_score', 0):.2f})"
+                for r in hits[:EVIDENCE_PER_ITEM]
+            ]
+        ))
+    return items
+
+
+def as_arrays(requirements: list, answers: list, threshold: float) -> ComplianceResults:
+    results = ComplianceResults(requirements)
+    for row, hits in enumerate(answers):
+        results.record(row, status_for(hits, threshold), hits)
+    return results
+
+
+def traced(build):
+    """Result of build() and the bytes it allocated"""
+    tracemalloc.start()
+    value = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+
+def timed(fn, repeats: int) -> float:
+    """Median milliseconds of fn()"""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ComplianceItem list vs ComplianceResults arrays")
+    parser.add_argument("--requirements", type=int, default=10000)
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--chunks", type=int, default=2000, help="Distinct chunks per document")
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    requirements = [
+        {"id": f"REQ_{i + 1:05d}", "text": f"The system shall satisfy requirement {i + 1}", "expected": None}
+        for i in range(args.requirements)
+    ]
+    answers = []
+    for d in range(args.documents):
+        chunks = [f"doc{d} chunk {c} " + "x" * args.chunk_chars for c in range(args.chunks)]
+        answers.append([fake_hits(rng, chunks, args.top_k) for _ in requirements])
+
+    listed, list_bytes = traced(lambda: [as_items(requirements, a, args.threshold) for a in answers])
+    arrays, array_bytes = traced(lambda: [as_arrays(requirements, a, args.threshold) for a in answers])
+
+    def list_counts():
+        for items in listed:
+            {s: sum(1 for i in items if i.status == s) for s in STATUS_BY_CODE}
+
+    def array_counts():
+        for results in arrays:
+            results.counts()
+
+    for items, results in zip(listed, arrays):
+        assert [i.status for i in items] == [STATUS_BY_CODE[c] for c in results.status]
+
+    rows = [
+        {"storage": "items", "mb": round(list_bytes / 2**20, 2), "stats_ms": round(timed(list_counts, args.repeats), 3)},
+        {"storage": "arrays", "mb": round(array_bytes / 2**20, 2), "stats_ms": round(timed(array_counts, args.repeats), 3)}
+    ]
+
+    print(f"{args.requirements} requirements x {args.documents} documents")
+    print(f"{'storage':>8} {'traced MB':>10} {'stats ms':>9}")
+    for row in rows:
+        print(f"{row['storage']:>8} {row['mb']:>10} {row['stats_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
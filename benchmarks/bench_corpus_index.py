@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Ingest throughput vs. corpus size for the segmented corpus index
+
+Streams synthetic documents into a CorpusIndex with background maintenance
+running, and reports chunks/s and query latency for each tenth of the feed.
+With the memtable/segment layout both should stay flat as the corpus grows.
+
+Usage:
+    python benchmarks/bench_corpus_index.py --documents 2000 --chunks 50
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from corpus_index import CorpusIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus index ingest scaling benchmark")
+    parser.add_argument("--documents", type=int, default=1000, help="Documents to ingest")
+    parser.add_argument("--chunks", type=int, default=50, help="Chunks per document")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--memtable-rows", type=int, default=20000, help="Memtable flush threshold")
+    parser.add_argument("--merge-factor", type=int, default=4)
+    parser.add_argument("--delete-every", type=int, default=10, help="Delete an older document every N ingests (0 = never)")
+    parser.add_argument("--queries", type=int, default=20, help="Queries timed per tenth of the feed")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    step = max(1, args.documents // 10)
+    rows = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = CorpusIndex(
+            Path(tmp),
+            memtable_max_rows=args.memtable_rows,
+            merge_factor=args.merge_factor,
+            flush_interval=5.0
+        ).open()
+        index.start_background_maintenance(interval=0.5)
+
+        window_start = time.perf_counter()
+        for doc in range(args.documents):
+            vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+            records = [{"chunk_id": i, "text": f"doc{doc} chunk {i}", "metadata": {}} for i in range(args.chunks)]
+            index.add_document(f"doc{doc}", vectors, records)
+            if args.delete_every and doc % args.delete_every == args.delete_every - 1:
+                index.delete_document(f"doc{int(rng.integers(0, doc + 1))}")
+
+            if (doc + 1) % step == 0:
+                elapsed = time.perf_counter() - window_start
+                latencies = []
+                for _ in range(args.queries):
+                    query = rng.standard_normal(args.dim).astype(np.float32)
+                    start = time.perf_counter()
+                    index.search(query, 10)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                stats = index.stats()
+                rows.append({
+                    "documents": doc + 1,
+                    "chunks_per_second": round(step * args.chunks / elapsed, 1),
+                    "query_p50_ms": round(statistics.median(latencies), 3),
+                    "segments": stats["segments"],
+                    "memtable_rows": stats["memtable_rows"],
+                    "tombstone_ratio": stats["tombstone_ratio"]
+                })
+                window_start = time.perf_counter()
+        index.close()
+
+    print(f"{'docs':>8} {'chunks/s':>12} {'p50 ms':>9} {'segments':>9} {'memtable':>9} {'tombstoned':>11}")
+    for row in rows:
+        print(f"{row['documents']:>8} {row['chunks_per_second']:>12} {row['query_p50_ms']:>9} "
+              f"{row['segments']:>9} {row['memtable_rows']:>9} {row['tombstone_ratio']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
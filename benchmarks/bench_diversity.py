@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Diversity-aware selection: latency and redundancy per mode
+
+Builds candidate sets that look like overlapping-chunk retrieval (groups of
+near-duplicate vectors around a few distinct topics), then times the "none",
+"mmr" and "cluster" selections for each k and reports how many distinct
+groups the selected hits cover and their mean pairwise similarity.
+
+Usage:
+    python benchmarks/bench_diversity.py --k 5 10 20 50
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from diversity import DIVERSITY_MODES, diversify
+from similarity import normalize_rows
+
+
+def candidate_set(rng: np.random.Generator, candidates: int, groups: int, dim: int, spread: float):
+    """Normalized candidates in near-duplicate groups, with relevance falling off by group"""
+    centers = normalize_rows(rng.standard_normal((groups, dim)))
+    # Skewed group sizes: the most relevant topic contributes most overlapping chunks
+    group = np.minimum(rng.geometric(0.35, candidates) - 1, groups - 1)
+    vectors = normalize_rows(centers[group] + spread * rng.standard_normal((candidates, dim)) / np.sqrt(dim))
+    query = normalize_rows(centers.T @ np.linspace(1.0, 0.3, groups))[0]
+    return vectors @ query, vectors, group
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MMR / clustering diversity benchmark")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10, 20, 50], help="Results kept per query")
+    parser.add_argument("--candidate-factor", type=int, default=2, help="Candidates per kept result (at least 20)")
+    parser.add_argument("--groups", type=int, default=12, help="Distinct topics among the candidates")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--spread", type=float, default=0.3, help="Noise around each topic (lower = closer duplicates)")
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--cluster-threshold", type=float, default=0.9)
+    parser.add_argument("--queries", type=int, default=200, help="Candidate sets timed per setting")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rows = []
+    for k in args.k:
+        candidates = max(20, k * args.candidate_factor)
+        sets = [candidate_set(rng, candidates, args.groups, args.dim, args.spread) for _ in range(args.queries)]
+        for mode in DIVERSITY_MODES:
+            latencies, covered, redundancy = [], [], []
+            for relevance, vectors, group in sets:
+                start = time.perf_counter()
+                keep = diversify(mode, relevance, vectors, k, args.lambda_mult, args.cluster_threshold)
+                latencies.append((time.perf_counter() - start) * 1000)
+                covered.append(len(set(group[keep].tolist())))
+                selected = vectors[keep]
+                pairs = selected @ selected.T
+                redundancy.append(float(pairs[np.triu_indices(len(keep), 1)].mean()) if len(keep) > 1 else 0.0)
+            rows.append({
+                "k": k,
+                "candidates": candidates,
+                "mode": mode,
+                "median_ms": round(statistics.median(latencies), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                "groups_covered": round(statistics.mean(covered), 2),
+                "mean_pairwise_similarity": round(statistics.mean(redundancy), 4)
+            })
+
+    print(f"{'k':>4} {'cands':>6} {'mode':>8} {'med ms':>8} {'p95 ms':>8} {'groups':>7} {'pair sim':>9}")
+    for row in rows:
+        print(f"{row['k']:>4} {row['candidates']:>6} {row['mode']:>8} {row['median_ms']:>8} {row['p95_ms']:>8} "
+              f"{row['groups_covered']:>7} {row['mean_pairwise_similarity']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
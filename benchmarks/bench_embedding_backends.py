@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Embedding backend benchmark: PyTorch vs. ONNX Runtime (fp32 / int8)
+
+Reports documents/second for each backend and the cosine agreement of
+its embeddings with the PyTorch reference on the same texts.
+
+Usage:
+    python benchmarks/bench_embedding_backends.py --docs 2000 --threads 4
+    python benchmarks/bench_embedding_backends.py --input chunks.txt
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from embedding_backends import create_embedding_backend
+
+_VOCABULARY = (
+    "operating temperature voltage current rated maximum minimum enclosure ingress "
+    "protection compliance standard requirement supplier warranty certificate tolerance "
+    "pressure flow rate material stainless steel connector interface firmware protocol "
+    "ethernet power consumption humidity vibration shock test report clause section table"
+).split()
+
+
+def synthetic_texts(count: int, seed: int) -> list:
+    """Mix of short table rows and long prose chunks, like real ingest output"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if rng.random() < 0.4:
+            texts.append(" | ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(2, 6))))
+        else:
+            texts.append(" ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(40, 180))))
+    return texts
+
+
+def run_backend(backend, texts: list, repeats: int) -> tuple:
+    backend.embed_array(texts[:8])  # warm-up
+    best = float("inf")
+    vectors = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectors = backend.embed_array(texts)
+        best = min(best, time.perf_counter() - start)
+    return vectors, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend throughput/agreement benchmark")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--docs", type=int, default=1000, help="Synthetic documents to embed")
+    parser.add_argument("--input", help="Text file with one document per line (overrides --docs)")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = default)")
+    parser.add_argument("--max-batch-tokens", type=int, default=8192)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "r") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = synthetic_texts(args.docs, args.seed)
+
+    configs = [
+        ("pytorch", {}),
+        ("onnx", {"intra_op_threads": args.threads, "max_batch_tokens": args.max_batch_tokens}),
+        ("onnx", {"intra_op_threads": args.threads, "max_batch_tokens": args.max_batch_tokens,
+                  "quantize_int8": True}),
+    ]
+
+    reference = None
+    results = []
+    for name, options in configs:
+        backend = create_embedding_backend(name, args.model, **options)
+        vectors, seconds = run_backend(backend, texts, args.repeats)
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        if reference is None:
+            reference = vectors
+        agreement = np.einsum("ij,ij->i", vectors, reference)
+        results.append({
+            **backend.describe(),
+            "docs_per_second": len(texts) / seconds,
+            "cosine_mean": float(agreement.mean()),
+            "cosine_min": float(agreement.min())
+        })
+
+    print(f"\n{len(texts)} documents, best of {args.repeats} runs\n")
+    print(f"{'backend':<10}{'int8':>6}{'docs/s':>10}{'speedup':>9}{'cos mean':>10}{'cos min':>9}")
+    base = results[0]["docs_per_second"]
+    for row in results:
+        print(
+            f"{row['backend']:<10}{str(row.get('quantize_int8', False)):>6}{row['docs_per_second']:>10.1f}"
+            f"{row['docs_per_second'] / base:>9.2f}{row['cosine_mean']:>10.4f}{row['cosine_min']:>9.4f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
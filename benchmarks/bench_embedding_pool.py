@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Embedding worker pool scaling benchmark
+
+Measures documents/second for 1, 2, 4, ... replicas up to the physical
+core count and reports scaling efficiency against a single replica.
+
+Usage:
+    python benchmarks/bench_embedding_pool.py --backend onnx --docs 4000
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from embedding_pool import EmbeddingWorkerPool, physical_core_count
+from bench_embedding_backends import synthetic_texts
+
+
+def worker_counts(max_workers: int) -> list:
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding worker pool scaling benchmark")
+    parser.add_argument("--backend", default="onnx", choices=["pytorch", "onnx"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--max-workers", type=int, default=0, help="0 = physical cores / threads per worker")
+    parser.add_argument("--batch", type=int, default=256, help="Texts per embed call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    max_workers = args.max_workers or max(1, physical_core_count() // args.threads_per_worker)
+    texts = synthetic_texts(args.docs, args.seed)
+
+    results = []
+    for workers in worker_counts(max_workers):
+        pool = EmbeddingWorkerPool(
+            args.backend,
+            args.model,
+            num_workers=workers,
+            threads_per_worker=args.threads_per_worker
+        )
+        try:
+            pool.embed_array(texts[:args.batch])  # warm-up
+            start = time.perf_counter()
+            for i in range(0, len(texts), args.batch):
+                pool.embed_array(texts[i:i + args.batch])
+            seconds = time.perf_counter() - start
+        finally:
+            pool.close()
+
+        results.append({"workers": workers, "docs_per_second": len(texts) / seconds})
+        print(f"{workers:>3} workers: {len(texts) / seconds:8.1f} docs/s")
+
+    base = results[0]["docs_per_second"]
+    print(f"\n{'workers':>8}{'docs/s':>10}{'speedup':>9}{'efficiency':>12}")
+    for row in results:
+        speedup = row["docs_per_second"] / base
+        row["speedup"] = speedup
+        row["efficiency"] = speedup / row["workers"]
+        print(f"{row['workers']:>8}{row['docs_per_second']:>10.1f}{speedup:>9.2f}{row['efficiency']:>12.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Recall@k vs. memory benchmark for quantized vector storage
+
+Builds a synthetic clustered corpus shaped like all-MiniLM-L6-v2 output
+(384-dim, unit norm), then compares every quantization mode and rescore
+factor against exact float32 search.
+
+Usage:
+    python benchmarks/bench_quantization.py --vectors 100000 --queries 200
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from quantization import QuantizedVectorIndex, QUANTIZATION_MODES
+
+
+def make_corpus(num_vectors: int, dim: int, num_clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors drawn around random cluster centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, num_clusters, size=num_vectors)
+    vectors = centres[labels] + 0.6 * rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_queries(corpus: np.ndarray, num_queries: int, seed: int) -> np.ndarray:
+    """Perturbed corpus vectors, so every query has a meaningful neighbourhood"""
+    rng = np.random.default_rng(seed + 1)
+    picks = corpus[rng.integers(0, len(corpus), size=num_queries)]
+    queries = picks + 0.3 * rng.standard_normal(picks.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized storage recall/memory benchmark")
+    parser.add_argument("--vectors", type=int, default=50000, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="Topic clusters in the corpus")
+    parser.add_argument("-k", "--top-k", type=int, default=10, help="Recall@k")
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 2, 4, 8], help="Rescore factors")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    print(f"Generating {args.vectors} x {args.dim} corpus...")
+    corpus = make_corpus(args.vectors, args.dim, args.clusters, args.seed)
+    queries = make_queries(corpus, args.queries, args.seed)
+    truth = exact_top_k(corpus, queries, args.top_k)
+    float32_bytes = corpus.nbytes
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in QUANTIZATION_MODES:
+            index = QuantizedVectorIndex.build(corpus, mode, Path(tmp) / mode, metric="ip")
+            for factor in args.rescore:
+                hits = 0
+                start = time.perf_counter()
+                for query, expected in zip(queries, truth):
+                    ids, _ = index.search(query, args.top_k, rescore_factor=factor)
+                    hits += len(set(ids.tolist()) & set(expected.tolist()))
+                elapsed = time.perf_counter() - start
+                rows.append({
+                    "mode": mode,
+                    "rescore_factor": factor,
+                    f"recall@{args.top_k}": hits / (len(queries) * args.top_k),
+                    "ram_bytes": index.memory_bytes,
+                    "ram_vs_float32": index.memory_bytes / float32_bytes,
+                    "ms_per_query": elapsed / len(queries) * 1000
+                })
+
+    print(f"\nfloat32 baseline: {float32_bytes / 1e6:.1f} MB\n")
+    print(f"{'mode':<8}{'rescore':>8}{'recall@' + str(args.top_k):>12}{'RAM MB':>10}{'x f32':>8}{'ms/q':>8}")
+    for row in rows:
+        print(
+            f"{row['mode']:<8}{row['rescore_factor']:>8}{row[f'recall@{args.top_k}']:>12.3f}"
+            f"{row['ram_bytes'] / 1e6:>10.1f}{row['ram_vs_float32']:>8.3f}{row['ms_per_query']:>8.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "float32_bytes": float32_bytes, "results": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
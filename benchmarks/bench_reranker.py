@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Cross-encoder reranking: latency vs. quality on a labeled fixture
+
+Builds the labeled relevance fixture (see test_data/create_test_files.py),
+retrieves candidates with the configured bi-encoder and, for each candidate
+count, reranks all queries in one shared batch as the server does. Reports
+per-request latency next to MRR@10, hit@1, recall@5, nDCG@10 and how often the
+top hit's score gives the right verdict at the comparison threshold.
+
+Usage:
+    python benchmarks/bench_reranker.py --candidates 0 5 10 20 40
+    python benchmarks/bench_reranker.py --candidates 20 --time-budget-ms 50 100 200
+"""
+
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "test_data"))
+
+from create_test_files import create_relevance_fixture
+from embedding_backends import create_embedding_backend
+from reranker import CrossEncoderReranker, rerank_order
+from similarity import normalize_rows
+
+
+def quality(rankings: list, labels: list, top_scores: list, threshold: float) -> dict:
+    """Ranking metrics over all queries; rankings are passage ids, best first"""
+    mrr, hit1, recall5, ndcg, verdicts = [], [], [], [], []
+    for ranking, relevant, top_score in zip(rankings, labels, top_scores):
+        relevant = set(relevant)
+        first = next((rank for rank, pid in enumerate(ranking[:10]) if pid in relevant), None)
+        mrr.append(0.0 if first is None else 1.0 / (first + 1))
+        hit1.append(float(bool(ranking) and ranking[0] in relevant))
+        recall5.append(len(relevant & set(ranking[:5])) / len(relevant))
+        dcg = sum(1.0 / math.log2(rank + 2) for rank, pid in enumerate(ranking[:10]) if pid in relevant)
+        ideal = sum(1.0 / math.log2(rank + 2) for rank in range(min(10, len(relevant))))
+        ndcg.append(dcg / ideal)
+        # Compliance verdict: accept when the top score clears the threshold; right if the top hit is relevant
+        verdicts.append((top_score >= threshold) == (bool(ranking) and ranking[0] in relevant))
+    return {
+        "mrr@10": round(statistics.mean(mrr), 4),
+        "hit@1": round(statistics.mean(hit1), 4),
+        "recall@5": round(statistics.mean(recall5), 4),
+        "ndcg@10": round(statistics.mean(ndcg), 4),
+        "verdict_accuracy": round(statistics.mean(verdicts), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reranker latency/quality benchmark")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[0, 5, 10, 20, 40],
+                        help="Candidates reranked per query (0 = bi-encoder only)")
+    parser.add_argument("--time-budget-ms", type=float, nargs="+", default=[0],
+                        help="Per-request rerank budgets to try (0 = unlimited)")
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--passages", type=int, default=400)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.7, help="Comparison engine threshold")
+    parser.add_argument("--embedding-backend", default="pytorch")
+    parser.add_argument("--embedding-model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--reranker-model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--reranker-backend", default="pytorch", choices=["pytorch", "onnx"])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per setting (median is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_path = create_relevance_fixture(Path(tmp) / "relevance.json", args.queries, args.passages, args.seed)
+        fixture = json.loads(fixture_path.read_text())
+    passages = fixture["passages"]
+    queries = [item["query"] for item in fixture["queries"]]
+    labels = [item["relevant"] for item in fixture["queries"]]
+
+    embeddings = create_embedding_backend(args.embedding_backend, args.embedding_model)
+    passage_vectors = normalize_rows(embeddings.embed_documents(passages))
+    query_vectors = normalize_rows(embeddings.embed_documents(queries))
+    # Cosine similarity, as the server's normalized inner-product indexes report it
+    cosine = query_vectors @ passage_vectors.T
+    max_candidates = max(max(args.candidates), args.top_k)
+    retrieved = np.argsort(-cosine, axis=1, kind="stable")[:, :max_candidates]
+    similarities = np.take_along_axis(cosine, retrieved, axis=1)
+
+    reranker = CrossEncoderReranker(
+        args.reranker_model,
+        backend=args.reranker_backend,
+        batch_size=args.batch_size,
+        threads=args.threads
+    )
+    reranker.rerank(queries[:1], [[passages[0]]])  # warm up
+
+    rows = []
+    for candidates in args.candidates:
+        for budget_ms in (args.time_budget_ms if candidates else [0]):
+            rankings = [list(map(int, ids[:args.top_k])) for ids in retrieved]
+            top_scores = [float(s[0]) for s in similarities]
+            latencies = []
+            if candidates:
+                pool = retrieved[:, :candidates]
+                texts = [[passages[pid] for pid in ids] for ids in pool]
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    scores = reranker.rerank(queries, texts, time_budget=budget_ms / 1000 if budget_ms else None)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                rankings, top_scores = [], []
+                for ids, query_scores, bi_scores in zip(pool, scores, similarities):
+                    order = rerank_order(query_scores)
+                    rankings.append([int(ids[i]) for i in order][:args.top_k])
+                    best = order[0]
+                    top_scores.append(float(bi_scores[best]) if np.isnan(query_scores[best]) else float(query_scores[best]))
+                scored = sum(int((~np.isnan(s)).sum()) for s in scores)
+            else:
+                scored = 0
+
+            rows.append({
+                "candidates": candidates,
+                "time_budget_ms": budget_ms or None,
+                "pairs_scored": scored,
+                "request_ms": round(statistics.median(latencies), 2) if latencies else 0.0,
+                "per_query_ms": round(statistics.median(latencies) / len(queries), 3) if latencies else 0.0,
+                **quality(rankings, labels, top_scores, args.threshold)
+            })
+
+    print(f"{len(queries)} queries, {len(passages)} passages, reranker {reranker.describe()}\n")
+    header = (f"{'cands':>6} {'budget':>7} {'scored':>7} {'req ms':>9} {'q ms':>7} "
+              f"{'MRR@10':>7} {'hit@1':>6} {'R@5':>6} {'nDCG@10':>8} {'verdict':>8}")
+    print(header)
+    for row in rows:
+        print(f"{row['candidates']:>6} {str(row['time_budget_ms'] or '-'):>7} {row['pairs_scored']:>7} "
+              f"{row['request_ms']:>9} {row['per_query_ms']:>7} {row['mrr@10']:>7} {row['hit@1']:>6} "
+              f"{row['recall@5']:>6} {row['ndcg@10']:>8} {row['verdict_accuracy']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the server entry point and the CLI
+
+Each measurement runs in a fresh interpreter:
+  - server: what main.py does before mcp.run() (import + build FastMCP)
+  - cli:    `python client.py list`
+  - first-query: import plus the heavy imports a first ingest/query pays
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+SCENARIOS = {
+    "server": [sys.executable, "-c", "import sys; sys.path.insert(0, '.'); from src.rag_server import mcp"],
+    "cli": [sys.executable, "client.py", "list"],
+    "first-query": [
+        sys.executable, "-c",
+        "import src.rag_server as r; import fitz; "
+        "from langchain_community.vectorstores import FAISS; r.get_embeddings()"
+    ],
+}
+
+
+def time_command(command: list) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=str(ROOT), capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server/CLI cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", default=["server", "cli"], choices=list(SCENARIOS))
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios:
+        times = [time_command(SCENARIOS[name]) for _ in range(args.runs)]
+        results[name] = {
+            "min_seconds": min(times),
+            "median_seconds": statistics.median(times),
+            "runs": times
+        }
+        print(f"{name:<12} min {min(times):.3f}s  median {statistics.median(times):.3f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Text splitter throughput: FastTextSplitter vs. LangChain's RecursiveCharacterTextSplitter
+
+Builds a synthetic multi-page document (paragraphs, line-wrapped prose, long
+unbroken tokens), splits it with both implementations using the server's
+chunk size/overlap, checks the chunks are identical and reports chars/s.
+
+Usage:
+    python benchmarks/bench_text_splitter.py --chars 5000000
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chunking import FastTextSplitter
+
+WORDS = ("the pump shall deliver rated flow at nominal pressure with tolerance of "
+         "plus minus five percent under continuous duty conditions").split()
+
+
+def synthetic_pages(total_chars: int, page_chars: int, seed: int) -> list:
+    """Pages of paragraphs with wrapped lines and the occasional very long token"""
+    rng = random.Random(seed)
+    pages = []
+    remaining = total_chars
+    while remaining > 0:
+        parts = []
+        size = 0
+        while size < min(page_chars, remaining):
+            if rng.random() < 0.02:
+                line = "".join(rng.choice("abcdef0123456789") for _ in range(rng.randint(200, 1500)))
+            else:
+                line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 16)))
+            parts.append(line)
+            parts.append("\n\n" if rng.random() < 0.25 else "\n")
+            size += len(line) + 1
+        page = "".join(parts)
+        pages.append(page)
+        remaining -= len(page)
+    return pages
+
+
+def best_of(repeat: int, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text splitter chars/s benchmark")
+    parser.add_argument("--chars", type=int, default=2_000_000, help="Total document size")
+    parser.add_argument("--page-chars", type=int, default=3000, help="Approximate characters per page")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per splitter (best is kept)")
+    parser.add_argument("--whole", action="store_true", help="Split the document as one string instead of per page")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+
+    pages = synthetic_pages(args.chars, args.page_chars, args.seed)
+    if args.whole:
+        pages = ["\n\n".join(pages)]
+    total_chars = sum(len(p) for p in pages)
+
+    reference = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    fast = FastTextSplitter(args.chunk_size, args.chunk_overlap)
+
+    reference_seconds, reference_chunks = best_of(
+        args.repeat, lambda: [chunk for page in pages for chunk in reference.split_text(page)]
+    )
+    fast_seconds, fast_chunks = best_of(
+        args.repeat, lambda: [chunk for page in pages for chunk in fast.split_text(page)]
+    )
+    spans_seconds, spans = best_of(
+        args.repeat, lambda: list(fast.split_pages(pages))
+    )
+
+    if fast_chunks != reference_chunks:
+        print("ERROR: FastTextSplitter output differs from RecursiveCharacterTextSplitter")
+        return 1
+
+    rows = [
+        {"splitter": "RecursiveCharacterTextSplitter.split_text", "seconds": reference_seconds},
+        {"splitter": "FastTextSplitter.split_text", "seconds": fast_seconds},
+        {"splitter": "FastTextSplitter.split_pages (offsets)", "seconds": spans_seconds},
+    ]
+    for row in rows:
+        row["seconds"] = round(row["seconds"], 4)
+        row["chars_per_second"] = round(total_chars / max(row["seconds"], 1e-9))
+        row["speedup"] = round(reference_seconds / max(row["seconds"], 1e-9), 2)
+
+    print(f"{len(pages)} pages, {total_chars:,} chars, {len(spans)} chunks "
+          f"(size {args.chunk_size}, overlap {args.chunk_overlap}); outputs identical\n")
+    print(f"{'splitter':<44} {'seconds':>9} {'chars/s':>14} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['splitter']:<44} {row['seconds']:>9} {row['chars_per_second']:>14,} {row['speedup']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "chunks": len(spans), "results": rows}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Reproducible end-to-end benchmark suite: ingest, query and compliance
+
+Generates a deterministic synthetic corpus (see test_data/create_test_files.py),
+runs it through the server tools in-process and reports:
+  - ingestion pages/s, chunks/s and MB/s per format
+  - query p50/p99 latency and QPS, with the semantic query cache off and
+    separately with every query answered from it
+  - compliance requirements/s
+  - peak RSS
+
+Results are written as JSON. With --baseline, each metric is compared with a
+previous run and the script exits non-zero if any metric regressed by more
+than --threshold (a fraction, 0.10 = 10%).
+
+Usage:
+    python benchmarks/run_benchmarks.py --json results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --threshold 0.10
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "test_data"))
+
+from create_test_files import create_benchmark_corpus, synthetic_queries
+from metrics import peak_rss_bytes
+
+# Metric name -> True if higher is better
+METRIC_DIRECTIONS = {
+    "ingest.pdf.pages_per_second": True,
+    "ingest.pdf.chunks_per_second": True,
+    "ingest.excel.chunks_per_second": True,
+    "ingest.word.chunks_per_second": True,
+    "ingest.pdf.mb_per_second": True,
+    "ingest.excel.mb_per_second": True,
+    "ingest.word.mb_per_second": True,
+    "query.p50_ms": False,
+    "query.p99_ms": False,
+    "query.qps": True,
+    "query_cached.p50_ms": False,
+    "query_cached.qps": True,
+    "compliance.requirements_per_second": True,
+    "memory.peak_rss_mb": False,
+}
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = q * (len(ordered) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_ingest(server, files: dict, pdf_pages: int) -> dict:
+    results = {}
+    for file_type in ("pdf", "excel", "word"):
+        path = Path(files[file_type])
+        start = time.perf_counter()
+        result = server.ingest_document(str(path), f"bench_{file_type}")
+        seconds = time.perf_counter() - start
+        if not result.get("success"):
+            raise RuntimeError(f"Ingest of {path.name} failed: {result.get('error')}")
+
+        chunks = result["chunks_created"]
+        size_mb = path.stat().st_size / (1024 * 1024)
+        entry = {
+            "seconds": seconds,
+            "chunks": chunks,
+            "file_mb": size_mb,
+            "chunks_per_second": chunks / seconds,
+            "mb_per_second": size_mb / seconds,
+            "stages": result.get("throughput", [])
+        }
+        if file_type == "pdf":
+            entry["pages"] = pdf_pages
+            entry["pages_per_second"] = pdf_pages / seconds
+        results[file_type] = entry
+        print(f"  ingest {file_type:<6} {seconds:7.2f}s  {chunks:6d} chunks  {chunks / seconds:8.1f} chunks/s")
+    return results
+
+
+def bench_queries(server, queries: list, top_k: int, cache: bool = False) -> dict:
+    """
+    Time rag_query over the queries. With cache=False the semantic query
+    cache is disabled so every query is searched; with cache=True it is
+    warmed with one pass first, so the timed pass measures cache hits.
+    """
+    cache_enabled = server.QUERY_CACHE_ENABLED
+    server.QUERY_CACHE_ENABLED = cache
+    server.query_cache.clear()
+    try:
+        for query in (queries if cache else queries[:1]):  # warm-up
+            server.rag_query("bench_pdf", query, top_k)
+        latencies = []
+        hits = 0
+        start = time.perf_counter()
+        for query in queries:
+            t = time.perf_counter()
+            result = server.rag_query("bench_pdf", query, top_k)
+            latencies.append(time.perf_counter() - t)
+            hits += bool(result.get("cache_hit"))
+        seconds = time.perf_counter() - start
+    finally:
+        server.QUERY_CACHE_ENABLED = cache_enabled
+        server.query_cache.clear()
+
+    results = {
+        "queries": len(queries),
+        "top_k": top_k,
+        "cache": cache,
+        "cache_hits": hits,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "qps": len(queries) / seconds
+    }
+    label = "cached" if cache else "query "
+    print(f"  {label} p50 {results['p50_ms']:.2f}ms  p99 {results['p99_ms']:.2f}ms  {results['qps']:.1f} QPS")
+    return results
+
+
+def bench_compliance(server, requirements: list) -> dict:
+    start = time.perf_counter()
+    result = server.compare_document_to_specification("bench_pdf", requirements, "Benchmark Spec")
+    seconds = time.perf_counter() - start
+    if not result.get("success"):
+        raise RuntimeError(f"Compliance run failed: {result.get('error')}")
+
+    results = {
+        "requirements": len(requirements),
+        "seconds": seconds,
+        "requirements_per_second": len(requirements) / seconds,
+        "compliance_percentage": result["compliance_percentage"]
+    }
+    print(f"  compliance {len(requirements)} requirements  {results['requirements_per_second']:.1f} req/s")
+    return results
+
+
+def flatten(results: dict) -> dict:
+    """Pick the tracked metrics out of a results document"""
+    flat = {}
+    for name in METRIC_DIRECTIONS:
+        node = results
+        for part in name.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        if isinstance(node, (int, float)):
+            flat[name] = float(node)
+    return flat
+
+
+def compare_to_baseline(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare tracked metrics with a baseline run
+
+    Returns:
+        One row per metric present in both runs: name, baseline, current,
+        relative change (positive = better) and whether it regressed
+    """
+    rows = []
+    current_flat, baseline_flat = flatten(current), flatten(baseline)
+    for name, higher_is_better in METRIC_DIRECTIONS.items():
+        if name not in current_flat or name not in baseline_flat or baseline_flat[name] == 0:
+            continue
+        change = (current_flat[name] - baseline_flat[name]) / baseline_flat[name]
+        if not higher_is_better:
+            change = -change
+        rows.append({
+            "metric": name,
+            "baseline": baseline_flat[name],
+            "current": current_flat[name],
+            "change": change,
+            "regressed": change < -threshold
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ingest/query/compliance benchmark")
+    parser.add_argument("--corpus-dir", help="Reuse or create the corpus here (default: temporary directory)")
+    parser.add_argument("--pdf-pages", type=int, default=200)
+    parser.add_argument("--xlsx-rows", type=int, default=20000)
+    parser.add_argument("--docx-paragraphs", type=int, default=2000)
+    parser.add_argument("--requirements", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with results from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    import src.rag_server as server
+
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as tmp:
+        corpus_dir = Path(args.corpus_dir or tmp)
+        print(f"Generating corpus in {corpus_dir} ...")
+        start = time.perf_counter()
+        files = create_benchmark_corpus(
+            corpus_dir, args.pdf_pages, args.xlsx_rows, args.docx_paragraphs, args.requirements, args.seed
+        )
+        print(f"  corpus ready in {time.perf_counter() - start:.1f}s")
+
+        requirements = Path(files["requirements"]).read_text().splitlines()
+        queries = synthetic_queries(args.queries, args.seed)
+
+        try:
+            results = {
+                "environment": {
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "embedding_backend": server.EMBEDDING_BACKEND,
+                    "embedding_workers": server.EMBEDDING_WORKERS,
+                    "quantization": server.EMBEDDING_QUANTIZATION,
+                    "query_cache": server.QUERY_CACHE_ENABLED,
+                    "query_cache_threshold": server.QUERY_CACHE_THRESHOLD,
+                    "rerank": server.RERANK_ENABLED,
+                    "rerank_model": server.RERANK_MODEL,
+                    "rerank_candidates": server.RERANK_CANDIDATES,
+                    "diversity_mode": server.DIVERSITY_MODE
+                },
+                "config": vars(args),
+                "ingest": bench_ingest(server, files, args.pdf_pages),
+                "query": bench_queries(server, queries, args.top_k),
+                "query_cached": bench_queries(server, queries, args.top_k, cache=True),
+                "compliance": bench_compliance(server, requirements),
+            }
+        finally:
+            for file_type in ("pdf", "excel", "word"):
+                if f"bench_{file_type}" in server.vector_stores:
+                    server.delete_document_index(f"bench_{file_type}")
+
+    results["memory"] = {"peak_rss_mb": peak_rss_bytes() / (1024 * 1024)}
+    print(f"  peak RSS {results['memory']['peak_rss_mb']:.0f} MB")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        rows = compare_to_baseline(results, baseline, args.threshold)
+        results["baseline_comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "metrics": rows}
+
+        print(f"\n{'metric':<38}{'baseline':>12}{'current':>12}{'change':>9}")
+        for row in rows:
+            flag = "  REGRESSION" if row["regressed"] else ""
+            print(f"{row['metric']:<38}{row['baseline']:>12.2f}{row['current']:>12.2f}{row['change']:>+9.1%}{flag}")
+        regressions = [row["metric"] for row in rows if row["regressed"]]
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+            exit_code = 1
+        else:
+            print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
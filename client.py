@@ -186,9 +186,15 @@ class RAGClient:
         if not result.get("success"):
             print(f"✗ Error: {result.get('error', 'Unknown error')}")
             return
-        
+
+        if "report_path" in result:
+            # Large reports are streamed to a file by the server
+            print(f"✓ Report saved to: {result['report_path']} ({result['bytes']} bytes)")
+            print(f"\n{result['summary']}")
+            return
+
         report_text = result.get("report", "")
-        
+
         # Save report
         if output_format == "json":
             ext = ".json"
@@ -241,6 +247,43 @@ class RAGClient:
             else:
                 print(f"  {key}: {value}")
     
+    def load_test(self, mix_file: str, document_name: str = None, top_k: int = 5,
+                  output_file: str = None, **options) -> None:
+        """Drive the server over MCP with concurrent sessions and report latency/throughput"""
+        from src.load_generator import LoadTestConfig, load_query_mix, run_load_test
+        
+        mix = load_query_mix(mix_file, document_name, top_k)
+        config = LoadTestConfig(**{k: v for k, v in options.items() if v is not None})
+        
+        mode = f"open loop at {config.rate}/s" if config.rate else "closed loop"
+        volume = f"{config.duration}s" if config.duration else f"{config.requests} requests"
+        print(f"🚀 Load test: {config.sessions} {config.transport} sessions, {mode}, {volume}, "
+              f"{len(mix)} request types")
+        
+        summary = run_load_test(config, mix)
+        
+        latency = summary["latency"]
+        print(f"\n✓ {summary['successes']}/{summary['requests']} succeeded in {summary['elapsed_seconds']:.1f}s")
+        print(f"  Throughput: {summary['throughput_rps']:.1f} req/s")
+        print(f"  Error rate: {summary['error_rate']:.2%}")
+        print(f"  Latency:    p50 {latency['p50_ms']:.1f}ms | p90 {latency['p90_ms']:.1f}ms | "
+              f"p99 {latency['p99_ms']:.1f}ms | max {latency['max_ms']:.1f}ms")
+        if "queue_delay" in summary:
+            print(f"  Queue wait: p50 {summary['queue_delay']['p50_ms']:.1f}ms | "
+                  f"p99 {summary['queue_delay']['p99_ms']:.1f}ms")
+        for tool_name, stats in summary["per_tool"].items():
+            print(f"  {tool_name}: {stats['requests']} requests, {stats['errors']} errors, "
+                  f"p50 {stats['latency']['p50_ms']:.1f}ms, p99 {stats['latency']['p99_ms']:.1f}ms")
+        for error, count in summary["top_errors"].items():
+            print(f"  ✗ {count}x {error}")
+        for failure in summary.get("session_failures", []):
+            print(f"  ✗ session failed: {failure}")
+        
+        if output_file:
+            with open(output_file, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"\n✓ Results saved to: {output_file}")
+    
     def delete(self, document_name: str) -> None:
         """Delete document index"""
         result = delete_document_index(document_name)
@@ -271,6 +314,12 @@ Examples:
   
   # List all documents
   python client.py list
+  
+  # Load test: 8 concurrent stdio sessions, 500 queries from a file
+  python client.py loadtest queries.txt -d my_document -c 8 -r 500
+  
+  # Open-loop load at 50 req/s against an HTTP server for 60s
+  python client.py loadtest mix.json --transport http --url http://127.0.0.1:8000/mcp --rate 50 --duration 60
         """
     )
     
@@ -325,6 +374,25 @@ Examples:
     delete_parser = subparsers.add_parser("delete", help="Delete document index")
     delete_parser.add_argument("document", help="Document name")
     
+    # Load test command
+    load_parser = subparsers.add_parser("loadtest", aliases=["bench"],
+                                        help="Concurrent load test over the MCP transport")
+    load_parser.add_argument("mix", help="Query mix: text (one query per line) or JSON/JSONL tool calls")
+    load_parser.add_argument("-d", "--document", help="Document for plain-text query mixes")
+    load_parser.add_argument("-k", "--top-k", type=int, default=5, help="top_k for plain-text query mixes")
+    load_parser.add_argument("-t", "--transport", choices=["stdio", "http"], default="stdio",
+                             help="stdio spawns one server per session")
+    load_parser.add_argument("--url", help="Streamable HTTP endpoint (default: http://127.0.0.1:8000/mcp)")
+    load_parser.add_argument("-c", "--sessions", type=int, default=4, help="Concurrent MCP sessions")
+    load_parser.add_argument("-r", "--requests", type=int, default=200, help="Total requests")
+    load_parser.add_argument("--duration", type=float, help="Run for this many seconds instead")
+    load_parser.add_argument("--rate", type=float, help="Open-loop Poisson arrival rate (req/s)")
+    load_parser.add_argument("--warmup", type=int, default=5, help="Warm-up requests per session")
+    load_parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (seconds)")
+    load_parser.add_argument("--seed", type=int, default=0)
+    load_parser.add_argument("--server-log", help="File for stdio server stderr")
+    load_parser.add_argument("-o", "--output", help="Write the JSON summary to this file")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -353,6 +421,14 @@ Examples:
             client.summary(args.document)
         elif args.command == "delete":
             client.delete(args.document)
+        elif args.command in ("loadtest", "bench"):
+            client.load_test(
+                args.mix, args.document, args.top_k, args.output,
+                transport=args.transport, url=args.url, sessions=args.sessions,
+                requests=args.requests, duration=args.duration, rate=args.rate,
+                warmup=args.warmup, timeout=args.timeout, seed=args.seed,
+                server_log=args.server_log
+            )
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
         sys.exit(1)
@@ -8,12 +8,60 @@ LOG_LEVEL = "INFO"
 # Embedding Model
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
+EMBEDDING_BACKEND = "pytorch"  # "pytorch" or "onnx"
+EMBEDDING_MAX_BATCH_TOKENS = 8192  # Padded tokens per batch (ONNX backend)
+ONNX_QUANTIZE_INT8 = False  # Dynamic int8 quantization of the exported model
+ONNX_INTRA_OP_THREADS = 0  # 0 = ONNX Runtime default
+ONNX_INTER_OP_THREADS = 0
+EMBEDDING_WORKERS = 1  # 1 = in-process, N > 1 = worker pool, 0 = one replica per physical core
+EMBEDDING_THREADS_PER_WORKER = 1
 
 # Vector Store Settings
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 TOP_K_DEFAULT = 5
 
+# Vector Quantization
+EMBEDDING_QUANTIZATION = None  # None, "fp16", "int8" or "binary"
+QUANTIZATION_RESCORE_FACTOR = 4  # Candidates rescored at full precision per result
+
+# Shared Corpus Index
+CORPUS_INDEX_ENABLED = False  # Opt-in: stores every chunk vector and text a second time (see CONFIG.md)
+CORPUS_COMPACTION_THRESHOLD = 0.3  # Tombstoned fraction of a segment that triggers a rewrite
+CORPUS_COMPACTION_INTERVAL = 30  # Seconds between background flush/merge/compaction passes
+CORPUS_MEMTABLE_MAX_ROWS = 20000  # In-memory chunks before a flush to an immutable segment
+CORPUS_FLUSH_INTERVAL = 60  # Seconds before a non-empty memtable is flushed anyway
+CORPUS_MERGE_FACTOR = 4  # Segments of similar size merged at a time
+
+# Cross-Encoder Reranking
+RERANK_ENABLED = False
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_BACKEND = "pytorch"  # "pytorch" or "onnx"
+RERANK_CANDIDATES = 20  # Bi-encoder candidates rescored per query
+RERANK_TIME_BUDGET_MS = 500  # Per request; candidates not reached keep their bi-encoder order
+RERANK_BATCH_SIZE = 32
+RERANK_THREADS = 0  # 0 lets the runtime decide
+
+# Diversity-Aware Retrieval
+DIVERSITY_MODE = "none"  # "none", "mmr" or "cluster"
+DIVERSITY_CANDIDATES = 20  # Candidates re-selected per query (at least 2 * top_k)
+MMR_LAMBDA = 0.5  # 1 = relevance only, 0 = novelty only
+CLUSTER_THRESHOLD = 0.9  # Cosine similarity at which two chunks are near-duplicates
+
+# Semantic Query Cache
+QUERY_CACHE_ENABLED = False  # Opt-in: a hit returns another query's results (see CONFIG.md)
+QUERY_CACHE_MAX_ENTRIES = 1024  # Least recently used entries are evicted beyond this
+QUERY_CACHE_TTL_SECONDS = 600
+QUERY_CACHE_THRESHOLD = 0.95  # Cosine similarity between queries that counts as the same question
+
+# Compliance Reports
+REPORT_INLINE_MAX_ITEMS = 200  # Larger reports are written to REPORT_DIR and returned as a path
+
+# Deduplication
+DEDUP_ENABLED = True
+DEDUP_NEAR_THRESHOLD = 0.85  # Estimated Jaccard similarity for near-duplicates
+DEDUP_DROP_NEAR_DUPLICATES = False  # Near-duplicates are only tagged unless this is True
+
 # File Processing
 MAX_FILE_SIZE_MB = 500
 SUPPORTED_FORMATS = ["pdf", "xlsx", "xls", "docx", "doc", "png", "jpg", "jpeg", "bmp", "gif", "tiff"]
@@ -24,16 +72,34 @@ OCR_LANGUAGE = "eng"
 # For Windows, set this path to your Tesseract installation:
 # TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
-# Database Paths (relative to project root)
-VECTOR_STORE_DIR = "data/vector_stores"
-DOCUMENT_CACHE_DIR = "data/document_cache"
-METADATA_DIR = "data/metadata"
-LOG_DIR = "logs"
+# Data Paths: DATA_DIR is relative to the project root (env: DATA_DIR), the others to DATA_DIR
+DATA_DIR = "data"
+VECTOR_STORE_DIR = "vector_stores"
+DOCUMENT_CACHE_DIR = "document_cache"
+METADATA_DIR = "metadata"
+SNAPSHOT_DIR = "snapshots"
+COMPLIANCE_MATRIX_DIR = "compliance_matrices"
+REPORT_DIR = "reports"
+CORPUS_INDEX_DIR = "corpus_index"
+ONNX_CACHE_DIR = "models/onnx"
+LOG_DIR = "logs"  # Relative to the project root
 
 # Performance Settings
 NUM_WORKERS = 4
 CACHE_SIZE_MB = 1000
 
+# HTTP Deployment (python main.py --transport http --workers N)
+HTTP_HOST = "127.0.0.1"  # env: RAG_HTTP_HOST
+HTTP_PORT = 8000  # env: RAG_HTTP_PORT
+
+# Sharding (src/shard_coordinator.py)
+SHARD_URLS = []  # env: RAG_SHARDS (comma-separated MCP URLs)
+SHARD_DEADLINE_SECONDS = 2.0  # env: RAG_SHARD_DEADLINE; slower shards are reported as partial
+
+# Metrics Settings
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 0  # Prometheus /metrics endpoint; 0 disables it (env: RAG_METRICS_PORT)
+
 # Development Settings
 DEBUG_MODE = False
 SAVE_INTERMEDIATE_RESULTS = True
@@ -1,30 +1,93 @@
 #!/usr/bin/env python3
 """
 Main entry point for the RAG MCP Server
+
+    python main.py                                   # stdio (single process)
+    python main.py --transport http --workers 4      # streamable HTTP, 4 worker processes
 """
 
+import os
 import sys
+import argparse
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from config.config import HTTP_HOST, HTTP_PORT
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="RAG MCP Server")
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio",
+                        help="stdio for a single client, http for streamable HTTP")
+    parser.add_argument("--host", default=os.environ.get("RAG_HTTP_HOST", HTTP_HOST), help="HTTP bind address")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("RAG_HTTP_PORT", HTTP_PORT)), help="HTTP port")
+    parser.add_argument("--workers", type=int, default=1, help="HTTP worker processes sharing the port")
+    return parser.parse_args()
+
+def run_http(args):
+    """Serve streamable HTTP; workers share memory-mapped indexes and follow the index manifest"""
+    import uvicorn
+
+    os.environ["RAG_HTTP_HOST"] = args.host
+    os.environ["RAG_HTTP_PORT"] = str(args.port)
+    os.environ["RAG_INDEX_SYNC"] = "1"
+
+    from src.rag_server import index_coordinator, recover_indexes, migrate_indexes, start_metrics_endpoint
+
+    # Finish or undo writes interrupted by a crash before any worker loads the stores
+    recover_indexes()
+    index_coordinator.bootstrap()
+    # Re-normalize stores saved before cosine scoring (published, so the manifest is re-read)
+    migrate_indexes()
+    manifest = index_coordinator.read_manifest()
+    print(f"Serving {len(manifest['documents'])} indexed document(s) "
+          f"at http://{args.host}:{args.port}/mcp with {args.workers} worker(s)", file=sys.stderr)
+
+    if args.workers == 1:
+        # Optional Prometheus endpoint (RAG_METRICS_PORT); per-worker metrics
+        # are available from the get_server_metrics tool
+        start_metrics_endpoint()
+
+    uvicorn.run(
+        "src.rag_server:create_http_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="info"
+    )
+
 def main():
     """Start the MCP server"""
+    args = parse_args()
     try:
-        from src.rag_server import mcp
+        # stdout carries the MCP protocol in stdio mode, so status goes to stderr
+        print("Starting RAG MCP Server...", file=sys.stderr)
+
+        if args.transport == "http":
+            run_http(args)
+            return
+
+        from src.rag_server import mcp, recover_indexes, migrate_indexes, start_metrics_endpoint
+
+        # Finish or undo writes interrupted by a crash, then re-normalize pre-cosine stores
+        recover_indexes()
+        migrate_indexes()
+
+        print("Server is ready to accept connections via MCP protocol.", file=sys.stderr)
 
-        print("Starting RAG MCP Server...")
-        print("Server is ready to accept connections via MCP protocol.")
+        # Optional Prometheus endpoint (RAG_METRICS_PORT)
+        start_metrics_endpoint()
 
         # Run the MCP server
         mcp.run()
 
     except KeyboardInterrupt:
-        print("\nServer stopped by user")
+        print("\nServer stopped by user", file=sys.stderr)
         sys.exit(0)
     except Exception as e:
-        print(f"Error starting server: {e}")
+        print(f"Error starting server: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
         sys.exit(1)
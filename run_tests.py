@@ -23,6 +23,685 @@ def print_section(title):
     print(f"  {title}")
     print(f"{'='*60}\n")
 
+# Cold-start import budget for src.rag_server (seconds) and modules that must stay lazy
+IMPORT_TIME_BUDGET = 1.5
+LAZY_MODULES = ["mcp", "fitz", "faiss", "torch", "sentence_transformers",
+                "langchain_community", "langchain_huggingface", "langchain_text_splitters"]
+
+def test_import_time_budget():
+    """Test that importing the server stays cheap"""
+    print_section("TEST 0: Import Time Budget")
+
+    import subprocess
+    probe = (
+        "import sys, time, json; t = time.perf_counter(); import src.rag_server; "
+        "elapsed = time.perf_counter() - t; "
+        f"print(json.dumps([elapsed, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))"
+    )
+    try:
+        # Best of three fresh interpreters, so one slow disk read does not fail the run
+        runs = []
+        for _ in range(3):
+            output = subprocess.run(
+                [sys.executable, "-c", probe],
+                cwd=str(Path(__file__).parent),
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            runs.append(json.loads(output))
+        elapsed = min(r[0] for r in runs)
+        eager = runs[0][1]
+
+        print(f"  Import time: {elapsed:.3f}s (budget {IMPORT_TIME_BUDGET}s)")
+        print(f"  Heavy modules imported eagerly: {eager or 'none'}")
+        if elapsed > IMPORT_TIME_BUDGET or eager:
+            print(f"  Status: FAIL")
+            return False
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_splitter_equivalence():
+    """Test that FastTextSplitter produces the same chunks as LangChain's splitter"""
+    print_section("TEST 0b: Text Splitter Equivalence")
+
+    import random
+    import logging
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from src.chunking import FastTextSplitter
+
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+    rng = random.Random(42)
+    pieces = ["alpha", "beta", " ", "  ", "\n", "\n\n", "\n\n\n", "\t", "requirement 4.2 ", "x" * 120]
+    configs = [(1000, 200, None), (100, 20, None), (37, 0, None), (10, 10, None),
+               (50, 5, ["\n", " "]), (20, 3, [" "]), (1, 0, None)]
+    try:
+        cases = 0
+        for _ in range(150):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 600)))
+            for chunk_size, chunk_overlap, separators in configs:
+                expected = RecursiveCharacterTextSplitter(
+                    chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators
+                ).split_text(text)
+                fast = FastTextSplitter(chunk_size, chunk_overlap, separators)
+                actual = fast.split_text(text)
+                if actual != expected:
+                    print(f"  Mismatch for chunk_size={chunk_size}, overlap={chunk_overlap}, "
+                          f"separators={separators!r}, text={text[:80]!r}...")
+                    print(f"  Status: FAIL")
+                    return False
+                if any(text[start:end] != chunk for (start, end), chunk in zip(fast.split_spans(text), actual)):
+                    print(f"  Offsets do not slice back to the chunks")
+                    print(f"  Status: FAIL")
+                    return False
+                cases += 1
+
+        print(f"  {cases} random texts/configurations split identically")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_chunk_deduplication():
+    """Test that only exact duplicates are dropped; clauses differing in a value stay indexed"""
+    print_section("TEST 0c: Chunk Deduplication")
+
+    from src.dedup import ChunkDeduplicator, ChunkRef, chunk_fingerprint
+
+    clause = ("4.2 Pressure equipment. The pressure relief valve shall be rated for a maximum working "
+              "pressure of {} bar. Every valve shall be tested hydrostatically at 1.5 times the rated "
+              "pressure before delivery, and the test certificate shall be supplied with the valve. "
+              "Valves shall be fitted with a lifting lever, a sealed adjustment screw and a nameplate "
+              "stating the set pressure, the capacity and the year of manufacture, and shall be "
+              "installed upright with the discharge piped to a safe location away from personnel.")
+    chunks = [clause.format(10), clause.format(16), clause.format(10)]
+    try:
+        kept, report = ChunkDeduplicator().deduplicate("dedup_test", chunks)
+        texts = [chunk.text for chunk in kept]
+        print(f"  {report.stored_chunks} kept, {report.exact_duplicates} exact, {report.near_duplicates} near")
+        if report.near_duplicates != 1:
+            print(f"  Status: FAIL - the 10 bar / 16 bar clauses were not detected as near-duplicates")
+            return False
+        if texts != chunks[:2] or kept[0].duplicate_chunk_ids != [2] or kept[1].near_duplicate_of != 0:
+            print(f"  Status: FAIL - expected both clauses kept (16 bar tagged) and the exact copy dropped")
+            return False
+
+        kept, _ = ChunkDeduplicator(drop_near_duplicates=True).deduplicate("dedup_test", chunks)
+        if [chunk.text for chunk in kept] != chunks[:1] or kept[0].duplicate_chunk_ids != [1, 2]:
+            print(f"  Status: FAIL - drop_near_duplicates=True should keep only the first clause")
+            return False
+
+        # Exact hashing keeps case: a case variant is only a (kept) near-duplicate
+        kept, report = ChunkDeduplicator().deduplicate("dedup_test", [chunks[0], chunks[0].upper()])
+        if report.exact_duplicates != 0 or len(kept) != 2:
+            print(f"  Status: FAIL - a case variant was dropped as an exact duplicate")
+            return False
+
+        # Forgetting the first owner of a chunk keeps the fingerprint for the other owners
+        dedup = ChunkDeduplicator()
+        for name in ("doc_a", "doc_b", "doc_c"):
+            dedup.deduplicate(name, chunks[:1])
+        dedup.forget_document("doc_a")
+        owners = list(dedup._exact.get(chunk_fingerprint(chunks[0]), []))
+        kept, _ = dedup.deduplicate("doc_d", chunks[:1])
+        if owners != [ChunkRef("doc_b", 0), ChunkRef("doc_c", 0)] or kept[0].corpus_duplicate_of != ChunkRef("doc_b", 0):
+            print(f"  Status: FAIL - forgetting doc_a lost the other owners of its chunk: {owners}")
+            return False
+
+        print(f"  Both clauses stay retrievable; near-duplicates are dropped only on opt-in; shared chunks keep every owner")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_wal_recovery():
+    """Test that startup recovery rolls begun ingests back and prepared ingests/deletes forward"""
+    print_section("TEST 0d: Write-Ahead Log Recovery")
+
+    import json
+    import tempfile
+    from src.index_sync import IndexCoordinator, staging_path
+    from src.index_wal import IndexWriteAheadLog
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            stores, metadata = data_dir / "vector_stores", data_dir / "metadata"
+            stores.mkdir()
+            metadata.mkdir()
+            coordinator = IndexCoordinator(data_dir, stores)
+            wal = IndexWriteAheadLog(data_dir, coordinator)
+
+            def begin(op, name):
+                store, meta = stores / name, metadata / f"{name}_metadata.json"
+                if op == "ingest":
+                    staging_path(store).mkdir()
+                    (staging_path(store) / "index.faiss").write_text(name)
+                    staging_path(meta).write_text(json.dumps({"document_name": name}))
+                wal._append({
+                    "op_id": name, "state": "begin", "op": op, "document": name,
+                    "store_path": str(store), "metadata_path": str(meta),
+                    "staging": str(staging_path(store)), "metadata_staging": str(staging_path(meta))
+                })
+                return store, meta
+
+            # Crashed before prepared: only staging files exist
+            begun_store, begun_meta = begin("ingest", "begun")
+            # Crashed after prepared: the staged store is complete
+            prepared_store, prepared_meta = begin("ingest", "prepared")
+            wal._append({"op_id": "prepared", "state": "prepared"})
+            # Crashed mid-delete
+            (stores / "deleted").mkdir()
+            (stores / "deleted" / "index.faiss").write_text("old")
+            coordinator.publish("deleted", str(stores / "deleted"))
+            begin("delete", "deleted")
+            # Committed operations are left alone
+            begin("ingest", "committed")
+            wal._append({"op_id": "committed", "state": "commit"})
+            # The prepared record of the last ingest is torn: it must still roll back
+            torn_store, _ = begin("ingest", "torn")
+            with open(wal.path, "a") as f:
+                f.write('deadbeef {"op_id": "torn", "state": "prepared"}\n{"op_id": "torn", "sta')
+
+            pending = sorted(op["op_id"] for op in wal.pending())
+            outcomes = {op["document"]: op["outcome"] for op in wal.recover(stores, metadata)["operations"]}
+            documents = coordinator.read_manifest()["documents"]
+            print(f"  Pending before recovery: {pending}")
+            print(f"  Outcomes: {outcomes}")
+
+            expected = {"begun": "rolled_back", "prepared": "replayed", "deleted": "replayed", "torn": "rolled_back"}
+            checks = [
+                (pending == ["begun", "deleted", "prepared", "torn"], "pending operations (committed or torn tail)"),
+                (outcomes == expected, "recovery outcomes"),
+                (not begun_store.exists() and not staging_path(begun_store).exists()
+                 and not staging_path(begun_meta).exists(), "begun ingest rolled back"),
+                ((prepared_store / "index.faiss").read_text() == "prepared" and prepared_meta.exists()
+                 and "prepared" in documents, "prepared ingest installed and published"),
+                (not (stores / "deleted").exists() and "deleted" not in documents, "delete replayed"),
+                (not torn_store.exists() and not staging_path(torn_store).exists(), "torn ingest rolled back"),
+                (wal.read() == [] and wal.pending() == [], "log checkpointed")
+            ]
+            for ok, label in checks:
+                if not ok:
+                    print(f"  Status: FAIL - {label}")
+                    return False
+
+        print(f"  Interrupted operations recovered; torn and CRC-bad lines ignored")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_corpus_index():
+    """Test tombstones, re-adds, rewrites racing deletes and flush/refresh across two CorpusIndex instances"""
+    print_section("TEST 0e: Corpus Index Segments")
+
+    import tempfile
+    import numpy as np
+    from src.corpus_index import CorpusIndex, Segment
+
+    rng = np.random.default_rng(7)
+    vectors = {name: rng.normal(size=(4, 16)).astype(np.float32) for name in ("alpha", "beta", "gamma", "delta")}
+    new_beta = rng.normal(size=(4, 16)).astype(np.float32)
+
+    def records(name):
+        return [{"chunk_id": i, "content": f"{name} chunk {i}"} for i in range(4)]
+
+    def hit_documents(index, name):
+        return {record["document"] for record, _ in index.search(vectors[name][0], 16)}
+
+    original_write = Segment.__dict__["write"]
+
+    def racing(other, victim):
+        """Segment.write that deletes victim through the other instance once the new segment is written"""
+        def write(cls, *args):
+            segment = original_write.__func__(cls, *args)
+            other.delete_document(victim)
+            return segment
+        return classmethod(write)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = CorpusIndex(Path(tmp), memtable_max_rows=1000, merge_factor=2).open()
+            other = CorpusIndex(Path(tmp), memtable_max_rows=0, merge_factor=2).open()
+            checks = []
+
+            for name in ("alpha", "beta", "gamma"):
+                index.add_document(name, vectors[name], records(name), version=1)
+            other.refresh()
+            checks.append((other.documents() == {}, "memtable rows visible to another instance before flush"))
+            index.flush()
+            checks.append((other.refresh() and "alpha" in hit_documents(other, "alpha"),
+                           "flushed segment not picked up by refresh()"))
+
+            deleted = index.delete_document("alpha")
+            other.refresh()
+            checks.append((deleted == 4 and "alpha" not in hit_documents(index, "alpha")
+                           and "alpha" not in hit_documents(other, "alpha"), "tombstoned document still returned"))
+
+            index.add_document("beta", new_beta, records("beta"), version=2)
+            index.add_document("delta", vectors["delta"], records("delta"), version=1)
+            versions = {record["version"] for record, _ in index.search(vectors["beta"][0], 16)
+                        if record["document"] == "beta"}
+            checks.append((versions == {2} and index.documents()["beta"] == {"chunks": 4, "version": 2},
+                           "re-added document still returns its old version"))
+            index.flush()
+
+            # gamma is deleted after the merge copied its rows but before the swap
+            Segment.write = racing(other, "gamma")
+            try:
+                merged = index.merge()
+            finally:
+                Segment.write = original_write
+            checks.append((len(merged) == 1 and len(index.segments()) == 1, "segments not merged"))
+            checks.append(("gamma" not in hit_documents(index, "gamma") and "gamma" not in index.documents(),
+                           "row deleted during merge came back"))
+
+            # beta is deleted while compaction rewrites the merged segment
+            Segment.write = racing(other, "beta")
+            try:
+                compacted = index.compact()
+            finally:
+                Segment.write = original_write
+            other.refresh()
+            checks.append((len(compacted) == 1, "segment over the tombstone threshold not compacted"))
+            checks.append((set(index.documents()) == {"delta"} and set(other.documents()) == {"delta"}
+                           and "beta" not in hit_documents(index, "beta"), "row deleted during compaction came back"))
+
+            for ok, label in checks:
+                if not ok:
+                    print(f"  Status: FAIL - {label}")
+                    return False
+            print(f"  {index.stats()['segments']} segment(s), live documents: {sorted(index.documents())}")
+
+        print(f"  Deletes, re-adds, merge/compaction races and cross-instance refresh behave")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_query_cache():
+    """Test semantic query cache hits, threshold misses, TTL, LRU eviction, invalidation and versions"""
+    print_section("TEST 0f: Semantic Query Cache")
+
+    import numpy as np
+    from src.query_cache import SemanticQueryCache
+
+    def unit(*values):
+        vector = np.array(values, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    now = [0.0]
+    cache = SemanticQueryCache(max_entries=2, ttl_seconds=10, threshold=0.95, clock=lambda: now[0])
+    options = (5, False, "none")
+    query = unit(1, 0, 0)
+    paraphrase = unit(1, 0.1, 0)  # cosine 0.995
+    different = unit(1, 0.5, 0)   # cosine 0.894
+    try:
+        checks = []
+        cache.store("doc", options, 1, "max operating temperature", query, {"results": ["a"]})
+        hit = cache.lookup("doc", options, 1, paraphrase)
+        checks.append((hit is not None and hit[0].result == {"results": ["a"]}, "paraphrase above the threshold missed"))
+        checks.append((cache.lookup("doc", options, 1, different) is None, "query below the threshold hit"))
+        checks.append((cache.lookup("doc", (10, False, "none"), 1, query) is None, "different options hit"))
+        checks.append((cache.lookup("doc", options, 2, query) is None and len(cache) == 0,
+                       "entry for an older index version returned"))
+
+        cache.store("doc", options, 1, "q", query, {})
+        now[0] = 10.0
+        checks.append((cache.lookup("doc", options, 1, query) is None, "expired entry returned"))
+
+        cache.store("doc", options, 1, "first", unit(1, 0, 0), {"n": 1})
+        cache.store("doc", options, 1, "second", unit(0, 1, 0), {"n": 2})
+        cache.lookup("doc", options, 1, unit(1, 0, 0))  # first is now the most recently used
+        cache.store("doc", options, 1, "third", unit(0, 0, 1), {"n": 3})
+        checks.append((cache.lookup("doc", options, 1, unit(0, 1, 0)) is None
+                       and cache.lookup("doc", options, 1, unit(1, 0, 0)) is not None
+                       and len(cache) == 2, "least recently used entry not evicted at max_entries"))
+
+        cache = SemanticQueryCache(max_entries=4, ttl_seconds=10, threshold=0.95, clock=lambda: now[0])
+        cache.store("doc", options, 1, "first", unit(1, 0, 0), {})
+        cache.store("doc", options, 1, "second", unit(0, 1, 0), {})
+        cache.store("other", options, 1, "q", query, {})
+        dropped = cache.invalidate("doc")
+        checks.append((dropped == 2 and cache.lookup("doc", options, 1, unit(1, 0, 0)) is None
+                       and cache.lookup("other", options, 1, query) is not None, "invalidate() dropped the wrong entries"))
+
+        for ok, label in checks:
+            if not ok:
+                print(f"  Status: FAIL - {label}")
+                return False
+
+        print(f"  Hits, threshold and version misses, TTL, LRU eviction and invalidation behave")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_compliance_matrix():
+    """Test that reconcile() reuses only still-valid cells and save()/load() round-trips"""
+    print_section("TEST 0g: Compliance Matrix")
+
+    import tempfile
+    import numpy as np
+    from src.compliance_matrix import ComplianceMatrix
+
+    settings = {"embedding_model": "all-MiniLM-L6-v2", "embedding_backend": "pytorch"}
+    requirements = [{"id": f"R{i}", "text": f"requirement {i}"} for i in range(3)]
+    scores = np.array([[0.9, 0.75, 0.3], [0.8, 0.6, 0.72]], dtype=np.float32)
+    try:
+        matrix = ComplianceMatrix("test", ["doc_a", "doc_b"], [1, 1], requirements, 0.7, settings)
+        for row in range(2):
+            matrix.record_row(row, np.arange(3), scores[row], np.arange(3) + 10 * row)
+        matrix.requirement_vectors = np.eye(3, 4, dtype=np.float32)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            matrix.save(Path(tmp) / "test.npz")
+            loaded = ComplianceMatrix.load(Path(tmp) / "test.npz")
+        checks = [(
+            loaded.to_dict() == matrix.to_dict() and loaded.versions == [1, 1]
+            and np.array_equal(loaded.computed, matrix.computed)
+            and np.array_equal(loaded.requirement_vectors, matrix.requirement_vectors),
+            "save()/load() did not round-trip"
+        )]
+
+        edited = [requirements[0], {"id": "R1", "text": "requirement 1, revised"}, requirements[2]]
+        reconciled = loaded.reconcile(["doc_a", "doc_b"], [1, 1], edited, 0.7, settings)
+        checks.append((
+            reconciled.computed.tolist() == [[True, False, True], [True, False, True]]
+            and np.isnan(reconciled.requirement_vectors[1]).all()
+            and np.array_equal(reconciled.requirement_vectors[[0, 2]], matrix.requirement_vectors[[0, 2]]),
+            "an edited requirement should invalidate only its column"
+        ))
+
+        reconciled = loaded.reconcile(["doc_a", "doc_b"], [1, 2], requirements, 0.7, settings)
+        checks.append((
+            reconciled.computed.tolist() == [[True, True, True], [False, False, False]]
+            and np.array_equal(reconciled.scores[0], scores[0]),
+            "a new document version should invalidate only its row"
+        ))
+
+        reconciled = loaded.reconcile(["doc_a", "doc_b"], [1, 1], requirements, 0.8, settings)
+        checks.append((
+            reconciled.computed.all() and np.array_equal(reconciled.scores, scores)
+            and reconciled.to_dict()["status"] == [["compliant", "partial", "non-compliant"],
+                                                   ["compliant", "partial", "partial"]],
+            "a threshold change should only reclassify stored scores"
+        ))
+
+        reconciled = loaded.reconcile(["doc_a", "doc_b"], [1, 1], requirements, 0.7,
+                                      {**settings, "embedding_backend": "onnx"})
+        checks.append((not reconciled.computed.any() and reconciled.requirement_vectors is None,
+                       "a settings change should invalidate every cell"))
+
+        for ok, label in checks:
+            if not ok:
+                print(f"  Status: FAIL - {label}")
+                return False
+
+        print(f"  Edited requirements, new document versions, threshold and settings changes reconcile")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_report_escaping():
+    """Test that CSV cells are formula-escaped, HTML is escaped and JSON reports parse"""
+    print_section("TEST 0h: Report Escaping")
+
+    import io
+    import csv
+    import tempfile
+    from src.comparison_engine import ComparisonResult, ComplianceResults, ComplianceStatus
+    from src.report_writers import write_json_report, write_report
+
+    def comparison(requirements, hits):
+        items = ComplianceResults(requirements)
+        for row, hit in enumerate(hits):
+            items.record(row, ComplianceStatus.PARTIAL, [hit])
+        return ComparisonResult(
+            "<b>doc</b>", "=spec", "2026-01-01T00:00:00", len(requirements), 0, len(requirements), 0, 0,
+            50.0 if requirements else 0.0, items, "Summary"
+        )
+
+    result = comparison(
+        [
+            {"id": '=HYPERLINK("http://example.com","x")', "text": "+1 bar relief pressure", "expected": "@SUM(A1:A9)"},
+            {"id": "R2", "text": "<script>alert(1)</script>", "expected": None}
+        ],
+        [
+            {"chunk_id": 0, "content": "-2+3 cmd", "similarity_score": 0.6},
+            {"chunk_id": 1, "content": "<script>alert(2)</script>", "similarity_score": 0.6}
+        ]
+    )
+    try:
+        checks = []
+        with tempfile.TemporaryDirectory() as tmp:
+            write_report(result, "csv", Path(tmp) / "report.csv")
+            with open(Path(tmp) / "report.csv", newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            write_report(result, "html", Path(tmp) / "report.html")
+            html = (Path(tmp) / "report.html").read_text(encoding="utf-8")
+
+        first = rows[0]
+        checks.append((
+            first["requirement_id"] == '\'=HYPERLINK("http://example.com","x")'
+            and first["requirement_text"] == "'+1 bar relief pressure"
+            and first["expected_value"] == "'@SUM(A1:A9)"
+            and first["found_value"] == "'-2+3 cmd"
+            and first["spec_name"] == "'=spec"
+            and rows[1]["requirement_id"] == "R2" and first["score"] == "0.6",
+            "CSV cells starting with =, +, - or @ were not prefixed with '"
+        ))
+        checks.append(("&lt;script&gt;alert(1)&lt;/script&gt;" in html and "&lt;script&gt;alert(2)" in html
+                       and "<script>" not in html and "&lt;b&gt;doc&lt;/b&gt;" in html, "HTML report not escaped"))
+
+        for case in (result, comparison([], [])):
+            out = io.StringIO()
+            write_json_report(case, out)
+            parsed = json.loads(out.getvalue())
+            checks.append((
+                parsed["document_name"] == "<b>doc</b>" and len(parsed["items"]) == len(case.items)
+                and [item["requirement_id"] for item in parsed["items"]] == [item.requirement_id for item in case.items],
+                f"JSON report with {len(case.items)} item(s) does not round-trip"
+            ))
+
+        for ok, label in checks:
+            if not ok:
+                print(f"  Status: FAIL - {label}")
+                return False
+
+        print(f"  CSV formula prefixes, HTML escaping and JSON round-trips hold")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_quantized_recall():
+    """Test that fp16/int8 search with full-precision rescoring matches an exact search"""
+    print_section("TEST 0i: Quantized Search Recall")
+
+    import tempfile
+    import numpy as np
+    from src.quantization import QuantizedVectorIndex
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 64)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.normal(size=(20, 64)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    k = 10
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    try:
+        for mode in ("fp16", "int8"):
+            with tempfile.TemporaryDirectory() as tmp:
+                index = QuantizedVectorIndex.build(vectors, mode, Path(tmp), metric="ip")
+                recall, score_error = [], 0.0
+                for query, expected in zip(queries, exact):
+                    ids, scores = index.search(query, k, rescore_factor=4)
+                    recall.append(len(set(ids.tolist()) & set(expected.tolist())) / k)
+                    score_error = max(score_error, float(np.abs(scores - vectors[ids] @ query).max()))
+            print(f"  {mode}: recall@{k} {np.mean(recall):.3f}, max score error {score_error:.1e}")
+            if np.mean(recall) < 0.95 or score_error > 1e-5:
+                print(f"  Status: FAIL - {mode} rescoring does not match the exact search")
+                return False
+
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_store_migration():
+    """Test that L2 stores are rewritten for cosine scoring once, then skipped via the format marker"""
+    print_section("TEST 0j: Cosine Store Migration")
+
+    import tempfile
+    import numpy as np
+    import faiss
+    import src.rag_server as server
+    from src.index_sync import STORE_FORMAT, STORE_FORMAT_FILE, migrate_vector_store
+
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(50, 16)).astype(np.float32) * 3
+    query = rng.normal(size=16).astype(np.float32)
+    store_dir = server.VECTOR_STORE_DIR
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = Path(tmp) / "legacy"
+            legacy.mkdir()
+            l2 = faiss.IndexFlatL2(16)
+            l2.add(vectors)
+            faiss.write_index(l2, str(legacy / "index.faiss"))
+
+            changed = migrate_vector_store(legacy)
+            index = faiss.read_index(str(legacy / "index.faiss"))
+            unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            scores, ids = index.search((query / np.linalg.norm(query)).reshape(1, -1), 5)
+            expected = np.sort(unit @ (query / np.linalg.norm(query)))[::-1][:5]
+            checks = [
+                (changed and index.metric_type == faiss.METRIC_INNER_PRODUCT, "L2 index not rewritten as inner product"),
+                (np.allclose(scores[0], expected, atol=1e-5), "migrated scores are not cosine similarities"),
+                (not migrate_vector_store(legacy), "second migrate_vector_store() run rewrote the index again")
+            ]
+
+            # migrate_indexes() marks checked stores and then skips them without reading the index
+            (legacy / STORE_FORMAT_FILE).unlink(missing_ok=True)
+            server.VECTOR_STORE_DIR = Path(tmp)
+            server.migrate_indexes()
+            marker = json.loads((legacy / STORE_FORMAT_FILE).read_text())
+            read_index = faiss.read_index
+            faiss.read_index = lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("index opened"))
+            try:
+                second = server.migrate_indexes()
+            finally:
+                faiss.read_index = read_index
+            checks.append((marker == STORE_FORMAT, "STORE_FORMAT marker not written"))
+            checks.append((second == {"migrated": []}, "marked store was migrated again"))
+
+        for ok, label in checks:
+            if not ok:
+                print(f"  Status: FAIL - {label}")
+                return False
+
+        print(f"  L2 store rewritten for cosine scoring; the second run skipped it without opening it")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+    finally:
+        server.VECTOR_STORE_DIR = store_dir
+
+def test_diversity_selection():
+    """Test that MMR and cluster selection drop a planted near-duplicate that plain ranking keeps"""
+    print_section("TEST 0k: Diversity Selection")
+
+    try:
+        import numpy as np
+        from src.diversity import diversify
+
+        rng = np.random.default_rng(11)
+        vectors = rng.normal(size=(20, 32)).astype(np.float32)
+        vectors[1] = vectors[0] + rng.normal(scale=0.05, size=32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        relevance = np.concatenate([[1.0, 0.99], np.linspace(0.9, 0.5, 18)]).astype(np.float32)
+
+        ranked = diversify("none", relevance, vectors, 5)
+        checks = [(1 in ranked, "plain ranking should keep the near-duplicate")]
+        for mode in ("mmr", "cluster"):
+            picked = diversify(mode, relevance, vectors, 5)
+            checks.append((len(set(picked.tolist())) == 5 and picked[0] == 0, f"{mode}: wrong selection {picked.tolist()}"))
+            checks.append((1 not in picked, f"{mode}: near-duplicate kept"))
+
+        for ok, label in checks:
+            if not ok:
+                print(f"  Status: FAIL - {label}")
+                return False
+
+        print(f"  MMR and cluster selection dropped the near-duplicate of the top candidate")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
+def test_compliance_statistics():
+    """Test that the bincount compliance statistics match a per-item count"""
+    print_section("TEST 0l: Compliance Statistics")
+
+    try:
+        import random
+        from collections import Counter
+        from src.comparison_engine import ComparisonEngine, ComplianceResults, ComplianceStatus
+
+        rng = random.Random(5)
+        requirements = [{"id": f"REQ-{i}", "text": f"Requirement {i}"} for i in range(500)]
+        results = ComplianceResults(requirements)
+        statuses = [ComplianceStatus.COMPLIANT, ComplianceStatus.PARTIAL, ComplianceStatus.NON_COMPLIANT]
+        for row in range(len(requirements)):
+            if rng.random() < 0.1:
+                results.record_error(row, "search failed")
+            elif rng.random() < 0.95:
+                results.record(row, rng.choice(statuses), [{"content": f"chunk {row}", "similarity_score": rng.random()}])
+
+        expected = Counter(item.status.value for item in results)
+        counts = {status.value: count for status, count in results.counts().items()}
+        stats = ComparisonEngine._calculate_compliance_stats(None, "doc", "spec", results)
+        percentage = (expected["compliant"] + expected["partial"] * 0.5) / len(requirements) * 100
+        checks = [
+            (counts == {status.value: expected[status.value] for status in ComplianceStatus}, f"counts() {counts} != {dict(expected)}"),
+            (stats.statistics() == {
+                "total_requirements": len(requirements),
+                "compliant": expected["compliant"],
+                "partial": expected["partial"],
+                "non_compliant": expected["non-compliant"],
+                "unknown": expected["unknown"]
+            }, f"statistics() mismatch: {stats.statistics()}"),
+            (abs(stats.compliance_percentage - percentage) < 1e-9, "compliance percentage mismatch"),
+            (ComplianceResults([]).counts() == {status: 0 for status in results.counts()}, "empty results should count zero")
+        ]
+
+        for ok, label in checks:
+            if not ok:
+                print(f"  Status: FAIL - {label}")
+                return False
+
+        print(f"  Statistics match a per-item count over {len(requirements)} requirements: {dict(expected)}")
+        print(f"  Status: PASS")
+        return True
+    except Exception as e:
+        print(f"  Status: FAIL - {e}")
+        return False
+
 def test_document_ingestion():
     """Test document ingestion for PDF and Excel"""
     print_section("TEST 1: Document Ingestion")
@@ -248,6 +927,18 @@ def main():
     print("="*60)
 
     tests = [
+        ("Import Time Budget", test_import_time_budget),
+        ("Text Splitter Equivalence", test_splitter_equivalence),
+        ("Chunk Deduplication", test_chunk_deduplication),
+        ("Write-Ahead Log Recovery", test_wal_recovery),
+        ("Corpus Index Segments", test_corpus_index),
+        ("Semantic Query Cache", test_query_cache),
+        ("Compliance Matrix", test_compliance_matrix),
+        ("Report Escaping", test_report_escaping),
+        ("Quantized Search Recall", test_quantized_recall),
+        ("Cosine Store Migration", test_store_migration),
+        ("Diversity Selection", test_diversity_selection),
+        ("Compliance Statistics", test_compliance_statistics),
         ("Document Ingestion", test_document_ingestion),
         ("List Documents", test_list_documents),
         ("Document Summary", test_document_summary),
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Run a sharded RAG MCP cluster on one machine for testing
+
+Starts N shard nodes (main.py --transport http, each with its own DATA_DIR)
+and a coordinator in front of them, optionally ingesting files through the
+coordinator so they are spread over the shards.
+
+Usage:
+    python scripts/run_local_shards.py --shards 3 --ingest docs/*.pdf
+    # coordinator MCP endpoint: http://127.0.0.1:8100/mcp
+"""
+
+import os
+import sys
+import time
+import json
+import signal
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def wait_for_port(host: str, port: int, timeout: float) -> bool:
+    import socket
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.25)
+    return False
+
+
+async def ingest_files(url: str, files: list) -> None:
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamablehttp_client
+
+    async with streamablehttp_client(url, timeout=900) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for path in files:
+                name = Path(path).stem
+                result = await session.call_tool("ingest_document", {
+                    "file_path": str(Path(path).resolve()),
+                    "document_name": name
+                })
+                payload = json.loads(result.content[0].text)
+                status = "OK" if payload.get("success") else f"FAILED: {payload.get('error')}"
+                print(f"[{status}] {name} -> {payload.get('shard')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run shard nodes and a coordinator locally")
+    parser.add_argument("--shards", type=int, default=3)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=8101, help="First shard port")
+    parser.add_argument("--coordinator-port", type=int, default=8100)
+    parser.add_argument("--workers-per-shard", type=int, default=1)
+    parser.add_argument("--data-root", default=str(ROOT / "data" / "shards"), help="Shard i uses DATA_ROOT/shard-i")
+    parser.add_argument("--deadline", type=float, default=2.0, help="Coordinator fan-out deadline (seconds)")
+    parser.add_argument("--ingest", nargs="*", default=[], help="Files to ingest through the coordinator")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    processes = []
+
+    def shutdown(*_):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    shard_urls = []
+    for i in range(args.shards):
+        port = args.base_port + i
+        env = {**os.environ, "DATA_DIR": str(Path(args.data_root) / f"shard-{i}")}
+        processes.append(subprocess.Popen(
+            [sys.executable, str(ROOT / "main.py"), "--transport", "http",
+             "--host", args.host, "--port", str(port), "--workers", str(args.workers_per_shard)],
+            cwd=str(ROOT), env=env
+        ))
+        shard_urls.append(f"http://{args.host}:{port}/mcp")
+
+    for url, port in zip(shard_urls, range(args.base_port, args.base_port + args.shards)):
+        if not wait_for_port(args.host, port, args.startup_timeout):
+            print(f"Shard {url} did not start", file=sys.stderr)
+            shutdown()
+
+    processes.append(subprocess.Popen(
+        [sys.executable, str(ROOT / "src" / "shard_coordinator.py"),
+         "--shards", ",".join(shard_urls), "--host", args.host,
+         "--port", str(args.coordinator_port), "--deadline", str(args.deadline)],
+        cwd=str(ROOT)
+    ))
+    coordinator_url = f"http://{args.host}:{args.coordinator_port}/mcp"
+    if not wait_for_port(args.host, args.coordinator_port, args.startup_timeout):
+        print("Coordinator did not start", file=sys.stderr)
+        shutdown()
+
+    if args.ingest:
+        asyncio.run(ingest_files(coordinator_url, args.ingest))
+
+    print(f"\n{args.shards} shard(s): {', '.join(shard_urls)}")
+    print(f"Coordinator: {coordinator_url}  (Ctrl-C to stop)")
+    while all(process.poll() is None for process in processes):
+        time.sleep(1)
+    print("A cluster process exited; shutting down", file=sys.stderr)
+    shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Structure-Aware Chunking for RAG MCP Server
+Splits extracted content section by section (page, sheet, table) so no chunk
+straddles a boundary, and records where each chunk sits in the document's
+plain-text blob for highlighting and neighbor expansion.
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECTION_SEPARATOR = "\n\n"
+TEXT_BLOB_FILE = "text.txt"
+PROVENANCE_FILE = "provenance.json"
+
+
+@dataclass
+class TextSection:
+    """One structural unit of a document: kind is 'page', 'sheet', 'table' or 'text'"""
+    kind: str
+    label: Any
+    text: str
+
+
+@dataclass
+class ChunkSpan:
+    """A chunk and where it came from"""
+    chunk_id: int
+    text: str
+    start: int
+    end: int
+    section: int
+
+    def provenance(self, sections: List[TextSection]) -> Dict[str, Any]:
+        """Compact chunk metadata, e.g. {"page": 3, "char_start": 1200, "char_end": 2150}"""
+        section = sections[self.section]
+        provenance = {"char_start": self.start, "char_end": self.end}
+        if section.kind != "text":
+            provenance[section.kind] = section.label
+        return provenance
+
+
+class FastTextSplitter:
+    """
+    Offset-based port of LangChain's RecursiveCharacterTextSplitter.
+
+    Same contract as RecursiveCharacterTextSplitter(chunk_size, chunk_overlap,
+    separators) with its defaults (separator kept at the start of the next
+    piece, whitespace stripped, length = len): split_text returns identical
+    chunks. Internally every piece is a (start, end) range into the input, so
+    the recursive split and the merge never build intermediate strings; only
+    the final chunks are sliced out, and callers that want offsets skip even
+    that via split_spans.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        separators: Optional[List[str]] = None
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if not 0 <= chunk_overlap <= chunk_size:
+            raise ValueError(f"chunk_overlap must be between 0 and chunk_size ({chunk_size}), got {chunk_overlap}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = list(separators) if separators else ["\n\n", "\n", " ", ""]
+
+    def split_text(self, text: str) -> List[str]:
+        """Drop-in replacement for RecursiveCharacterTextSplitter.split_text"""
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of each chunk in text"""
+        spans: List[Tuple[int, int]] = []
+        self._split(text, 0, len(text), self.separators, spans)
+        return spans
+
+    def split_pages(self, pages: Iterable[str]) -> Iterator[Tuple[int, int, int]]:
+        """Stream (page index, start, end) chunks, page by page"""
+        for page_idx, page in enumerate(pages):
+            for start, end in self.split_spans(page):
+                yield page_idx, start, end
+
+    def _split(self, text: str, lo: int, hi: int, separators: List[str], out: List[Tuple[int, int]]):
+        """Recursive step over text[lo:hi], appending stripped chunk spans to out"""
+        separator = separators[-1]
+        remaining: List[str] = []
+        for i, candidate in enumerate(separators):
+            if not candidate:
+                separator = candidate
+                break
+            if text.find(candidate, lo, hi) >= 0:
+                separator = candidate
+                remaining = separators[i + 1:]
+                break
+
+        if not separator:
+            self._merge_characters(text, lo, hi, out)
+            return
+
+        # Each piece starts at a separator occurrence, so pieces tile [lo, hi)
+        bounds = [lo]
+        step = len(separator)
+        pos = text.find(separator, lo, hi)
+        if pos == lo:
+            pos = text.find(separator, lo + step, hi)
+        while pos >= 0:
+            bounds.append(pos)
+            pos = text.find(separator, pos + step, hi)
+        bounds.append(hi)
+
+        good: List[int] = []  # piece boundaries of the current run of short pieces
+        for start, end in zip(bounds, bounds[1:]):
+            if end - start < self.chunk_size:
+                if not good:
+                    good.append(start)
+                good.append(end)
+                continue
+            if good:
+                self._merge(text, good, out)
+                good = []
+            if remaining:
+                self._split(text, start, end, remaining, out)
+            else:
+                # Unsplittable piece: LangChain passes it through unstripped
+                out.append((start, end))
+        if good:
+            self._merge(text, good, out)
+
+    def _merge(self, text: str, bounds: List[int], out: List[Tuple[int, int]]):
+        """TextSplitter._merge_splits over contiguous pieces bounds[i]:bounds[i + 1]"""
+        head = 0  # first piece in the current window
+        total = 0
+        for tail in range(len(bounds) - 1):
+            size = bounds[tail + 1] - bounds[tail]
+            if total + size > self.chunk_size and tail > head:
+                self._emit(text, bounds[head], bounds[tail], out)
+                while total > self.chunk_overlap or (total + size > self.chunk_size and total > 0):
+                    total -= bounds[head + 1] - bounds[head]
+                    head += 1
+            total += size
+        self._emit(text, bounds[head], bounds[-1], out)
+
+    def _merge_characters(self, text: str, lo: int, hi: int, out: List[Tuple[int, int]]):
+        """_merge for single-character pieces: fixed windows stepping by size - overlap"""
+        if self.chunk_size == 1:
+            out.extend((i, i + 1) for i in range(lo, hi))
+            return
+        stride = self.chunk_size - min(self.chunk_overlap, self.chunk_size - 1)
+        start = lo
+        while start + self.chunk_size < hi:
+            self._emit(text, start, start + self.chunk_size, out)
+            start += stride
+        self._emit(text, start, hi, out)
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int, out: List[Tuple[int, int]]):
+        """Append text[start:end] with surrounding whitespace trimmed, unless it is blank"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            out.append((start, end))
+
+
+class StructureAwareChunker:
+    """
+    Splits each section separately with a FastTextSplitter.
+
+    The blob is the section texts joined by blank lines, without the
+    '--- Page N ---' style markers, so offsets index plain document text.
+    """
+
+    def __init__(self, splitter: FastTextSplitter):
+        self.splitter = splitter
+
+    def split(self, sections: List[TextSection]) -> Tuple[str, List[ChunkSpan]]:
+        """
+        Returns:
+            Tuple of (text blob, chunks in document order)
+        """
+        parts = []
+        spans: List[ChunkSpan] = []
+        section_offsets = []
+        offset = 0
+        for section_idx, section in enumerate(sections):
+            if section_idx:
+                parts.append(SECTION_SEPARATOR)
+                offset += len(SECTION_SEPARATOR)
+            parts.append(section.text)
+            section_offsets.append(offset)
+            offset += len(section.text)
+
+        for section_idx, start, end in self.splitter.split_pages(s.text for s in sections):
+            base = section_offsets[section_idx]
+            text = sections[section_idx].text[start:end]
+            spans.append(ChunkSpan(len(spans), text, base + start, base + end, section_idx))
+
+        return "".join(parts), spans
+
+
+def provenance_table(sections: List[TextSection], spans: List[ChunkSpan]) -> str:
+    """Serialize sections and [start, end, section] per chunk id for the store directory"""
+    return json.dumps({
+        "sections": [{"kind": s.kind, "label": s.label} for s in sections],
+        "chunks": [[span.start, span.end, span.section] for span in spans]
+    }, separators=(",", ":"))
+
+
+def neighbor_window(
+    provenance: Dict[str, Any],
+    chunk_id: int,
+    before: int = 1,
+    after: int = 1,
+    same_section: bool = True
+) -> List[int]:
+    """Chunk ids around chunk_id, optionally limited to its section"""
+    chunks = provenance["chunks"]
+    if not 0 <= chunk_id < len(chunks):
+        raise ValueError(f"Unknown chunk id {chunk_id} (document has {len(chunks)} chunks)")
+    section = chunks[chunk_id][2]
+    ids = range(max(0, chunk_id - before), min(len(chunks), chunk_id + after + 1))
+    return [i for i in ids if not same_section or chunks[i][2] == section]
+
+
+def sections_from_content(content: Dict[str, Any]) -> List[TextSection]:
+    """Structural sections of extracted content, falling back to one text section"""
+    sections = [TextSection(s["kind"], s["label"], s["text"]) for s in content.get("sections", [])]
+    return [s for s in sections if s.text.strip()] or [TextSection("text", None, content.get("text", ""))]
@@ -3,14 +3,17 @@ Comparison Engine for RAG MCP Server
 Compares documents against specifications and generates detailed reports
 """
 
-import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Sequence
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
 import logging
 
+import numpy as np
+
+from report_writers import render_report, write_report
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +25,29 @@ class ComplianceStatus(Enum):
     UNKNOWN = "unknown"
 
 
+# int8 status codes used by ComplianceResults, in ComplianceStatus order
+STATUS_BY_CODE = list(ComplianceStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUS_BY_CODE)}
+# Placeholder found_value when the top hit carries no content
+FOUND_DEFAULTS = {
+    ComplianceStatus.COMPLIANT: "Found",
+    ComplianceStatus.PARTIAL: "Partially found",
+    ComplianceStatus.NON_COMPLIANT: "Not found"
+}
+EVIDENCE_PER_ITEM = 3
+# Best scores of at least this fraction of the threshold count as a partial match
+PARTIAL_FACTOR = 0.7
+
+
+def classify_scores(scores, threshold: float) -> np.ndarray:
+    """Status codes for best-hit scores (NaN, i.e. no hit, is non-compliant)"""
+    scores = np.asarray(scores, dtype=np.float64)
+    codes = np.full(scores.shape, STATUS_CODES[ComplianceStatus.NON_COMPLIANT], dtype=np.int8)
+    codes[scores >= threshold * PARTIAL_FACTOR] = STATUS_CODES[ComplianceStatus.PARTIAL]
+    codes[scores >= threshold] = STATUS_CODES[ComplianceStatus.COMPLIANT]
+    return codes
+
+
 @dataclass
 class ComplianceItem:
     """Single compliance item"""
@@ -34,6 +60,98 @@ class ComplianceItem:
     notes: str = ""
 
 
+class ComplianceResults(Sequence):
+    """
+    Array-backed outcomes of one comparison, one row per requirement
+
+    Status codes are an int8 array and best scores a float32 array; evidence
+    is stored as references into a pool holding each retrieved chunk's
+    content once, and the requirement dicts are shared with the caller
+    rather than copied. Indexing or iterating materializes ComplianceItem
+    objects on demand.
+    """
+
+    def __init__(self, requirements: List[Dict[str, Any]], evidence_per_item: int = EVIDENCE_PER_ITEM):
+        n = len(requirements)
+        self.requirements = requirements
+        self.status = np.full(n, STATUS_CODES[ComplianceStatus.UNKNOWN], dtype=np.int8)
+        self.scores = np.full(n, np.nan, dtype=np.float32)
+        self.evidence = np.full((n, evidence_per_item), -1, dtype=np.int32)
+        self.evidence_scores = np.full((n, evidence_per_item), np.nan, dtype=np.float32)
+        self.contents: List[Optional[str]] = []
+        self._content_ids: Dict[Any, int] = {}
+        self.errors: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.requirements)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.item(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("compliance result index out of range")
+        return self.item(row)
+
+    def __iter__(self) -> Iterator["ComplianceItem"]:
+        return (self.item(row) for row in range(len(self)))
+
+    def _content_ref(self, hit: Dict[str, Any]) -> int:
+        """Pool index of a hit's content, added on first sight"""
+        chunk_id = hit.get("chunk_id")
+        content = hit.get("content")
+        key = ("chunk", chunk_id) if isinstance(chunk_id, int) else ("text", content)
+        ref = self._content_ids.get(key)
+        if ref is None:
+            ref = self._content_ids[key] = len(self.contents)
+            self.contents.append(content)
+        return ref
+
+    def record(self, row: int, status: ComplianceStatus, hits: List[Dict[str, Any]]) -> None:
+        """Store a requirement's status and references to its best hits"""
+        self.status[row] = STATUS_CODES[status]
+        for rank, hit in enumerate(hits[:self.evidence.shape[1]]):
+            self.evidence[row, rank] = self._content_ref(hit)
+            self.evidence_scores[row, rank] = float(hit.get("similarity_score", 0))
+        if hits:
+            self.scores[row] = self.evidence_scores[row, 0]
+
+    def record_error(self, row: int, message: str) -> None:
+        self.status[row] = STATUS_CODES[ComplianceStatus.UNKNOWN]
+        self.errors[row] = message
+
+    def counts(self) -> Dict[ComplianceStatus, int]:
+        """Requirements per status, from one bincount over the status codes"""
+        counts = np.bincount(self.status, minlength=len(STATUS_BY_CODE))
+        return {status: int(counts[code]) for code, status in enumerate(STATUS_BY_CODE)}
+
+    def item(self, row: int) -> "ComplianceItem":
+        """Materialize one row as a ComplianceItem"""
+        requirement = self.requirements[row]
+        status = STATUS_BY_CODE[self.status[row]]
+        if row in self.errors:
+            found_value, evidence, notes = None, [self.errors[row]], f"Error: {self.errors[row]}"
+        else:
+            refs = [(int(ref), float(score)) for ref, score in zip(self.evidence[row], self.evidence_scores[row]) if ref >= 0]
+            found_value = None
+            if refs:
+                found_value = self.contents[refs[0][0]]
+                if found_value is None:
+                    found_value = FOUND_DEFAULTS.get(status)
+            evidence = [f"{(self.contents[ref] or '')[:100]}... (Score: {score:.2f})" for ref, score in refs]
+            notes = ""
+        return ComplianceItem(
+            requirement_id=requirement.get("id", "UNKNOWN"),
+            requirement_text=requirement.get("text", ""),
+            expected_value=requirement.get("expected", None),
+            found_value=found_value,
+            status=status,
+            evidence=evidence,
+            notes=notes
+        )
+
+
 @dataclass
 class ComparisonResult:
     """Result of document comparison"""
@@ -46,9 +164,41 @@ class ComparisonResult:
     non_compliant_items: int
     unknown_items: int
     compliance_percentage: float
-    items: List[ComplianceItem]
+    items: ComplianceResults
     summary: str
 
+    def statistics(self) -> Dict[str, int]:
+        return {
+            "total_requirements": self.total_requirements,
+            "compliant": self.compliant_items,
+            "partial": self.partial_items,
+            "non_compliant": self.non_compliant_items,
+            "unknown": self.unknown_items
+        }
+
+    def to_dict(self, include_items: bool = True) -> Dict[str, Any]:
+        """Tool response shape; items are only materialized here"""
+        result = {
+            "document_name": self.document_name,
+            "spec_name": self.spec_name,
+            "compliance_percentage": self.compliance_percentage,
+            "summary": self.summary,
+            "statistics": self.statistics()
+        }
+        if include_items:
+            result["items"] = [
+                {
+                    "requirement_id": item.requirement_id,
+                    "requirement_text": item.requirement_text,
+                    "status": item.status.value,
+                    "found_value": item.found_value,
+                    "evidence": item.evidence,
+                    "notes": item.notes
+                }
+                for item in self.items
+            ]
+        return result
+
 
 class SpecificationParser:
     """Parse specifications from various formats"""
@@ -90,14 +240,18 @@ class SpecificationParser:
 class ComparisonEngine:
     """Main comparison engine for RAG-based document comparison"""
     
-    def __init__(self, rag_query_func):
+    def __init__(self, rag_query_func, rag_multi_query_func=None):
         """
         Initialize comparison engine
         
         Args:
             rag_query_func: Function to perform RAG queries
+            rag_multi_query_func: Optional function answering all requirement queries
+                of a document in one call (document_name, queries, top_k) -> results,
+                so the server can rerank them in shared batches
         """
         self.rag_query_func = rag_query_func
+        self.rag_multi_query_func = rag_multi_query_func
         self.logger = logging.getLogger(__name__)
     
     def compare_document_to_spec(
@@ -105,7 +259,8 @@ class ComparisonEngine:
         document_name: str,
         specifications: List[str] | Dict[str, Any],
         spec_name: str = "Specification",
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        diversity: Optional[str] = None
     ) -> ComparisonResult:
         """
         Compare document against specifications using RAG
@@ -114,14 +269,16 @@ class ComparisonEngine:
             document_name: Name of indexed document
             specifications: List of spec strings or dict of specs
             spec_name: Name of specification
-            threshold: Similarity threshold (0-1)
+            threshold: Minimum cosine similarity (or rerank probability) of the best match
+            diversity: Evidence diversity mode passed to the query functions
+                ("mmr", "cluster" or "none"; default: the server's setting)
             
         Returns:
             ComparisonResult with compliance details
         """
-        self.logger.info(f"Comparing {document_name} against {spec_name}")
-        
-        # Parse specifications
+        return self._compare(document_name, self._parse_requirements(specifications), spec_name, threshold, diversity)
+    
+    def _parse_requirements(self, specifications: List[str] | Dict[str, Any]) -> List[Dict[str, Any]]:
         if isinstance(specifications, list):
             requirements = SpecificationParser.parse_list_spec(specifications)
         else:
@@ -130,17 +287,34 @@ class ComparisonEngine:
         if not requirements:
             self.logger.warning("No requirements found in specification")
             requirements = []
+        return requirements
+    
+    def _compare(
+        self,
+        document_name: str,
+        requirements: List[Dict[str, Any]],
+        spec_name: str,
+        threshold: float = 0.7,
+        diversity: Optional[str] = None
+    ) -> ComparisonResult:
+        """Check parsed requirements against one document (requirements are shared, not copied)"""
+        self.logger.info(f"Comparing {document_name} against {spec_name}")
         
-        compliance_items = []
+        compliance_items = ComplianceResults(requirements)
+        query_options = {"diversity": diversity} if diversity is not None else {}
+        prefetched = self._query_requirements(document_name, requirements, query_options)
         
         # Query RAG for each requirement
-        for req in requirements:
-            item = self._check_requirement(
+        for row, (req, rag_result) in enumerate(zip(requirements, prefetched)):
+            self._check_requirement(
                 document_name,
                 req,
-                threshold
+                threshold,
+                compliance_items,
+                row,
+                rag_result,
+                query_options
             )
-            compliance_items.append(item)
         
         # Calculate statistics
         result = self._calculate_compliance_stats(
@@ -151,91 +325,84 @@ class ComparisonEngine:
         
         return result
     
+    def _query_requirements(
+        self,
+        document_name: str,
+        requirements: List[Dict[str, Any]],
+        query_options: Optional[Dict[str, Any]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Fetch results for all requirements at once, or None each to query them one by one"""
+        if self.rag_multi_query_func is None or not requirements:
+            return [None] * len(requirements)
+        
+        try:
+            return self.rag_multi_query_func(
+                document_name,
+                [req.get("text", "") for req in requirements],
+                top_k=5,
+                **(query_options or {})
+            )
+        except Exception as e:
+            self.logger.warning(f"Batched requirement query failed, querying one by one: {e}")
+            return [None] * len(requirements)
+    
     def _check_requirement(
         self,
         document_name: str,
         requirement: Dict[str, Any],
-        threshold: float
-    ) -> ComplianceItem:
-        """Check single requirement against document"""
+        threshold: float,
+        results: ComplianceResults,
+        row: int,
+        rag_result: Optional[Dict[str, Any]] = None,
+        query_options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Check single requirement against document, recording the outcome in results[row]"""
         
         req_id = requirement.get("id", "UNKNOWN")
         req_text = requirement.get("text", "")
-        expected_value = requirement.get("expected", None)
         
         try:
             # Query document for this requirement
-            rag_result = self.rag_query_func(
-                document_name,
-                req_text,
-                top_k=5
-            )
+            if rag_result is None:
+                rag_result = self.rag_query_func(
+                    document_name,
+                    req_text,
+                    top_k=5,
+                    **(query_options or {})
+                )
             
             if "error" in rag_result:
-                status = ComplianceStatus.UNKNOWN
-                found_value = None
-                evidence = []
-            else:
-                results = rag_result.get("results", [])
-                
-                if not results:
-                    status = ComplianceStatus.NON_COMPLIANT
-                    found_value = None
-                    evidence = []
-                else:
-                    # Check if best result meets threshold
-                    best_score = float(results[0].get("similarity_score", 0))
-                    
-                    if best_score >= threshold:
-                        status = ComplianceStatus.COMPLIANT
-                        found_value = results[0].get("content", "Found")
-                    elif best_score >= (threshold * 0.7):  # Partial match
-                        status = ComplianceStatus.PARTIAL
-                        found_value = results[0].get("content", "Partially found")
-                    else:
-                        status = ComplianceStatus.NON_COMPLIANT
-                        found_value = results[0].get("content", "Not found")
-                    
-                    evidence = [
-                        f"{r.get('content', '')[:100]}... (Score: {r.get('similarity_score', 0):.2f})"
-                        for r in results[:3]
-                    ]
+                results.record(row, ComplianceStatus.UNKNOWN, [])
+                return
             
-            return ComplianceItem(
-                requirement_id=req_id,
-                requirement_text=req_text,
-                expected_value=expected_value,
-                found_value=found_value,
-                status=status,
-                evidence=evidence,
-                notes=""
-            )
+            hits = rag_result.get("results", [])
+            if not hits:
+                results.record(row, ComplianceStatus.NON_COMPLIANT, [])
+                return
+            
+            # Check if best result meets threshold
+            best_score = float(hits[0].get("similarity_score", 0))
+            status = STATUS_BY_CODE[classify_scores(best_score, threshold)]
+            results.record(row, status, hits)
         
         except Exception as e:
             self.logger.error(f"Error checking requirement {req_id}: {e}")
-            return ComplianceItem(
-                requirement_id=req_id,
-                requirement_text=req_text,
-                expected_value=expected_value,
-                found_value=None,
-                status=ComplianceStatus.UNKNOWN,
-                evidence=[str(e)],
-                notes=f"Error: {str(e)}"
-            )
+            results.record_error(row, str(e))
     
     def _calculate_compliance_stats(
         self,
         document_name: str,
         spec_name: str,
-        items: List[ComplianceItem]
+        items: ComplianceResults
     ) -> ComparisonResult:
-        """Calculate compliance statistics"""
+        """Calculate compliance statistics in one pass over the status codes"""
         
         total = len(items)
-        compliant = sum(1 for i in items if i.status == ComplianceStatus.COMPLIANT)
-        partial = sum(1 for i in items if i.status == ComplianceStatus.PARTIAL)
-        non_compliant = sum(1 for i in items if i.status == ComplianceStatus.NON_COMPLIANT)
-        unknown = sum(1 for i in items if i.status == ComplianceStatus.UNKNOWN)
+        counts = items.counts()
+        compliant = counts[ComplianceStatus.COMPLIANT]
+        partial = counts[ComplianceStatus.PARTIAL]
+        non_compliant = counts[ComplianceStatus.NON_COMPLIANT]
+        unknown = counts[ComplianceStatus.UNKNOWN]
         
         # Calculate compliance percentage (unknowns count as failures)
         compliance_percentage = (compliant + partial * 0.5) / total * 100 if total > 0 else 0
@@ -281,11 +448,13 @@ class ComparisonEngine:
             Dictionary of comparison results keyed by document name
         """
         results = {}
+        # Parsed once: every document's results refer to the same requirement dicts
+        requirements = self._parse_requirements(specifications)
         
         for doc_name in document_names:
-            result = self.compare_document_to_spec(
+            result = self._compare(
                 doc_name,
-                specifications,
+                requirements,
                 spec_name
             )
             results[doc_name] = result
@@ -302,122 +471,28 @@ class ComparisonEngine:
         
         Args:
             comparison_result: ComparisonResult object
-            output_format: 'json', 'text', or 'html'
+            output_format: 'json', 'text', 'html' or 'csv'
             
         Returns:
             Formatted report string
         """
-        if output_format == "json":
-            return self._format_json_report(comparison_result)
-        elif output_format == "text":
-            return self._format_text_report(comparison_result)
-        elif output_format == "html":
-            return self._format_html_report(comparison_result)
-        else:
-            raise ValueError(f"Unknown format: {output_format}")
-    
-    def _format_json_report(self, result: ComparisonResult) -> str:
-        """Format as JSON"""
-        result_dict = asdict(result)
-        # Convert enum to string
-        result_dict["items"] = [
-            {
-                **asdict(item),
-                "status": item.status.value
-            }
-            for item in result.items
-        ]
-        return json.dumps(result_dict, indent=2)
-    
-    def _format_text_report(self, result: ComparisonResult) -> str:
-        """Format as plain text"""
-        report = f"""
-{'='*70}
-COMPLIANCE REPORT
-{'='*70}
-
-{result.summary}
-
-{'='*70}
-DETAILED FINDINGS
-{'='*70}
-
-"""
-        for item in result.items:
-            report += f"\n[{item.requirement_id}] {item.status.value.upper()}\n"
-            report += f"Requirement: {item.requirement_text}\n"
-            if item.expected_value:
-                report += f"Expected: {item.expected_value}\n"
-            if item.found_value:
-                report += f"Found: {item.found_value}\n"
-            if item.evidence:
-                report += f"Evidence:\n"
-                for i, ev in enumerate(item.evidence, 1):
-                    report += f"  {i}. {ev}\n"
-            if item.notes:
-                report += f"Notes: {item.notes}\n"
-            report += "\n"
-        
-        report += f"\n{'='*70}\nReport generated: {result.comparison_timestamp}\n"
-        
-        return report
-    
-    def _format_html_report(self, result: ComparisonResult) -> str:
-        """Format as HTML"""
-        html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Compliance Report - {result.document_name}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        h1, h2 {{ color: #333; }}
-        .summary {{ background-color: #f5f5f5; padding: 15px; border-radius: 5px; }}
-        .compliant {{ color: green; font-weight: bold; }}
-        .partial {{ color: orange; font-weight: bold; }}
-        .non-compliant {{ color: red; font-weight: bold; }}
-        .unknown {{ color: gray; font-weight: bold; }}
-        .item {{ margin: 20px 0; padding: 10px; border-left: 4px solid #ddd; }}
-        .item.compliant {{ border-left-color: green; }}
-        .item.partial {{ border-left-color: orange; }}
-        .item.non-compliant {{ border-left-color: red; }}
-        .evidence {{ margin-left: 20px; font-size: 0.9em; color: #666; }}
-    </style>
-</head>
-<body>
-    <h1>Compliance Report</h1>
-    <div class="summary">
-        <h2>{result.document_name}</h2>
-        <p><strong>Specification:</strong> {result.spec_name}</p>
-        <p><strong>Compliance:</strong> <span style="font-size: 1.5em;">{result.compliance_percentage:.1f}%</span></p>
-        <p>Compliant: {result.compliant_items} | Partial: {result.partial_items} | Non-Compliant: {result.non_compliant_items} | Unknown: {result.unknown_items}</p>
-    </div>
+        return render_report(comparison_result, output_format)
     
-    <h2>Detailed Findings</h2>
-"""
-        
-        for item in result.items:
-            html += f"""
-    <div class="item {item.status.value}">
-        <h3>[{item.requirement_id}] <span class="{item.status.value}">{item.status.value.upper()}</span></h3>
-        <p><strong>Requirement:</strong> {item.requirement_text}</p>
-"""
-            if item.expected_value:
-                html += f"        <p><strong>Expected:</strong> {item.expected_value}</p>\n"
-            if item.found_value:
-                html += f"        <p><strong>Found:</strong> {item.found_value}</p>\n"
-            if item.evidence:
-                html += "        <div class='evidence'><strong>Evidence:</strong><ul>\n"
-                for ev in item.evidence:
-                    html += f"            <li>{ev}</li>\n"
-                html += "        </ul></div>\n"
-            if item.notes:
-                html += f"        <p><strong>Notes:</strong> {item.notes}</p>\n"
-            html += "    </div>\n"
+    def write_compliance_report(
+        self,
+        comparison_result: ComparisonResult,
+        output_format: str,
+        path: Path
+    ) -> Dict[str, Any]:
+        """
+        Stream a compliance report to a file instead of building it in memory
         
-        html += f"""
-    <p><em>Report generated: {result.comparison_timestamp}</em></p>
-</body>
-</html>
-"""
-        return html
+        Args:
+            comparison_result: ComparisonResult object
+            output_format: 'json', 'text', 'html', 'csv' or 'parquet'
+            path: Destination file
+            
+        Returns:
+            Path, format, size in bytes and number of items written
+        """
+        return write_report(comparison_result, output_format, path)
@@ -0,0 +1,222 @@
+"""
+Compliance Matrix for RAG MCP Server
+Documents x requirements status and best-hit score, persisted as one .npz
+file and recomputed incrementally: only rows of documents whose index
+version changed and columns of requirements whose text changed are searched
+again
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from comparison_engine import STATUS_BY_CODE, STATUS_CODES, ComplianceStatus, classify_scores
+from index_sync import fsync_path, staging_path
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_CODE = STATUS_CODES[ComplianceStatus.UNKNOWN]
+
+
+def requirement_fingerprint(requirement: Dict[str, Any]) -> str:
+    """Hash of the text a requirement is searched with; ids and expected values do not affect results"""
+    return hashlib.sha1(requirement.get("text", "").encode("utf-8")).hexdigest()
+
+
+class ComplianceMatrix:
+    """
+    Status codes, best scores and best chunk ids for every (document, requirement)
+
+    Rows are documents, tagged with the index version they were computed
+    against (None = not computed, e.g. the document was not indexed);
+    columns are requirements, keyed by text fingerprint and carrying their
+    normalized query embedding so unchanged requirements are never embedded
+    twice. settings holds what every score depends on (embedding model,
+    quantization, reranking); a change there invalidates the whole matrix.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documents: List[str],
+        versions: List[Any],
+        requirements: List[Dict[str, Any]],
+        threshold: float,
+        settings: Dict[str, Any],
+        spec_name: str = "Specification"
+    ):
+        self.name = name
+        self.spec_name = spec_name
+        self.documents = list(documents)
+        self.versions = list(versions)
+        self.requirements = list(requirements)
+        self.fingerprints = [requirement_fingerprint(r) for r in self.requirements]
+        self.threshold = threshold
+        self.settings = settings
+        shape = (len(self.documents), len(self.requirements))
+        self.status = np.full(shape, UNKNOWN_CODE, dtype=np.int8)
+        self.scores = np.full(shape, np.nan, dtype=np.float32)
+        self.chunk_ids = np.full(shape, -1, dtype=np.int32)
+        self.computed = np.zeros(shape, dtype=bool)
+        self.requirement_vectors: Optional[np.ndarray] = None  # (n_requirements, dim), NaN rows not yet embedded
+
+    def reconcile(
+        self,
+        documents: List[str],
+        versions: List[Any],
+        requirements: List[Dict[str, Any]],
+        threshold: float,
+        settings: Dict[str, Any],
+        spec_name: Optional[str] = None
+    ) -> "ComplianceMatrix":
+        """
+        Matrix for new documents/requirements, reusing every cell that is still valid
+
+        A cell is kept when its document has the same version and its
+        requirement the same text fingerprint as before, and the settings
+        are unchanged. A threshold change only reclassifies stored scores.
+        Cells that were not kept have computed == False.
+        """
+        matrix = ComplianceMatrix(
+            self.name, documents, versions, requirements, threshold, settings, spec_name or self.spec_name
+        )
+        if settings != self.settings:
+            logger.info(f"Compliance matrix {self.name}: settings changed, recomputing all cells")
+            return matrix
+
+        old_rows = {(doc, version): i for i, (doc, version) in enumerate(zip(self.documents, self.versions)) if version is not None}
+        old_cols = {}
+        for j, fingerprint in enumerate(self.fingerprints):
+            old_cols.setdefault(fingerprint, j)
+        rows = np.array([old_rows.get(key, -1) for key in zip(matrix.documents, matrix.versions)], dtype=np.int64)
+        cols = np.array([old_cols.get(fingerprint, -1) for fingerprint in matrix.fingerprints], dtype=np.int64)
+
+        if self.requirement_vectors is not None and (cols >= 0).any():
+            matrix.requirement_vectors = np.full((len(cols), self.requirement_vectors.shape[1]), np.nan, dtype=np.float32)
+            matrix.requirement_vectors[cols >= 0] = self.requirement_vectors[cols[cols >= 0]]
+
+        new_rows, new_cols = np.nonzero(rows >= 0)[0], np.nonzero(cols >= 0)[0]
+        if len(new_rows) and len(new_cols):
+            block = np.ix_(new_rows, new_cols)
+            source = np.ix_(rows[new_rows], cols[new_cols])
+            for name in ("status", "scores", "chunk_ids", "computed"):
+                getattr(matrix, name)[block] = getattr(self, name)[source]
+            if threshold != self.threshold:
+                matrix.classify(matrix.computed)
+        return matrix
+
+    def classify(self, cells: np.ndarray) -> None:
+        """Re-derive the status of cells (boolean mask) from their stored scores"""
+        self.status[cells] = classify_scores(self.scores[cells], self.threshold)
+
+    def record_row(self, row: int, columns: np.ndarray, scores: np.ndarray, chunk_ids: np.ndarray) -> None:
+        """Store search results (NaN score = no hit) for some requirements of one document"""
+        self.scores[row, columns] = scores
+        self.chunk_ids[row, columns] = chunk_ids
+        self.status[row, columns] = classify_scores(scores, self.threshold)
+        self.computed[row, columns] = True
+
+    def record_unknown(self, row: int, columns: Optional[np.ndarray] = None) -> None:
+        """Mark cells that could not be searched; they are retried on the next refresh"""
+        columns = slice(None) if columns is None else columns
+        self.status[row, columns] = UNKNOWN_CODE
+        self.scores[row, columns] = np.nan
+        self.chunk_ids[row, columns] = -1
+        self.computed[row, columns] = False
+
+    def counts(self) -> np.ndarray:
+        """(n_documents, n_statuses) requirement counts per status, from one bincount"""
+        n_codes = len(STATUS_BY_CODE)
+        offsets = np.arange(len(self.documents), dtype=np.int64)[:, None] * n_codes
+        counts = np.bincount((offsets + self.status).ravel(), minlength=len(self.documents) * n_codes)
+        return counts.reshape(len(self.documents), n_codes)
+
+    def compliance_percentages(self) -> np.ndarray:
+        """Per document, (compliant + partial / 2) / total, as in compare_document_to_specification"""
+        counts = self.counts()
+        total = len(self.requirements)
+        if total == 0:
+            return np.zeros(len(self.documents))
+        compliant = counts[:, STATUS_CODES[ComplianceStatus.COMPLIANT]]
+        partial = counts[:, STATUS_CODES[ComplianceStatus.PARTIAL]]
+        return (compliant + partial * 0.5) / total * 100
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Tool response shape: status and score grids plus per-document statistics"""
+        counts = self.counts()
+        percentages = self.compliance_percentages()
+        scores = np.round(self.scores.astype(np.float64), 4)
+        return {
+            "matrix_name": self.name,
+            "spec_name": self.spec_name,
+            "threshold": self.threshold,
+            "documents": self.documents,
+            "requirements": [
+                {"id": r.get("id", "UNKNOWN"), "text": r.get("text", "")} for r in self.requirements
+            ],
+            "status": [[STATUS_BY_CODE[code].value for code in row] for row in self.status],
+            "scores": [[None if np.isnan(s) else float(s) for s in row] for row in scores],
+            "chunk_ids": [[None if c < 0 else int(c) for c in row] for row in self.chunk_ids],
+            "compliance_percentage": {doc: float(p) for doc, p in zip(self.documents, percentages)},
+            "statistics": {
+                doc: {
+                    "total_requirements": len(self.requirements),
+                    "compliant": int(row[STATUS_CODES[ComplianceStatus.COMPLIANT]]),
+                    "partial": int(row[STATUS_CODES[ComplianceStatus.PARTIAL]]),
+                    "non_compliant": int(row[STATUS_CODES[ComplianceStatus.NON_COMPLIANT]]),
+                    "unknown": int(row[UNKNOWN_CODE])
+                }
+                for doc, row in zip(self.documents, counts)
+            }
+        }
+
+    def save(self, path: Path) -> None:
+        """Write the matrix to one .npz file, atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "name": self.name,
+            "spec_name": self.spec_name,
+            "documents": self.documents,
+            "versions": self.versions,
+            "requirements": self.requirements,
+            "threshold": self.threshold,
+            "settings": self.settings
+        }
+        arrays = {
+            "meta": np.array(json.dumps(meta)),
+            "status": self.status,
+            "scores": self.scores,
+            "chunk_ids": self.chunk_ids,
+            "computed": self.computed
+        }
+        if self.requirement_vectors is not None:
+            arrays["requirement_vectors"] = self.requirement_vectors
+        staging = staging_path(path)
+        with open(staging, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, path)
+        fsync_path(path.parent)
+
+    @classmethod
+    def load(cls, path: Path) -> "ComplianceMatrix":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            matrix = cls(
+                meta["name"], meta["documents"], meta["versions"], meta["requirements"],
+                meta["threshold"], meta["settings"], meta["spec_name"]
+            )
+            matrix.status[:] = data["status"]
+            matrix.scores[:] = data["scores"]
+            matrix.chunk_ids[:] = data["chunk_ids"]
+            matrix.computed[:] = data["computed"]
+            if "requirement_vectors" in data:
+                matrix.requirement_vectors = data["requirement_vectors"]
+        return matrix
@@ -0,0 +1,182 @@
+"""
+Token-Budgeted Context Assembly for RAG MCP Server
+Merges overlapping and adjacent hits by their blob offsets, drops duplicates
+and packs the resulting passages into a prompt-sized token budget.
+"""
+
+import re
+import math
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Words, numbers and single punctuation marks: roughly one BPE token each
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+CHARS_PER_TOKEN = 4.0
+# Widest whitespace-only gap between two hits that still counts as adjacent
+MAX_MERGE_GAP = 16
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast token count: word/punctuation pieces, never below len / CHARS_PER_TOKEN"""
+    return max(len(TOKEN_PATTERN.findall(text)), math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+@dataclass
+class ContextHit:
+    """One retrieved chunk; offsets are None for documents indexed without provenance"""
+    document: str
+    chunk_id: int
+    score: float
+    text: str
+    query: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+    section: Optional[int] = None
+
+
+@dataclass
+class ContextPassage:
+    """A contiguous stretch of one document covering one or more hits"""
+    document: str
+    text: str
+    score: float
+    hits: List[ContextHit]
+    start: Optional[int] = None
+    end: Optional[int] = None
+    section: Optional[int] = None
+    tokens: int = 0
+    header: str = ""
+
+    @property
+    def chunk_ids(self) -> List[int]:
+        return sorted({hit.chunk_id for hit in self.hits})
+
+    @property
+    def queries(self) -> List[str]:
+        return sorted({hit.query for hit in self.hits})
+
+
+def merge_hits(
+    hits: List[ContextHit],
+    blobs: Dict[str, str],
+    max_gap: int = MAX_MERGE_GAP
+) -> List[ContextPassage]:
+    """
+    Collapse hits into passages
+
+    The same chunk hit by several queries is kept once at its best score.
+    Hits in the same section whose spans overlap, or are separated only by
+    whitespace, become one passage sliced from the document blob, so the
+    CHUNK_OVERLAP characters shared by neighbors appear once. Hits without
+    offsets are deduplicated by exact text.
+    """
+    groups: Dict[Tuple[str, int], List[ContextHit]] = {}
+    for hit in hits:
+        groups.setdefault((hit.document, hit.chunk_id), []).append(hit)
+
+    passages: List[ContextPassage] = []
+    by_section: Dict[Tuple[str, int], List[List[ContextHit]]] = {}
+    by_text: Dict[str, ContextPassage] = {}
+    for group in groups.values():
+        group.sort(key=lambda h: -h.score)
+        best = group[0]
+        if best.start is not None and best.document in blobs:
+            by_section.setdefault((best.document, best.section), []).append(group)
+        elif best.text in by_text:
+            passage = by_text[best.text]
+            passage.hits.extend(group)
+            passage.score = max(passage.score, best.score)
+        else:
+            passage = ContextPassage(best.document, best.text, best.score, list(group))
+            by_text[best.text] = passage
+            passages.append(passage)
+
+    for (document, section), section_groups in by_section.items():
+        blob = blobs[document]
+        section_groups.sort(key=lambda g: (g[0].start, g[0].end))
+        current: Optional[ContextPassage] = None
+        for group in section_groups:
+            best = group[0]
+            if current is not None and best.start - current.end <= max_gap and not blob[current.end:best.start].strip():
+                current.end = max(current.end, best.end)
+                current.score = max(current.score, best.score)
+                current.hits.extend(group)
+                continue
+            if current is not None:
+                passages.append(current)
+            current = ContextPassage(document, "", best.score, list(group), best.start, best.end, section)
+        passages.append(current)
+
+    for passage in passages:
+        if passage.start is not None:
+            passage.text = blobs[passage.document][passage.start:passage.end]
+    return passages
+
+
+def pack_passages(
+    passages: List[ContextPassage],
+    token_budget: int,
+    order: str = "relevance",
+    document_order: Optional[List[str]] = None,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+    describe: Callable[[ContextPassage], str] = lambda p: f"[{p.document}]"
+) -> Tuple[List[ContextPassage], List[ContextPassage], int]:
+    """
+    Greedily fill the budget with the most relevant passages
+
+    A passage that does not fit is replaced by its best single hit when that
+    fits instead. Selected passages are returned by score ("relevance") or
+    by document and offset ("position").
+
+    Returns:
+        Tuple of (selected passages, dropped passages, tokens used)
+    """
+    if order not in ("relevance", "position"):
+        raise ValueError(f"order must be 'relevance' or 'position', got {order!r}")
+
+    selected: List[ContextPassage] = []
+    dropped: List[ContextPassage] = []
+    used = 0
+    for passage in sorted(passages, key=lambda p: -p.score):
+        candidates = [passage]
+        if len(passage.hits) > 1:
+            best = max(passage.hits, key=lambda h: h.score)
+            best_hits = [hit for hit in passage.hits if hit.chunk_id == best.chunk_id]
+            candidates.append(ContextPassage(
+                best.document, best.text, best.score, best_hits, best.start, best.end, best.section
+            ))
+        for candidate in candidates:
+            candidate.header = describe(candidate)
+            candidate.tokens = count_tokens(candidate.header) + count_tokens(candidate.text)
+            if used + candidate.tokens <= token_budget:
+                selected.append(candidate)
+                used += candidate.tokens
+                break
+        else:
+            dropped.append(passage)
+
+    if order == "position":
+        rank = {name: i for i, name in enumerate(document_order or [])}
+        selected.sort(key=lambda p: (rank.get(p.document, len(rank)), p.document,
+                                     p.start if p.start is not None else math.inf))
+    return selected, dropped, used
+
+
+def context_stats(hits: List[ContextHit], selected: List[ContextPassage]) -> Dict[str, Any]:
+    """Payload size and chunk coverage of the packed context vs. pasting every hit"""
+    unique = {(hit.document, hit.chunk_id): hit for hit in hits}
+    covered = {(hit.document, hit.chunk_id) for passage in selected for hit in passage.hits}
+    raw_chars = sum(len(hit.text) for hit in hits)
+    packed_chars = sum(len(passage.text) for passage in selected)
+    return {
+        "hits": len(hits),
+        "unique_chunks": len(unique),
+        "chunks_covered": len(covered),
+        "coverage": round(len(covered) / len(unique), 4) if unique else 1.0,
+        "raw_chars": raw_chars,
+        "context_chars": packed_chars,
+        "chars_saved_pct": round(100.0 * (1 - packed_chars / raw_chars), 1) if raw_chars else 0.0
+    }
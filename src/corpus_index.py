@@ -0,0 +1,658 @@
+"""
+Shared Corpus Index for RAG MCP Server
+One vector index over the chunks of every document, built like an LSM tree:
+new chunks land in an in-memory memtable that is flushed to immutable
+segments, which are merged in the background. Deletes set bits in a
+per-segment tombstone bitmap that is applied as a FAISS ID selector at search
+time; segments whose tombstone ratio crosses a threshold are rewritten.
+Vectors are stored normalized and searched by inner product, so hits carry
+cosine similarities.
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from similarity import cosine_index, is_cosine_index, l2_to_cosine, normalize_rows
+
+try:
+    import fcntl
+except ImportError:  # Windows: compaction is only serialized within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+COMPACTION_LOCK_FILE = "compaction.lock"
+SEGMENTS_DIR = "segments"
+INDEX_FILE = "index.faiss"
+RECORDS_FILE = "records.jsonl"
+TOMBSTONES_FILE = "tombstones.bin"
+_RECONSTRUCT_ROWS = 16384
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Segment:
+    """Immutable vectors and chunk records with a mutable tombstone bitmap"""
+
+    def __init__(self, segment_id: int, path: Path, index, records: List[Dict[str, Any]], tombstones: np.ndarray):
+        self.segment_id = segment_id
+        self.path = Path(path)
+        self.index = index
+        self.records = records
+        self.tombstones = tombstones
+        # Segments written before normalized scoring hold flat L2 indexes
+        self.cosine = is_cosine_index(index)
+        self._live_bits = None
+        self.rows_by_document: Dict[str, np.ndarray] = {}
+        if records:
+            names, inverse = np.unique([record["document"] for record in records], return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            for name, rows in zip(names, np.split(order, np.cumsum(np.bincount(inverse))[:-1])):
+                self.rows_by_document[str(name)] = rows
+
+    @property
+    def ntotal(self) -> int:
+        return len(self.records)
+
+    @property
+    def deleted(self) -> int:
+        return int(self.tombstones.sum())
+
+    @property
+    def tombstone_ratio(self) -> float:
+        return self.deleted / self.ntotal if self.ntotal else 0.0
+
+    @classmethod
+    def write(cls, path: Path, segment_id: int, vectors: np.ndarray, records: List[Dict[str, Any]]) -> "Segment":
+        """Write a new segment directory (staged, then renamed into place)"""
+        import faiss
+
+        path = Path(path)
+        staging = path.with_name(f".{path.name}.staging-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        index = cosine_index(vectors)
+        faiss.write_index(index, str(staging / INDEX_FILE))
+        with open(staging / RECORDS_FILE, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        tombstones = np.zeros(len(records), dtype=bool)
+        _write_atomic(staging / TOMBSTONES_FILE, np.packbits(tombstones).tobytes())
+        os.rename(staging, path)
+        return cls(segment_id, path, index, records, tombstones)
+
+    @classmethod
+    def load(cls, path: Path, segment_id: int) -> "Segment":
+        """Load a segment with its vectors memory-mapped read-only"""
+        import faiss
+
+        path = Path(path)
+        mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            index = faiss.read_index(str(path / INDEX_FILE), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            index = faiss.read_index(str(path / INDEX_FILE))
+        with open(path / RECORDS_FILE, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        return cls(segment_id, path, index, records, cls._read_tombstones(path, len(records)))
+
+    @staticmethod
+    def _read_tombstones(path: Path, n: int) -> np.ndarray:
+        bits = np.frombuffer((path / TOMBSTONES_FILE).read_bytes(), dtype=np.uint8)
+        return np.unpackbits(bits, count=n).astype(bool)
+
+    def reload_tombstones(self) -> None:
+        self.tombstones = self._read_tombstones(self.path, self.ntotal)
+        self._live_bits = None
+
+    def mark_deleted(self, rows: np.ndarray) -> int:
+        """Tombstone rows and persist the bitmap; returns how many were newly deleted"""
+        rows = rows[~self.tombstones[rows]]
+        if len(rows):
+            tombstones = self.tombstones.copy()
+            tombstones[rows] = True
+            _write_atomic(self.path / TOMBSTONES_FILE, np.packbits(tombstones).tobytes())
+            self.tombstones = tombstones
+            self._live_bits = None
+        return len(rows)
+
+    def live_rows(self, document_name: str) -> np.ndarray:
+        rows = self.rows_by_document.get(document_name)
+        if rows is None:
+            return np.empty(0, dtype=np.int64)
+        return rows[~self.tombstones[rows]]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        document_names: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search live rows, optionally restricted to some documents
+
+        Args:
+            query: Normalized (dim,) query vector
+
+        Returns:
+            (cosine similarities, rows) for up to k hits, best first
+        """
+        import faiss
+
+        if document_names is not None:
+            allowed = np.zeros(self.ntotal, dtype=bool)
+            for name in document_names:
+                allowed[self.live_rows(name)] = True
+            bits = np.packbits(allowed, bitorder="little")
+            live = int(allowed.sum())
+        else:
+            live = self.ntotal - self.deleted
+            if self._live_bits is None:
+                self._live_bits = np.packbits(~self.tombstones, bitorder="little")
+            bits = self._live_bits
+        if live == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        k = min(k, live)
+        query = np.ascontiguousarray(query, dtype=np.float32).reshape(1, -1)
+        if live == self.ntotal:
+            distances, rows = self.index.search(query, k)
+        else:
+            # bits must outlive the search: the selector only holds a pointer
+            selector = faiss.IDSelectorBitmap(self.ntotal, faiss.swig_ptr(bits))
+            distances, rows = self.index.search(query, k, params=faiss.SearchParameters(sel=selector))
+        keep = rows[0] >= 0
+        scores = distances[0][keep]
+        return (scores if self.cosine else l2_to_cosine(scores)), rows[0][keep]
+
+    def live_vectors(self, keep: np.ndarray) -> np.ndarray:
+        """Reconstruct the vectors of the rows in keep (a boolean mask), block by block"""
+        vectors = np.empty((int(keep.sum()), self.index.d), dtype=np.float32)
+        out = 0
+        for start in range(0, self.ntotal, _RECONSTRUCT_ROWS):
+            stop = min(start + _RECONSTRUCT_ROWS, self.ntotal)
+            block = self.index.reconstruct_n(start, stop - start)[keep[start:stop]]
+            vectors[out:out + len(block)] = block
+            out += len(block)
+        return vectors
+
+
+
+
+class MemTable(Segment):
+    """
+    Small in-memory segment that takes new chunks until it is flushed
+
+    Appends and searches are serialized by the owning CorpusIndex; deletes
+    only flip tombstones and are dropped when the memtable is written out.
+    """
+
+    def __init__(self, dim: int):
+        import faiss
+
+        super().__init__(-1, Path(), faiss.IndexFlatIP(dim), [], np.zeros(0, dtype=bool))
+        self.created = time.monotonic()
+
+    def append(self, vectors: np.ndarray, records: List[Dict[str, Any]]) -> None:
+        start = self.ntotal
+        if len(records):
+            self.index.add(normalize_rows(vectors))
+        self.records.extend(records)
+        self.tombstones = np.concatenate([self.tombstones, np.zeros(len(records), dtype=bool)])
+        self._live_bits = None
+        rows = np.arange(start, self.ntotal)
+        for name in {record["document"] for record in records}:
+            new_rows = rows[[records[i]["document"] == name for i in range(len(records))]]
+            existing = self.rows_by_document.get(name)
+            self.rows_by_document[name] = new_rows if existing is None else np.concatenate([existing, new_rows])
+
+    def mark_deleted(self, rows: np.ndarray) -> int:
+        rows = rows[~self.tombstones[rows]]
+        if len(rows):
+            tombstones = self.tombstones.copy()
+            tombstones[rows] = True
+            self.tombstones = tombstones
+            self._live_bits = None
+        return len(rows)
+
+
+class CorpusIndex:
+    """
+    Log-structured index over all documents.
+
+    New chunks are appended to an in-memory memtable, which is flushed to an
+    immutable on-disk segment once it holds memtable_max_rows rows or is
+    flush_interval seconds old. A background task merges segments of similar
+    size (merge_factor at a time) and rewrites segments whose tombstone ratio
+    crosses compaction_threshold, so ingest cost does not grow with the corpus
+    and the number of segments stays logarithmic in its size.
+
+    Writers (add, delete, flush and the merge/compaction swap) run under the
+    writer() context passed in, normally the cross-process index writer lock.
+    Readers search a snapshot of the segment list plus the memtable, so a
+    swap never blocks a query. refresh() picks up changes made by other
+    processes; with several processes set memtable_max_rows=0 so every add is
+    written straight to a segment they can all see.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        writer: Optional[Callable[[], ContextManager]] = None,
+        compaction_threshold: float = 0.3,
+        memtable_max_rows: int = 20000,
+        flush_interval: float = 60.0,
+        merge_factor: int = 4
+    ):
+        self.root = Path(root)
+        self.segments_dir = self.root / SEGMENTS_DIR
+        self.manifest_path = self.root / MANIFEST_FILE
+        self.compaction_threshold = compaction_threshold
+        self.memtable_max_rows = memtable_max_rows
+        self.flush_interval = flush_interval
+        self.merge_factor = max(2, merge_factor)
+        self._writer = writer or nullcontext
+        self._lock = threading.RLock()
+        self._segments: Dict[int, Segment] = {}
+        self._memtable: Optional[MemTable] = None
+        self._seen_stamp = None
+        self._stop = threading.Event()
+        self._maintenance = None
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"version": 0, "next_segment": 1, "segments": []}
+
+    def _write_manifest(self, manifest: Dict[str, Any], in_sync: bool = False) -> None:
+        """
+        Publish a manifest; in_sync=True (caller refreshed under the writer
+        lock) marks it as seen so the next refresh() does not reload it
+        """
+        manifest["version"] = manifest.get("version", 0) + 1
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+        if in_sync:
+            self._seen_stamp = self._stamp()
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.segments_dir / f"seg-{segment_id:06d}"
+
+    def _allocate_segment_id(self) -> int:
+        with self._writer():
+            manifest = self._read_manifest()
+            segment_id = manifest["next_segment"]
+            manifest["next_segment"] = segment_id + 1
+            self._write_manifest(manifest)
+        return segment_id
+
+    def open(self) -> "CorpusIndex":
+        """
+        Load the published segments and remove directories no manifest refers to
+
+        Segments written before normalized scoring are rewritten with
+        normalized vectors, unless another process holds the compaction slot
+        (it migrates them when it opens).
+        """
+        with self._compaction_slot() as idle:
+            with self._writer():
+                # Merges write their output before taking the writer lock, so only sweep when none runs
+                if idle:
+                    live = {self._segment_path(i).name for i in self._read_manifest()["segments"]}
+                    for path in self.segments_dir.iterdir():
+                        if path.name not in live:
+                            shutil.rmtree(path, ignore_errors=True)
+            self.refresh()
+            if idle:
+                legacy = [segment for segment in self.segments() if not segment.cosine]
+                for segment in legacy:
+                    self.rewrite_segments([segment])
+                if legacy:
+                    logger.info(f"Corpus index: rewrote {len(legacy)} L2 segment(s) with normalized vectors")
+        return self
+
+    def refresh(self) -> bool:
+        """Apply segment and tombstone changes published by other processes (one stat() if none)"""
+        stamp = self._stamp()
+        if stamp is None or stamp == self._seen_stamp:
+            return False
+
+        manifest = self._read_manifest()
+        with self._lock:
+            segments = {}
+            for segment_id in manifest["segments"]:
+                segment = self._segments.get(segment_id)
+                if segment is None:
+                    segment = Segment.load(self._segment_path(segment_id), segment_id)
+                else:
+                    segment.reload_tombstones()
+                segments[segment_id] = segment
+            self._segments = segments
+            self._seen_stamp = stamp
+        return True
+
+    def segments(self) -> List[Segment]:
+        """Snapshot of the live on-disk segments"""
+        with self._lock:
+            return list(self._segments.values())
+
+    def add_document(
+        self,
+        document_name: str,
+        vectors: np.ndarray,
+        records: List[Dict[str, Any]],
+        version: Optional[int] = None
+    ) -> None:
+        """Index a document's chunks, replacing any earlier version"""
+        for record in records:
+            record["document"] = document_name
+            record["version"] = version
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(records), -1)
+        with self._writer():
+            self.refresh()
+            tombstoned = self._tombstone(document_name)
+            with self._lock:
+                if self._memtable is None:
+                    self._memtable = MemTable(vectors.shape[1])
+                self._memtable.append(vectors, records)
+            if self._memtable.ntotal >= self.memtable_max_rows:
+                self.flush()
+            elif tombstoned:
+                # Bumping the manifest makes other processes reload the bitmaps
+                self._write_manifest(self._read_manifest(), in_sync=True)
+
+    def delete_document(self, document_name: str) -> int:
+        """Tombstone every chunk of a document; returns the number of chunks deleted"""
+        with self._writer():
+            self.refresh()
+            deleted = self._tombstone(document_name)
+            if deleted:
+                self._write_manifest(self._read_manifest(), in_sync=True)
+        return deleted
+
+    def _tombstone(self, document_name: str) -> int:
+        deleted = 0
+        with self._lock:
+            tables = self.segments() + ([self._memtable] if self._memtable is not None else [])
+            for table in tables:
+                rows = table.live_rows(document_name)
+                if len(rows):
+                    deleted += table.mark_deleted(rows)
+        return deleted
+
+    def flush(self) -> Optional[int]:
+        """
+        Write the memtable out as an immutable segment
+
+        Returns:
+            The new segment id, or None if there was nothing to flush
+        """
+        with self._writer():
+            memtable = self._memtable
+            if memtable is None or memtable.ntotal == 0:
+                return None
+            self.refresh()
+            keep = ~memtable.tombstones
+            if not keep.any():
+                with self._lock:
+                    self._memtable = None
+                return None
+
+            segment_id = self._allocate_segment_id()
+            segment = Segment.write(
+                self._segment_path(segment_id),
+                segment_id,
+                memtable.live_vectors(keep),
+                [record for record, alive in zip(memtable.records, keep) if alive]
+            )
+            with self._lock:
+                manifest = self._read_manifest()
+                manifest["segments"].append(segment_id)
+                self._write_manifest(manifest, in_sync=True)
+                self._segments[segment_id] = segment
+                self._memtable = None
+        return segment_id
+
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        """Live chunk count and indexed version per document"""
+        with self._lock:
+            tables = self.segments() + ([self._memtable] if self._memtable is not None else [])
+        documents: Dict[str, Dict[str, Any]] = {}
+        for table in tables:
+            for name in table.rows_by_document:
+                rows = table.live_rows(name)
+                if len(rows):
+                    entry = documents.setdefault(name, {"chunks": 0, "version": None})
+                    entry["chunks"] += len(rows)
+                    entry["version"] = table.records[int(rows[0])].get("version")
+        return documents
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        document_names: Optional[List[str]] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Search the memtable and every live segment and merge the hits
+
+        Returns:
+            (record, cosine similarity) pairs, best first
+        """
+        query_vector = normalize_rows(query_vector)[0]
+        hits = []
+        with self._lock:
+            segments = list(self._segments.values())
+            # The memtable grows in place, so it is searched under the lock
+            if self._memtable is not None:
+                similarities, rows = self._memtable.search(query_vector, k, document_names)
+                hits.extend((float(s), self._memtable.records[int(r)]) for s, r in zip(similarities, rows))
+        for segment in segments:
+            similarities, rows = segment.search(query_vector, k, document_names)
+            hits.extend((float(s), segment.records[int(r)]) for s, r in zip(similarities, rows))
+        hits.sort(key=lambda hit: -hit[0])
+        return [(record, similarity) for similarity, record in hits[:k]]
+
+    @contextmanager
+    def _compaction_slot(self) -> Iterator[bool]:
+        """Non-blocking, cross-process: only one process merges or compacts at a time"""
+        with open(self.root / COMPACTION_LOCK_FILE, "a+") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    yield False
+                    return
+            try:
+                yield True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def rewrite_segments(self, sources: List[Segment]) -> Optional[int]:
+        """
+        Replace segments with one segment holding their live rows
+
+        With one source this is a compaction, with several a merge. The new
+        segment is written without the writer lock; only the manifest swap
+        takes it. Rows deleted while the rewrite ran are carried over as
+        tombstones.
+
+        Returns:
+            Id of the replacement segment, or None if nothing was live
+        """
+        keeps = [~segment.tombstones.copy() for segment in sources]
+        new_id = None
+        new_segment = None
+        if any(keep.any() for keep in keeps):
+            new_id = self._allocate_segment_id()
+            vectors = np.concatenate([segment.live_vectors(keep) for segment, keep in zip(sources, keeps)])
+            records = [
+                record
+                for segment, keep in zip(sources, keeps)
+                for record, alive in zip(segment.records, keep) if alive
+            ]
+            new_segment = Segment.write(self._segment_path(new_id), new_id, vectors, records)
+
+        with self._writer():
+            manifest = self._read_manifest()
+            if any(segment.segment_id not in manifest["segments"] for segment in sources):
+                if new_segment is not None:
+                    shutil.rmtree(new_segment.path, ignore_errors=True)
+                return None
+            if new_segment is not None:
+                late = np.concatenate([
+                    Segment._read_tombstones(segment.path, segment.ntotal)[keep]
+                    for segment, keep in zip(sources, keeps)
+                ])
+                new_segment.mark_deleted(np.flatnonzero(late))
+
+            source_ids = {segment.segment_id for segment in sources}
+            position = min(manifest["segments"].index(i) for i in source_ids)
+            remaining = [i for i in manifest["segments"] if i not in source_ids]
+            if new_id is not None:
+                remaining.insert(position, new_id)
+            manifest["segments"] = remaining
+            with self._lock:
+                self._write_manifest(manifest)
+                for segment_id in source_ids:
+                    self._segments.pop(segment_id, None)
+                if new_segment is not None:
+                    self._segments[new_id] = new_segment
+            # Processes that mapped the old files keep them alive until they refresh
+            for segment in sources:
+                shutil.rmtree(segment.path, ignore_errors=True)
+        return new_id
+
+    def compact(self, min_tombstone_ratio: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Compact every segment whose tombstone ratio is at least the threshold"""
+        threshold = self.compaction_threshold if min_tombstone_ratio is None else min_tombstone_ratio
+        compacted = []
+        with self._compaction_slot() as acquired:
+            if not acquired:
+                return compacted
+            self.refresh()
+            for segment in self.segments():
+                deleted = segment.deleted
+                if deleted and segment.tombstone_ratio >= threshold:
+                    new_id = self.rewrite_segments([segment])
+                    compacted.append({
+                        "segment": segment.segment_id,
+                        "replaced_by": new_id,
+                        "rows_removed": deleted,
+                        "rows_kept": segment.ntotal - deleted
+                    })
+        if compacted:
+            logger.info(f"Corpus index compaction: {compacted}")
+        return compacted
+
+    def _tier(self, segment: Segment) -> int:
+        """Size class of a segment: segments within a factor of merge_factor share a tier"""
+        base = max(1, self.memtable_max_rows // self.merge_factor)
+        rows = max(1, segment.ntotal - segment.deleted)
+        return int(math.log(max(1.0, rows / base), self.merge_factor))
+
+    def merge(self) -> List[Dict[str, Any]]:
+        """Merge merge_factor segments of the same tier, smallest tiers first, until none qualifies"""
+        merged = []
+        with self._compaction_slot() as acquired:
+            if not acquired:
+                return merged
+            self.refresh()
+            while not self._stop.is_set():
+                tiers: Dict[int, List[Segment]] = {}
+                for segment in self.segments():
+                    tiers.setdefault(self._tier(segment), []).append(segment)
+                candidates = [group for _, group in sorted(tiers.items()) if len(group) >= self.merge_factor]
+                if not candidates:
+                    break
+                sources = sorted(candidates[0], key=lambda segment: segment.ntotal)[:self.merge_factor]
+                new_id = self.rewrite_segments(sources)
+                if new_id is None and self.refresh() is False:
+                    break
+                merged.append({"segments": [segment.segment_id for segment in sources], "merged_into": new_id})
+        if merged:
+            logger.info(f"Corpus index merges: {merged}")
+        return merged
+
+    def maintain(self) -> None:
+        """One background pass: flush an old memtable, merge, then compact"""
+        memtable = self._memtable
+        if memtable is not None and time.monotonic() - memtable.created >= self.flush_interval:
+            self.flush()
+        self.merge()
+        self.compact()
+
+    def start_background_maintenance(self, interval: float = 30.0) -> None:
+        """Run maintain() every interval seconds on a daemon thread"""
+        if self._maintenance is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.maintain()
+                except Exception as e:
+                    logger.error(f"Corpus index maintenance failed: {e}")
+
+        self._maintenance = threading.Thread(target=run, name="corpus-maintenance", daemon=True)
+        self._maintenance.start()
+
+    def close(self) -> None:
+        """Stop background maintenance and flush the memtable"""
+        self._stop.set()
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = self.segments()
+            memtable = self._memtable
+        total = sum(segment.ntotal for segment in segments)
+        deleted = sum(segment.deleted for segment in segments)
+        memtable_rows = memtable.ntotal - memtable.deleted if memtable is not None else 0
+        return {
+            "segments": len(segments),
+            "memtable_rows": memtable_rows,
+            "chunks": total - deleted + memtable_rows,
+            "tombstoned": deleted,
+            "tombstone_ratio": round(deleted / total, 4) if total else 0.0,
+            "compaction_threshold": self.compaction_threshold,
+            "per_segment": [
+                {
+                    "segment": s.segment_id,
+                    "rows": s.ntotal,
+                    "tier": self._tier(s),
+                    "tombstone_ratio": round(s.tombstone_ratio, 4)
+                }
+                for s in segments
+            ]
+        }
@@ -0,0 +1,350 @@
+"""
+Chunk Deduplication for RAG MCP Server
+Exact (hash) duplicate suppression and near-duplicate (MinHash/LSH) tagging at ingest time
+"""
+
+import re
+import zlib
+import hashlib
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WHITESPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+_FURNITURE_MASK_MAX_WORDS = 6
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so formatting noise does not defeat shingling"""
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def chunk_fingerprint(text: str) -> str:
+    """Stable hash of whitespace-collapsed chunk text used for exact deduplication (case is kept)"""
+    return hashlib.sha1(_WHITESPACE_RE.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+
+def strip_page_furniture(
+    pages: List[str],
+    edge_lines: int = 3,
+    min_ratio: float = 0.5,
+    min_pages: int = 3
+) -> Tuple[List[str], List[str]]:
+    """
+    Remove headers and footers repeated across pages
+
+    Only the first and last ``edge_lines`` non-empty lines of each page are
+    candidates. Digits are masked in short lines so running page numbers
+    ("Page 3 of 10") are recognised as the same line; longer lines must
+    repeat verbatim so body text is never mistaken for furniture.
+
+    Args:
+        pages: Text of each page in order
+        edge_lines: Number of lines at the top and bottom of a page to inspect
+        min_ratio: Fraction of pages a line must appear on to be stripped
+        min_pages: Minimum number of pages before stripping is attempted
+
+    Returns:
+        Tuple of (cleaned page texts, normalized furniture lines removed)
+    """
+    if len(pages) < min_pages:
+        return pages, []
+
+    def edge_keys(page_text: str) -> List[Tuple[int, str]]:
+        lines = [(idx, line) for idx, line in enumerate(page_text.splitlines()) if line.strip()]
+        edges = lines[:edge_lines] + lines[-edge_lines:]
+        seen = {}
+        for idx, line in edges:
+            key = normalize_text(line)
+            if len(key.split(" ")) <= _FURNITURE_MASK_MAX_WORDS:
+                key = _DIGITS_RE.sub("#", key)
+            seen[idx] = key
+        return list(seen.items())
+
+    page_edges = [edge_keys(page) for page in pages]
+    counts = Counter(key for edges in page_edges for key in {k for _, k in edges})
+    cutoff = max(min_pages, int(len(pages) * min_ratio))
+    furniture = {key for key, count in counts.items() if count >= cutoff}
+
+    if not furniture:
+        return pages, []
+
+    cleaned = []
+    for page_text, edges in zip(pages, page_edges):
+        drop = {idx for idx, key in edges if key in furniture}
+        cleaned.append("\n".join(
+            line for idx, line in enumerate(page_text.splitlines()) if idx not in drop
+        ))
+
+    return cleaned, sorted(furniture)
+
+
+class MinHashLSH:
+    """MinHash signatures with banded locality-sensitive hashing"""
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1
+    ):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Coefficients stay below 2**32 so (a * h + b) never overflows uint64
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._buckets: Dict[Tuple[int, bytes], List[Any]] = defaultdict(list)
+        self._signatures: Dict[Any, np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text's word shingles"""
+        words = normalize_text(text).split(" ")
+        k = self.shingle_size
+        if len(words) <= k:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def insert(self, key: Any, signature: np.ndarray) -> None:
+        """Index a signature under key"""
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets[band_key].append(key)
+
+    def query(self, signature: np.ndarray, threshold: float) -> Optional[Tuple[Any, float]]:
+        """Return the most similar indexed key with estimated Jaccard >= threshold"""
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        best = None
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def remove(self, keys: set) -> None:
+        """Drop keys from the index"""
+        touched = set()
+        for key in keys:
+            signature = self._signatures.pop(key, None)
+            if signature is not None:
+                touched.update(self._band_keys(signature))
+        for band_key in touched:
+            remaining = [k for k in self._buckets.get(band_key, ()) if k not in keys]
+            if remaining:
+                self._buckets[band_key] = remaining
+            else:
+                self._buckets.pop(band_key, None)
+
+
+@dataclass
+class ChunkRef:
+    """Reference to a stored chunk"""
+    document_name: str
+    chunk_id: int
+
+
+@dataclass
+class DedupReport:
+    """Space savings from deduplicating one document"""
+    document_name: str
+    total_chunks: int = 0
+    stored_chunks: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    cross_document_duplicates: int = 0
+    chars_before: int = 0
+    chars_after: int = 0
+    vector_bytes_saved: int = 0
+    furniture_lines_removed: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        report = asdict(self)
+        saved = self.total_chunks - self.stored_chunks
+        report["chunks_saved"] = saved
+        report["chunks_saved_pct"] = round(saved / self.total_chunks * 100, 2) if self.total_chunks else 0.0
+        report["chars_saved"] = self.chars_before - self.chars_after
+        return report
+
+
+@dataclass
+class DedupChunk:
+    """Chunk that survived deduplication plus its back-references"""
+    chunk_id: int
+    text: str
+    duplicate_chunk_ids: List[int] = field(default_factory=list)
+    near_duplicate_of: Optional[int] = None
+    corpus_duplicate_of: Optional[ChunkRef] = None
+
+
+class ChunkDeduplicator:
+    """Corpus-wide registry of chunk fingerprints"""
+
+    def __init__(
+        self,
+        near_threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        vector_bytes: int = 384 * 4,
+        drop_near_duplicates: bool = False
+    ):
+        """
+        Initialize deduplicator
+
+        Args:
+            near_threshold: Estimated Jaccard similarity treated as a duplicate
+            num_perm: MinHash permutations per signature
+            bands: LSH bands (rows per band = num_perm / bands)
+            vector_bytes: Bytes of one stored embedding, used in the space report
+            drop_near_duplicates: Also drop near-duplicates instead of only tagging them.
+                Off by default: clauses differing only in a value ("10 bar" vs
+                "16 bar") are near-duplicates, and dropping one loses that value
+        """
+        self.near_threshold = near_threshold
+        self.drop_near_duplicates = drop_near_duplicates
+        self.vector_bytes = vector_bytes
+        self._num_perm = num_perm
+        self._bands = bands
+        self._exact: Dict[str, List[ChunkRef]] = defaultdict(list)
+        self._lsh = MinHashLSH(num_perm=num_perm, bands=bands)
+        self._by_document: Dict[str, set] = defaultdict(set)
+        self._fingerprints: Dict[Tuple[str, int], str] = {}
+
+    def deduplicate(
+        self,
+        document_name: str,
+        chunks: List[str],
+        furniture_lines: Optional[List[str]] = None
+    ) -> Tuple[List[DedupChunk], DedupReport]:
+        """
+        Drop duplicate chunks within a document and register the rest corpus-wide
+
+        Exact duplicates inside the document are stored once; the surviving
+        chunk carries the ids of the chunks it absorbed. Near-duplicates stay
+        indexed, tagged with the chunk they resemble (they are dropped like
+        exact duplicates only with drop_near_duplicates). Chunks already present in
+        another document stay in this document's index (indexes are queried
+        per document) but are tagged with a reference to the first copy.
+
+        Args:
+            document_name: Document the chunks belong to
+            chunks: Chunk texts in document order
+            furniture_lines: Header/footer lines stripped before splitting
+
+        Returns:
+            Tuple of (surviving chunks, space report)
+        """
+        self.forget_document(document_name)
+
+        report = DedupReport(
+            document_name=document_name,
+            total_chunks=len(chunks),
+            chars_before=sum(len(c) for c in chunks),
+            furniture_lines_removed=list(furniture_lines or [])
+        )
+        kept: List[DedupChunk] = []
+        kept_by_id: Dict[int, DedupChunk] = {}
+        local_lsh = MinHashLSH(num_perm=self._num_perm, bands=self._bands)
+        local_exact: Dict[str, int] = {}
+
+        for chunk_id, text in enumerate(chunks):
+            fingerprint = chunk_fingerprint(text)
+
+            if fingerprint in local_exact:
+                kept_by_id[local_exact[fingerprint]].duplicate_chunk_ids.append(chunk_id)
+                report.exact_duplicates += 1
+                continue
+
+            signature = local_lsh.signature(text)
+            match = local_lsh.query(signature, self.near_threshold)
+            if match is not None:
+                report.near_duplicates += 1
+                if self.drop_near_duplicates:
+                    kept_by_id[match[0]].duplicate_chunk_ids.append(chunk_id)
+                    continue
+
+            chunk = DedupChunk(chunk_id=chunk_id, text=text, near_duplicate_of=match[0] if match else None)
+            owners = self._exact.get(fingerprint)
+            corpus_ref = owners[0] if owners else None
+            if corpus_ref is None:
+                corpus_match = self._lsh.query(signature, self.near_threshold)
+                if corpus_match is not None:
+                    corpus_ref = ChunkRef(*corpus_match[0])
+            if corpus_ref is not None and corpus_ref.document_name != document_name:
+                chunk.corpus_duplicate_of = corpus_ref
+                report.cross_document_duplicates += 1
+
+            local_exact[fingerprint] = chunk_id
+            local_lsh.insert(chunk_id, signature)
+            kept.append(chunk)
+            kept_by_id[chunk_id] = chunk
+            self._register(document_name, chunk_id, fingerprint, signature)
+
+        report.stored_chunks = len(kept)
+        report.chars_after = sum(len(c.text) for c in kept)
+        report.vector_bytes_saved = (report.total_chunks - report.stored_chunks) * self.vector_bytes
+
+        logger.info(
+            f"Deduplicated {document_name}: {report.total_chunks} -> {report.stored_chunks} chunks "
+            f"({report.exact_duplicates} exact, {report.near_duplicates} near, "
+            f"{report.cross_document_duplicates} shared with other documents)"
+        )
+        return kept, report
+
+    def register_document(self, document_name: str, chunks: Dict[int, str]) -> None:
+        """Register chunks of an index loaded from disk"""
+        self.forget_document(document_name)
+        for chunk_id, text in chunks.items():
+            self._register(document_name, chunk_id, chunk_fingerprint(text), self._lsh.signature(text))
+
+    def forget_document(self, document_name: str) -> None:
+        """Remove a document's chunks from the corpus registry"""
+        keys = self._by_document.pop(document_name, None)
+        if not keys:
+            return
+        self._lsh.remove(keys)
+        for fingerprint in {self._fingerprints.pop(key) for key in keys if key in self._fingerprints}:
+            owners = [ref for ref in self._exact[fingerprint] if ref.document_name != document_name]
+            if owners:
+                self._exact[fingerprint] = owners
+            else:
+                del self._exact[fingerprint]
+
+    def _register(self, document_name: str, chunk_id: int, fingerprint: str, signature: np.ndarray) -> None:
+        key = (document_name, chunk_id)
+        self._exact[fingerprint].append(ChunkRef(document_name, chunk_id))
+        self._fingerprints[key] = fingerprint
+        self._lsh.insert(key, signature)
+        self._by_document[document_name].add(key)
@@ -0,0 +1,83 @@
+"""
+Diversity-Aware Result Selection for RAG MCP Server
+Maximal marginal relevance and near-duplicate clustering over a candidate
+set, computed from one Gram matrix of the normalized candidate vectors
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DIVERSITY_MODES = ("none", "mmr", "cluster")
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float = 0.5) -> np.ndarray:
+    """
+    Maximal marginal relevance: k candidate indices in selection order
+
+    Each step takes argmax lambda * relevance - (1 - lambda) * (highest
+    similarity to an already selected candidate), so the first pick is the
+    most relevant candidate. The running maximum is updated with one row of
+    the Gram matrix per step; there is no loop over candidates.
+
+    Args:
+        relevance: (n,) relevance of each candidate to the query
+        vectors: (n, dim) normalized candidate vectors
+        k: Number of candidates to select
+        lambda_mult: 1 ranks by relevance only, 0 by novelty only
+    """
+    relevance = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance)
+    k = min(k, n)
+    gram = vectors @ vectors.T
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = np.empty(k, dtype=np.int64)
+    for step in range(k):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected[step] = best
+        available[best] = False
+        np.maximum(max_similarity, gram[best], out=max_similarity)
+    return selected
+
+
+def cluster_select(relevance: np.ndarray, vectors: np.ndarray, k: int, threshold: float = 0.9) -> np.ndarray:
+    """
+    Near-duplicate clustering: one representative per group, best first
+
+    A candidate whose cosine similarity to a more relevant candidate is at
+    least threshold joins that candidate's group. Group representatives are
+    returned by relevance, followed by the grouped candidates when fewer than
+    k groups exist. One matrix comparison, no iteration.
+    """
+    order = np.argsort(-np.asarray(relevance, dtype=np.float32), kind="stable")
+    ranked = vectors[order]
+    redundant = np.triu(ranked @ ranked.T >= threshold, 1).any(axis=0)
+    return np.concatenate([order[~redundant], order[redundant]])[:k]
+
+
+def diversify(
+    mode: str,
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+    threshold: float = 0.9
+) -> np.ndarray:
+    """
+    Candidate indices to keep for a diversity mode, best first
+
+    Raises:
+        ValueError: If mode is not one of DIVERSITY_MODES
+    """
+    if mode not in DIVERSITY_MODES:
+        raise ValueError(f"Unknown diversity mode: {mode}. Available: {list(DIVERSITY_MODES)}")
+    if mode == "none" or len(relevance) == 0:
+        return np.argsort(-np.asarray(relevance, dtype=np.float32), kind="stable")[:k]
+    if mode == "mmr":
+        return mmr_select(relevance, vectors, k, lambda_mult)
+    return cluster_select(relevance, vectors, k, threshold)
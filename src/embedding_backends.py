@@ -0,0 +1,271 @@
+"""
+Embedding Backends for RAG MCP Server
+Pluggable embedders behind get_embeddings(): PyTorch (sentence-transformers) and ONNX Runtime
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_model_id(model_name: str) -> str:
+    """Expand short sentence-transformers names to their Hugging Face hub id"""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+class EmbeddingBackend(Embeddings):
+    """Base class for embedding backends (LangChain Embeddings compatible)"""
+
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 array"""
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        """Backend settings, for logs and benchmark output"""
+        return {"backend": self.name, "model_name": self.model_name}
+
+
+class PyTorchBackend(EmbeddingBackend):
+    """Full PyTorch model through langchain_huggingface.HuggingFaceEmbeddings"""
+
+    name = "pytorch"
+
+    def __init__(self, model_name: str, batch_size: int = 32, **_):
+        super().__init__(model_name)
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        self.batch_size = batch_size
+        self._embeddings = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"batch_size": batch_size}
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embeddings.embed_query(text)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self._embeddings.embed_documents(texts), dtype=np.float32)
+
+    def describe(self) -> Dict[str, Any]:
+        return {**super().describe(), "batch_size": self.batch_size}
+
+
+class OnnxRuntimeBackend(EmbeddingBackend):
+    """Sentence-transformers model exported to ONNX and run with ONNX Runtime on CPU"""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[Path] = None,
+        quantize_int8: bool = False,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        max_batch_tokens: int = 8192,
+        max_seq_length: int = 256,
+        normalize: bool = True,
+        **_
+    ):
+        """
+        Initialize ONNX Runtime backend
+
+        Args:
+            model_name: sentence-transformers model name or hub id
+            cache_dir: Where exported/quantized ONNX files are kept
+            quantize_int8: Apply dynamic int8 quantization to the exported model
+            intra_op_threads: Threads inside one operator (0 = runtime default)
+            inter_op_threads: Threads across independent operators (0 = runtime default)
+            max_batch_tokens: Padded tokens per batch (batch size x longest sequence)
+            max_seq_length: Truncation length in tokens
+            normalize: L2-normalize embeddings (matches all-MiniLM-L6-v2's Normalize layer)
+        """
+        super().__init__(model_name)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_id = resolve_model_id(model_name)
+        self.cache_dir = Path(cache_dir or Path.home() / ".cache" / "rag-mcp" / "onnx")
+        self.quantize_int8 = quantize_int8
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.max_batch_tokens = max_batch_tokens
+        self.max_seq_length = max_seq_length
+        self.normalize = normalize
+
+        model_path = self._ensure_model()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self._session = ort.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        outputs = [o.name for o in self._session.get_outputs()]
+        self._output_name = "last_hidden_state" if "last_hidden_state" in outputs else outputs[0]
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+
+    def _ensure_model(self) -> Path:
+        """Export the model to ONNX (and quantize it) once, then reuse the files"""
+        model_dir = self.cache_dir / self.model_id.replace("/", "__")
+        fp32_path = model_dir / "model.onnx"
+        int8_path = model_dir / "model_int8.onnx"
+
+        if not fp32_path.exists():
+            model_dir.mkdir(parents=True, exist_ok=True)
+            if not self._download_prebuilt(fp32_path):
+                logger.info(f"Exporting {self.model_id} to ONNX at {fp32_path}")
+                self._export(fp32_path)
+
+        if not self.quantize_int8:
+            return fp32_path
+
+        if not int8_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info(f"Quantizing {fp32_path} to int8")
+            quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        return int8_path
+
+    def _download_prebuilt(self, output_path: Path) -> bool:
+        """Fetch the ONNX export published alongside most sentence-transformers models"""
+        try:
+            import shutil
+            from huggingface_hub import hf_hub_download
+
+            shutil.copyfile(hf_hub_download(self.model_id, "onnx/model.onnx"), output_path)
+            logger.info(f"Downloaded prebuilt ONNX model for {self.model_id}")
+            return True
+        except Exception as e:
+            logger.info(f"No prebuilt ONNX model for {self.model_id} ({e}), exporting locally")
+            return False
+
+    def _export(self, output_path: Path) -> None:
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+        model = AutoModel.from_pretrained(self.model_id).eval()
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(output_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+
+    def _batches(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """Group indices sorted by length into batches under the padded-token budget"""
+        order = np.argsort(lengths, kind="stable")
+        batches, current, longest = [], [], 0
+        for idx in order:
+            length = int(lengths[idx])
+            if current and max(longest, length) * (len(current) + 1) > self.max_batch_tokens:
+                batches.append(np.asarray(current))
+                current, longest = [], 0
+            current.append(idx)
+            longest = max(longest, length)
+        if current:
+            batches.append(np.asarray(current))
+        return batches
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        encoded = self._tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.max_seq_length,
+            padding=False
+        )
+        lengths = np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+        output = None
+
+        for batch in self._batches(lengths):
+            padded = self._tokenizer.pad(
+                {key: [encoded[key][i] for i in batch] for key in encoded.keys()},
+                padding=True,
+                return_tensors="np"
+            )
+            feeds = {name: padded[name].astype(np.int64) for name in self._input_names if name in padded}
+            hidden = self._session.run([self._output_name], feeds)[0]
+
+            # Mean pooling over real tokens
+            mask = padded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            if output is None:
+                output = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            output[batch] = pooled
+
+        return output
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            **super().describe(),
+            "quantize_int8": self.quantize_int8,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "max_batch_tokens": self.max_batch_tokens,
+            "max_seq_length": self.max_seq_length
+        }
+
+
+EMBEDDING_BACKENDS = {
+    PyTorchBackend.name: PyTorchBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
+
+
+def create_embedding_backend(backend: str, model_name: str, **options) -> EmbeddingBackend:
+    """
+    Instantiate an embedding backend by name
+
+    Args:
+        backend: 'pytorch' or 'onnx'
+        model_name: sentence-transformers model name
+        **options: Backend-specific settings (unknown keys are ignored)
+
+    Returns:
+        EmbeddingBackend instance
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}. Available: {list(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[backend](model_name, **options)
@@ -0,0 +1,193 @@
+"""
+Length-Bucketed Embedding Batcher for RAG MCP Server
+Groups chunks of similar length into token-budgeted batches so padding is not wasted
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rough activation footprint of one padded token in a MiniLM-sized encoder
+BYTES_PER_TOKEN_ESTIMATE = 384 * 4 * 64
+
+
+@dataclass
+class StageStats:
+    """Timing and volume of one pipeline stage"""
+    stage: str
+    seconds: float = 0.0
+    items: int = 0
+    tokens: int = 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        stats = asdict(self)
+        stats["seconds"] = round(self.seconds, 4)
+        stats["tokens_per_second"] = round(self.tokens_per_second, 1)
+        return stats
+
+
+def memory_headroom_bytes() -> Optional[int]:
+    """Memory currently available to the process, or None if it cannot be determined"""
+    try:
+        import psutil
+        return int(psutil.virtual_memory().available)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class LengthBucketedBatcher:
+    """Embeds texts in length-sorted, token-budgeted batches and restores input order"""
+
+    def __init__(
+        self,
+        embeddings,
+        max_batch_tokens: int = 8192,
+        max_batch_size: int = 256,
+        bucket_width: int = 32,
+        chars_per_token: float = 4.0,
+        memory_fraction: float = 0.25
+    ):
+        """
+        Initialize batcher
+
+        Args:
+            embeddings: Embedding backend (embed_array() or LangChain embed_documents())
+            max_batch_tokens: Upper bound on padded tokens per batch
+            max_batch_size: Upper bound on texts per batch
+            bucket_width: Width of a length bucket in estimated tokens
+            chars_per_token: Characters per token used for length estimates
+            memory_fraction: Share of available memory one batch may use
+        """
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.bucket_width = bucket_width
+        self.chars_per_token = chars_per_token
+        self.memory_fraction = memory_fraction
+
+    def estimate_tokens(self, lengths: np.ndarray) -> np.ndarray:
+        """Estimated tokens per text from character lengths (+2 for special tokens)"""
+        return np.ceil(lengths / self.chars_per_token).astype(np.int64) + 2
+
+    def token_budget(self) -> int:
+        """Padded tokens allowed in the next batch given current memory headroom"""
+        headroom = memory_headroom_bytes()
+        if headroom is None:
+            return self.max_batch_tokens
+        memory_tokens = int(headroom * self.memory_fraction / BYTES_PER_TOKEN_ESTIMATE)
+        return max(1, min(self.max_batch_tokens, memory_tokens))
+
+    def plan(self, token_counts: np.ndarray) -> List[np.ndarray]:
+        """
+        Split text indices into batches of similar length
+
+        Indices are sorted by length bucket, then cut whenever the padded size
+        (batch size x longest text) would exceed the current token budget.
+        The budget is re-read for every batch so it tracks memory pressure.
+        """
+        buckets = token_counts // self.bucket_width
+        order = np.lexsort((token_counts, buckets))
+        batches: List[np.ndarray] = []
+        start = 0
+        while start < len(order):
+            budget = self.token_budget()
+            end = start + 1
+            longest = int(token_counts[order[start]])
+            while end < len(order) and end - start < self.max_batch_size:
+                longest = max(longest, int(token_counts[order[end]]))
+                if longest * (end - start + 1) > budget:
+                    break
+                end += 1
+            batches.append(order[start:end])
+            start = end
+        return batches
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        if hasattr(self.embeddings, "embed_array"):
+            return np.asarray(self.embeddings.embed_array(texts), dtype=np.float32)
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def _embed_with_backoff(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch, halving it on MemoryError"""
+        try:
+            return self._embed_batch(texts)
+        except MemoryError:
+            if len(texts) == 1:
+                raise
+            half = len(texts) // 2
+            logger.warning(f"Out of memory embedding {len(texts)} texts, retrying in halves")
+            return np.vstack([
+                self._embed_with_backoff(texts[:half]),
+                self._embed_with_backoff(texts[half:])
+            ])
+
+    def embed(self, texts: List[str]) -> Tuple[np.ndarray, List[StageStats]]:
+        """
+        Embed texts, returning vectors in the original order
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Tuple of ((len(texts), dim) float32 array, per-stage statistics)
+        """
+        plan_stats = StageStats("bucketing", items=len(texts))
+        embed_stats = StageStats("embedding", items=len(texts))
+        restore_stats = StageStats("restore_order", items=len(texts))
+
+        start = time.perf_counter()
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        token_counts = self.estimate_tokens(lengths)
+        batches = self.plan(token_counts)
+        plan_stats.seconds = time.perf_counter() - start
+        plan_stats.tokens = int(token_counts.sum())
+
+        embedded: List[Tuple[np.ndarray, np.ndarray]] = []
+        padded_tokens = 0
+        start = time.perf_counter()
+        for batch in batches:
+            vectors = self._embed_with_backoff([texts[i] for i in batch])
+            embedded.append((batch, vectors))
+            padded_tokens += int(token_counts[batch].max()) * len(batch)
+        embed_stats.seconds = time.perf_counter() - start
+        embed_stats.tokens = plan_stats.tokens
+
+        start = time.perf_counter()
+        if embedded:
+            output = np.empty((len(texts), embedded[0][1].shape[1]), dtype=np.float32)
+            for batch, vectors in embedded:
+                output[batch] = vectors
+        else:
+            output = np.empty((0, 0), dtype=np.float32)
+        restore_stats.seconds = time.perf_counter() - start
+        restore_stats.tokens = plan_stats.tokens
+
+        logger.info(
+            f"Embedded {len(texts)} texts in {len(batches)} batches "
+            f"({plan_stats.tokens} tokens, {padded_tokens - plan_stats.tokens} padding, "
+            f"{embed_stats.tokens_per_second:.0f} tokens/s)"
+        )
+        return output, [plan_stats, embed_stats, restore_stats]
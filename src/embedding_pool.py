@@ -0,0 +1,259 @@
+"""
+Embedding Worker Pool for RAG MCP Server
+Runs N embedding model replicas in worker processes; vectors come back through shared memory
+"""
+
+import os
+import math
+import atexit
+import logging
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import List, Dict, Any
+
+import numpy as np
+
+from embedding_backends import EmbeddingBackend, create_embedding_backend
+
+logger = logging.getLogger(__name__)
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TOKENIZERS_PARALLELISM")
+
+
+def physical_core_count() -> int:
+    """Physical cores if psutil can tell, otherwise logical CPUs"""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    except ImportError:
+        pass
+    return os.cpu_count() or 1
+
+
+def _worker_main(
+    worker_id: int,
+    backend: str,
+    model_name: str,
+    options: Dict[str, Any],
+    threads: int,
+    task_queue,
+    result_queue
+) -> None:
+    """Worker loop: embed texts and write the rows straight into the caller's shared memory"""
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = "false" if var == "TOKENIZERS_PARALLELISM" else str(threads)
+
+    try:
+        if backend == "pytorch":
+            import torch
+            torch.set_num_threads(threads)
+            torch.set_num_interop_threads(1)
+        embedder = create_embedding_backend(
+            backend,
+            model_name,
+            **{**options, "intra_op_threads": threads, "inter_op_threads": 1}
+        )
+        dim = int(embedder.embed_array(["warm-up"]).shape[1])
+    except Exception as e:
+        result_queue.put(("ready", worker_id, None, f"{type(e).__name__}: {e}"))
+        return
+
+    result_queue.put(("ready", worker_id, dim, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, shm_name, num_rows, row_offset, texts = task
+        try:
+            vectors = embedder.embed_array(texts)
+            # Spawned workers share the parent's resource tracker, so attaching
+            # here does not create a second owner of the block
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                out = np.ndarray((num_rows, dim), dtype=np.float32, buffer=shm.buf)
+                out[row_offset:row_offset + len(texts)] = vectors
+                del out
+            finally:
+                shm.close()
+            result_queue.put(("done", task_id, None, None))
+        except Exception as e:
+            result_queue.put(("done", task_id, None, f"{type(e).__name__}: {e}"))
+
+
+class _PendingCall:
+    """Tasks outstanding for one embed_array() call"""
+
+    def __init__(self, num_tasks: int):
+        self.remaining = num_tasks
+        self.errors: List[str] = []
+        self.done = threading.Event()
+
+
+class EmbeddingWorkerPool(EmbeddingBackend):
+    """Embedding backend that fans batches out to model replicas in worker processes"""
+
+    name = "pool"
+
+    def __init__(
+        self,
+        backend: str,
+        model_name: str,
+        num_workers: int = 0,
+        threads_per_worker: int = 1,
+        min_texts_per_task: int = 8,
+        startup_timeout: float = 600.0,
+        **backend_options
+    ):
+        """
+        Start worker processes
+
+        Args:
+            backend: Backend each replica runs ('pytorch' or 'onnx')
+            model_name: sentence-transformers model name
+            num_workers: Replicas to start (0 = physical cores / threads_per_worker)
+            threads_per_worker: Compute threads inside each replica
+            min_texts_per_task: Smallest slice of a call sent to one worker
+            startup_timeout: Seconds to wait for every replica to load its model
+            **backend_options: Passed to create_embedding_backend in each worker
+        """
+        super().__init__(model_name)
+        self.backend = backend
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.num_workers = num_workers or max(1, physical_core_count() // self.threads_per_worker)
+        self.min_texts_per_task = min_texts_per_task
+
+        ctx = mp.get_context("spawn")
+        self._task_queue = ctx.Queue()
+        self._result_queue = ctx.Queue()
+        self._pending: Dict[int, _PendingCall] = {}
+        self._task_owner: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+
+        self._processes = [
+            ctx.Process(
+                target=_worker_main,
+                args=(i, backend, model_name, backend_options, self.threads_per_worker,
+                      self._task_queue, self._result_queue),
+                daemon=True,
+                name=f"embedding-worker-{i}"
+            )
+            for i in range(self.num_workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self.dim = self._wait_ready(startup_timeout)
+
+        self._collector = threading.Thread(target=self._collect_results, daemon=True, name="embedding-pool-collector")
+        self._collector.start()
+        atexit.register(self.close)
+
+        logger.info(
+            f"Embedding pool ready: {self.num_workers} x {backend} replicas, "
+            f"{self.threads_per_worker} thread(s) each, dim={self.dim}"
+        )
+
+    def _wait_ready(self, timeout: float) -> int:
+        dims = set()
+        errors = []
+        for _ in self._processes:
+            kind, worker_id, dim, error = self._result_queue.get(timeout=timeout)
+            if error:
+                errors.append(f"worker {worker_id}: {error}")
+            else:
+                dims.add(dim)
+        if errors:
+            self.close()
+            raise RuntimeError(f"Embedding workers failed to start: {'; '.join(errors)}")
+        if len(dims) != 1:
+            self.close()
+            raise RuntimeError(f"Embedding workers disagree on dimension: {dims}")
+        return dims.pop()
+
+    def _collect_results(self) -> None:
+        """Route task completions to the embed_array() call that issued them"""
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                break
+            _, task_id, _, error = message
+            with self._lock:
+                call_id = self._task_owner.pop(task_id, None)
+                call = self._pending.get(call_id)
+                if call is None:
+                    continue
+                if error:
+                    call.errors.append(error)
+                call.remaining -= 1
+                if call.remaining == 0:
+                    call.done.set()
+
+    def _check_workers(self) -> None:
+        dead = [p.name for p in self._processes if not p.is_alive()]
+        if dead:
+            raise RuntimeError(f"Embedding worker(s) exited unexpectedly: {', '.join(dead)}")
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        if self._closed:
+            raise RuntimeError("Embedding pool is closed")
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        num_rows = len(texts)
+        num_tasks = max(1, min(self.num_workers, math.ceil(num_rows / self.min_texts_per_task)))
+        task_size = math.ceil(num_rows / num_tasks)
+        slices = [(start, texts[start:start + task_size]) for start in range(0, num_rows, task_size)]
+
+        shm = shared_memory.SharedMemory(create=True, size=num_rows * self.dim * 4)
+        call = _PendingCall(len(slices))
+        call_id = next(self._ids)
+        try:
+            with self._lock:
+                self._pending[call_id] = call
+                task_ids = [next(self._ids) for _ in slices]
+                for task_id in task_ids:
+                    self._task_owner[task_id] = call_id
+            for task_id, (offset, chunk) in zip(task_ids, slices):
+                self._task_queue.put((task_id, shm.name, num_rows, offset, list(chunk)))
+
+            while not call.done.wait(timeout=1.0):
+                self._check_workers()
+
+            if call.errors:
+                raise RuntimeError(f"Embedding failed: {call.errors[0]}")
+            return np.ndarray((num_rows, self.dim), dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            with self._lock:
+                self._pending.pop(call_id, None)
+            shm.close()
+            shm.unlink()
+
+    def close(self) -> None:
+        """Stop worker processes"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._result_queue.put(None)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            **super().describe(),
+            "replica_backend": self.backend,
+            "num_workers": self.num_workers,
+            "threads_per_worker": self.threads_per_worker,
+            "dim": self.dim
+        }
@@ -0,0 +1,284 @@
+"""
+Index Synchronization for RAG MCP Server
+Single-writer coordination and version notifications for worker processes that
+share the on-disk vector stores, plus memory-mapped read-only index loading
+"""
+
+import os
+import json
+import pickle
+import shutil
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+from similarity import cosine_index, is_cosine_index, reconstruct_all
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "index_manifest.json"
+WRITER_LOCK_FILE = "index_writer.lock"
+# Marker written into stores whose indexes use normalized inner product, so
+# startup migration can skip them without reading the index
+STORE_FORMAT_FILE = "store_format.json"
+STORE_FORMAT = {"metric": "cosine", "version": 1}
+
+
+class IndexCoordinator:
+    """
+    Publishes index versions through a manifest file and serializes writers.
+
+    Writers hold an exclusive file lock for the whole ingest/delete, save the
+    store with save_vector_store_atomic() and then publish() a new version.
+    Readers call poll(), which costs one stat() unless the manifest changed.
+    """
+
+    def __init__(self, data_dir: Path, vector_store_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.vector_store_dir = Path(vector_store_dir)
+        self.manifest_path = self.data_dir / MANIFEST_FILE
+        self.lock_path = self.data_dir / WRITER_LOCK_FILE
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+        self._seen_stamp = None
+
+    @contextmanager
+    def writer(self) -> Iterator[None]:
+        """Exclusive write access across all processes sharing data_dir (re-entrant)"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(self.lock_path, "a+")
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"version": 0, "documents": {}}
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.data_dir), prefix=".manifest-", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def publish(self, document_name: str, store_path: Optional[str] = None) -> int:
+        """
+        Record a new version of a document (store_path=None records a deletion)
+
+        Returns:
+            The document's new version number (0 for a deletion)
+        """
+        with self.writer():
+            manifest = self.read_manifest()
+            manifest["version"] = manifest.get("version", 0) + 1
+            if store_path is None:
+                manifest["documents"].pop(document_name, None)
+                version = 0
+            else:
+                version = manifest["version"]
+                manifest["documents"][document_name] = {"version": version, "store_path": str(store_path)}
+            self._write_manifest(manifest)
+        return version
+
+    def bootstrap(self) -> Dict[str, Any]:
+        """Create the manifest from stores already on disk if there is none yet"""
+        with self.writer():
+            if self.manifest_path.exists():
+                return self.read_manifest()
+            manifest = {"version": 1, "documents": {}}
+            if self.vector_store_dir.exists():
+                for store in sorted(self.vector_store_dir.iterdir()):
+                    if store.is_dir() and not store.name.startswith(".") and (store / "index.faiss").exists():
+                        manifest["documents"][store.name] = {"version": 1, "store_path": str(store)}
+            self._write_manifest(manifest)
+            logger.info(f"Index manifest created with {len(manifest['documents'])} existing store(s)")
+            return manifest
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """Return the manifest if it changed since the last poll, else None"""
+        try:
+            stat = os.stat(self.manifest_path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stamp == self._seen_stamp:
+            return None
+        self._seen_stamp = stamp
+        return self.read_manifest()
+
+
+def fsync_path(path: Path) -> None:
+    """Flush a file or directory entry to disk (directories are skipped where unsupported)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def staging_path(path: Path) -> Path:
+    """Hidden sibling that path is written to before being renamed into place"""
+    path = Path(path)
+    return path.with_name(f".{path.name}.staging-{os.getpid()}")
+
+
+def retired_path(path: Path) -> Path:
+    """Hidden sibling that path is moved to while it is being replaced or deleted"""
+    path = Path(path)
+    return path.with_name(f".{path.name}.old-{os.getpid()}")
+
+
+def stage_vector_store(vector_store, store_path: Path) -> Path:
+    """
+    Write a LangChain FAISS store to a staging directory next to store_path
+
+    The files are fsynced so the staged copy survives a crash once this returns.
+
+    Returns:
+        The staging directory, to be swapped in with install_staged_store()
+    """
+    staging = staging_path(store_path)
+    shutil.rmtree(staging, ignore_errors=True)
+    vector_store.save_local(str(staging))
+    if is_cosine_index(vector_store.index):
+        write_store_format(staging)
+    for path in staging.iterdir():
+        fsync_path(path)
+    fsync_path(staging)
+    return staging
+
+
+def install_staged_store(staging: Path, store_path: Path) -> None:
+    """
+    Swap a staged store into place with renames
+
+    Safe to call again after a crash between the two renames: the retired
+    copy is only removed once the staged one is in place.
+    """
+    staging, store_path = Path(staging), Path(store_path)
+    retired = retired_path(store_path)
+    if store_path.exists():
+        shutil.rmtree(retired, ignore_errors=True)
+        os.rename(store_path, retired)
+    os.rename(staging, store_path)
+    fsync_path(store_path.parent)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def save_vector_store_atomic(vector_store, store_path: Path) -> None:
+    """
+    Save a LangChain FAISS store so readers never see a half-written directory
+
+    The store is written to a staging directory and swapped in with renames.
+    Processes that memory-mapped the old files keep a valid view until they
+    reload, because unlinked files stay alive while mapped.
+    """
+    install_staged_store(stage_vector_store(vector_store, store_path), store_path)
+
+
+def load_vector_store(store_path: str, embeddings):
+    """
+    Load a LangChain FAISS store with the index memory-mapped read-only
+
+    Flat indexes are mapped straight from index.faiss, so worker processes
+    serving the same store share one copy through the page cache. Stores
+    saved before normalized scoring (flat L2) are served from a normalized
+    in-memory copy until migrate_vector_store() rewrites them.
+    """
+    import faiss
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+
+    store_path = Path(store_path)
+    mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    try:
+        index = faiss.read_index(str(store_path / "index.faiss"), mmap_flag | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Index types without mmap support are read into memory
+        index = faiss.read_index(str(store_path / "index.faiss"))
+    if not is_cosine_index(index):
+        logger.info(f"{store_path} has an L2 index; serving a normalized copy until it is migrated")
+        index = cosine_index(reconstruct_all(index))
+
+    # The pickle is written by this server's own save_local(), never taken from clients
+    with open(store_path / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(
+        embeddings, index, docstore, index_to_docstore_id,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+
+def has_current_format(store_path: Path) -> bool:
+    """True if the store carries the current STORE_FORMAT marker (no index is read)"""
+    try:
+        with open(Path(store_path) / STORE_FORMAT_FILE, "r") as f:
+            return json.load(f) == STORE_FORMAT
+    except (OSError, ValueError):
+        return False
+
+
+def write_store_format(store_path: Path) -> None:
+    """Mark a store as using the current index format"""
+    path = Path(store_path) / STORE_FORMAT_FILE
+    with open(path, "w") as f:
+        json.dump(STORE_FORMAT, f)
+        f.flush()
+        os.fsync(f.fileno())
+    fsync_path(path.parent)
+
+
+def migrate_vector_store(store_path: Path) -> bool:
+    """
+    Rewrite a store's flat L2 index as an inner-product index over its normalized vectors
+
+    The stored vectors are re-normalized, not re-embedded. The new index.faiss
+    is fsynced and renamed over the old one, so readers see either version;
+    hold the writer lock and publish() afterwards so other workers reload.
+
+    Returns:
+        True if the index was rewritten, False if it already used inner product
+    """
+    import faiss
+
+    index_path = Path(store_path) / "index.faiss"
+    index = faiss.read_index(str(index_path))
+    if is_cosine_index(index):
+        return False
+
+    staging = staging_path(index_path)
+    faiss.write_index(cosine_index(reconstruct_all(index)), str(staging))
+    fsync_path(staging)
+    os.replace(staging, index_path)
+    fsync_path(index_path.parent)
+    return True
@@ -0,0 +1,221 @@
+"""
+Index Write-Ahead Log for RAG MCP Server
+Append-only log of ingest/delete operations so a crash mid-write can be
+replayed or rolled back on startup instead of leaving half-written stores
+"""
+
+import os
+import json
+import time
+import uuid
+import zlib
+import shutil
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+from index_sync import IndexCoordinator, install_staged_store, fsync_path, staging_path, retired_path
+
+logger = logging.getLogger(__name__)
+
+WAL_FILE = "index_wal.log"
+# The log is truncated at a commit once it grows past this size; nothing is in
+# flight then, so recovery never reads more than this
+WAL_CHECKPOINT_BYTES = 1 << 20
+
+
+class WalOperation:
+    """Handle for one logged operation; call prepared() once everything is staged"""
+
+    def __init__(self, wal: "IndexWriteAheadLog", op_id: str):
+        self.wal = wal
+        self.op_id = op_id
+        self.is_prepared = False
+
+    def prepared(self) -> None:
+        """Record that the staged files are complete; from here on recovery rolls the operation forward"""
+        self.wal._append({"op_id": self.op_id, "state": "prepared"})
+        self.is_prepared = True
+
+
+class IndexWriteAheadLog:
+    """
+    Logs each ingest/delete before it touches the vector store directory.
+
+    An ingest is logged as begin -> prepared -> commit. Before 'prepared' only
+    staging files exist, so an interrupted ingest is rolled back by removing
+    them; after it the staged store and metadata are complete, so recovery
+    finishes the renames and publishes the version. Deletes are idempotent and
+    always rolled forward. Each line carries a CRC so a torn final write is
+    ignored.
+    """
+
+    def __init__(self, data_dir: Path, coordinator: IndexCoordinator):
+        self.coordinator = coordinator
+        self.path = Path(data_dir) / WAL_FILE
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record["ts"] = time.time()
+        body = json.dumps(record, sort_keys=True)
+        line = f"{zlib.crc32(body.encode('utf-8')):08x} {body}\n"
+        with open(self.path, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Valid records in log order (stops at the first torn or corrupt line)"""
+        records = []
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    crc, _, body = line.rstrip("\n").partition(" ")
+                    if not body or f"{zlib.crc32(body.encode('utf-8')):08x}" != crc:
+                        logger.warning(f"Ignoring torn write-ahead log tail in {self.path}")
+                        break
+                    records.append(json.loads(body))
+        except FileNotFoundError:
+            pass
+        return records
+
+    def checkpoint(self) -> None:
+        """Truncate the log; only valid while no operation is in flight"""
+        with open(self.path, "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    @contextmanager
+    def operation(self, op: str, document_name: str, store_path: Path, metadata_path: Path) -> Iterator[WalOperation]:
+        """
+        Log one operation around the caller's writes (holds the writer lock)
+
+        Ingests write the store to staging_path(store_path) and the metadata
+        to staging_path(metadata_path), then call prepared() before installing
+        them. On an exception before prepared() the operation is rolled back;
+        after it, or for a delete, it is rolled forward immediately so disk
+        and manifest agree.
+        """
+        with self.coordinator.writer():
+            op_id = uuid.uuid4().hex
+            self._append({
+                "op_id": op_id, "state": "begin", "op": op, "document": document_name,
+                "store_path": str(store_path), "metadata_path": str(metadata_path),
+                "staging": str(staging_path(store_path)), "metadata_staging": str(staging_path(metadata_path))
+            })
+            handle = WalOperation(self, op_id)
+            try:
+                yield handle
+            except BaseException:
+                self._finish_incomplete()
+                raise
+            self._append({"op_id": op_id, "state": "commit"})
+            if self.path.stat().st_size > WAL_CHECKPOINT_BYTES:
+                self.checkpoint()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Operations that began but never committed or aborted, with their merged fields"""
+        operations: Dict[str, Dict[str, Any]] = {}
+        for record in self.read():
+            if record["state"] in ("commit", "abort"):
+                operations.pop(record["op_id"], None)
+            else:
+                operations.setdefault(record["op_id"], {}).update(record)
+        return list(operations.values())
+
+    def _finish_incomplete(self) -> List[Dict[str, Any]]:
+        outcomes = []
+        for operation in self.pending():
+            try:
+                outcome = self._roll_forward(operation) if _rolls_forward(operation) else self._roll_back(operation)
+            except Exception as e:
+                logger.error(f"Could not recover {operation['op']} of {operation['document']}: {e}")
+                outcome = "failed"
+            self._append({"op_id": operation["op_id"], "state": "abort" if outcome == "rolled_back" else "commit"})
+            outcomes.append({"op": operation["op"], "document": operation["document"], "outcome": outcome})
+        return outcomes
+
+    def _roll_back(self, operation: Dict[str, Any]) -> str:
+        # Nothing outside the staging area was touched yet
+        for key in ("staging", "metadata_staging"):
+            if operation.get(key):
+                _remove(Path(operation[key]))
+        return "rolled_back"
+
+    def _roll_forward(self, operation: Dict[str, Any]) -> str:
+        document_name = operation["document"]
+        store_path = Path(operation["store_path"])
+        metadata_path = Path(operation["metadata_path"])
+
+        if operation["op"] == "delete":
+            _remove(store_path)
+            _remove(retired_path(store_path))
+            _remove(metadata_path)
+            self.coordinator.publish(document_name, None)
+            return "replayed"
+
+        staging = Path(operation["staging"])
+        if staging.exists():
+            install_staged_store(staging, store_path)
+        metadata_staging = Path(operation["metadata_staging"])
+        if metadata_staging.exists():
+            os.replace(metadata_staging, metadata_path)
+        self.coordinator.publish(document_name, str(store_path) if store_path.exists() else None)
+        return "replayed"
+
+    def recover(self, vector_store_dir: Path, metadata_dir: Path) -> Dict[str, Any]:
+        """
+        Finish or undo interrupted operations, then sweep leftover staging files
+
+        Runs under the writer lock, so any operation still open in the log
+        belongs to a process that died. Cost is proportional to the log length.
+        """
+        start = time.perf_counter()
+        with self.coordinator.writer():
+            outcomes = self._finish_incomplete()
+            swept = []
+            for directory in (Path(vector_store_dir), Path(metadata_dir)):
+                if not directory.exists():
+                    continue
+                for path in directory.iterdir():
+                    if path.name.startswith(".") and (".staging-" in path.name or ".old-" in path.name):
+                        _remove(path)
+                        swept.append(path.name)
+            self.checkpoint()
+
+        if outcomes or swept:
+            logger.info(f"Index recovery: {outcomes}, removed {len(swept)} leftover staging path(s)")
+        return {"operations": outcomes, "swept": swept, "seconds": round(time.perf_counter() - start, 4)}
+
+
+def _rolls_forward(operation: Dict[str, Any]) -> bool:
+    return operation["op"] == "delete" or operation["state"] == "prepared"
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    elif path.exists():
+        path.unlink()
+
+
+def stage_json(data: Dict[str, Any], path: Path) -> Path:
+    """Write JSON next to path under a staging name, fsynced; os.replace() it to install"""
+    staging = staging_path(path)
+    with open(staging, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    return staging
+
+
+def retire_store(store_path: Path) -> Optional[Path]:
+    """Rename a store out of the way so it disappears atomically; returns the retired path"""
+    store_path = Path(store_path)
+    if not store_path.exists():
+        return None
+    retired = retired_path(store_path)
+    shutil.rmtree(retired, ignore_errors=True)
+    os.rename(store_path, retired)
+    fsync_path(store_path.parent)
+    return retired
@@ -0,0 +1,336 @@
+"""
+MCP Load Generator for RAG MCP Server
+Drives the server over its real MCP transport (stdio or streamable HTTP) with
+concurrent sessions, in closed-loop or open-loop (Poisson arrivals) mode
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(1, str(PROJECT_ROOT))
+
+from config.config import DATA_DIR, VECTOR_STORE_DIR
+
+
+def vector_store_dir() -> Path:
+    """Directory of per-document stores, resolved like rag_server (DATA_DIR env, else config)"""
+    return Path(os.environ.get("DATA_DIR", PROJECT_ROOT / DATA_DIR)) / VECTOR_STORE_DIR
+
+
+@dataclass
+class LoadRequest:
+    """One entry of the query mix"""
+    tool: str
+    arguments: Dict[str, Any]
+    weight: float = 1.0
+    setup: bool = False  # sent once per session before the run, not measured
+
+
+@dataclass
+class RequestResult:
+    """Outcome of one tool call"""
+    tool: str
+    latency: float
+    error: Optional[str] = None
+    queue_delay: float = 0.0
+
+
+@dataclass
+class LoadTestConfig:
+    """Load test settings"""
+    transport: str = "stdio"  # 'stdio' or 'http'
+    url: str = "http://127.0.0.1:8000/mcp"
+    server_command: List[str] = field(default_factory=lambda: [sys.executable, str(PROJECT_ROOT / "src" / "rag_server.py")])
+    sessions: int = 4
+    requests: int = 200
+    duration: Optional[float] = None  # seconds; overrides requests when set
+    rate: Optional[float] = None  # open-loop arrivals per second; None = closed loop
+    warmup: int = 5
+    timeout: float = 60.0
+    seed: int = 0
+    server_log: Optional[str] = None  # stdio server stderr goes here (default: discarded)
+
+
+def load_query_mix(path: str, document_name: Optional[str] = None, top_k: int = 5) -> List[LoadRequest]:
+    """
+    Load a query mix file
+
+    Supported formats:
+      - JSON list or JSON lines of {"tool": ..., "arguments": {...}, "weight": 1.0};
+        entries with "setup": true run once per session before the load starts
+      - Plain text: one query per line, sent to rag_query on document_name
+        (each session first loads the document's saved index)
+
+    Args:
+        path: Query mix file
+        document_name: Document for plain-text queries
+        top_k: top_k for plain-text queries
+
+    Returns:
+        List of weighted requests
+    """
+    content = Path(path).read_text(encoding="utf-8")
+    stripped = content.lstrip()
+
+    entries = None
+    if stripped.startswith("["):
+        entries = json.loads(content)
+    elif stripped.startswith("{"):
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    if entries is not None:
+        return [
+            LoadRequest(
+                entry["tool"],
+                entry.get("arguments", {}),
+                float(entry.get("weight", 1.0)),
+                bool(entry.get("setup", False))
+            )
+            for entry in entries
+        ]
+
+    if not document_name:
+        raise ValueError("A document name is required for a plain-text query mix")
+    store_path = vector_store_dir() / document_name
+    setup = LoadRequest(
+        "load_existing_index",
+        {"document_name": document_name, "store_path": str(store_path)},
+        setup=True
+    )
+    return [setup] + [
+        LoadRequest("rag_query", {"document_name": document_name, "query": line.strip(), "top_k": top_k})
+        for line in content.splitlines() if line.strip()
+    ]
+
+
+def _result_error(result) -> Optional[str]:
+    """Error message carried by a CallToolResult, or None on success"""
+    text = "".join(getattr(item, "text", "") for item in result.content)
+    if result.isError:
+        return text[:200] or "tool error"
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(payload, dict) and (payload.get("success") is False or "error" in payload):
+        return str(payload.get("error", "tool reported failure"))[:200]
+    return None
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = q * (len(ordered) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        f"p{int(q * 100)}_ms": round(_percentile(latencies, q) * 1000, 3)
+        for q in (0.50, 0.90, 0.95, 0.99)
+    } | {"max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0}
+
+
+def summarize(results: List[RequestResult], elapsed: float, config: LoadTestConfig) -> Dict[str, Any]:
+    """Aggregate request results into throughput, latency and error statistics"""
+    ok = [r for r in results if r.error is None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error is not None:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    per_tool = {}
+    for tool in sorted({r.tool for r in results}):
+        tool_results = [r for r in results if r.tool == tool]
+        tool_ok = [r.latency for r in tool_results if r.error is None]
+        per_tool[tool] = {
+            "requests": len(tool_results),
+            "errors": len(tool_results) - len(tool_ok),
+            "latency": _latency_summary(tool_ok)
+        }
+
+    summary = {
+        "transport": config.transport,
+        "mode": "open-loop" if config.rate else "closed-loop",
+        "sessions": config.sessions,
+        "target_rate": config.rate,
+        "requests": len(results),
+        "successes": len(ok),
+        "errors": len(results) - len(ok),
+        "error_rate": round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency": _latency_summary([r.latency for r in ok]),
+        "per_tool": per_tool,
+        "top_errors": dict(sorted(errors.items(), key=lambda item: -item[1])[:5])
+    }
+    if config.rate:
+        summary["queue_delay"] = _latency_summary([r.queue_delay for r in results])
+    return summary
+
+
+class LoadGenerator:
+    """Runs a query mix against the server over N concurrent MCP sessions"""
+
+    def __init__(self, config: LoadTestConfig, mix: List[LoadRequest]):
+        self.setup = [r for r in mix if r.setup]
+        self.mix = [r for r in mix if not r.setup]
+        if not self.mix:
+            raise ValueError("Query mix is empty")
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.results: List[RequestResult] = []
+        self._remaining = config.requests
+        self._stop_at: Optional[float] = None
+        self._last_done: Optional[float] = None
+
+    def _pick(self) -> LoadRequest:
+        return self.rng.choices(self.mix, weights=[r.weight for r in self.mix])[0]
+
+    def _open_session(self):
+        """Async context manager yielding (read, write) streams for one session"""
+        if self.config.transport == "http":
+            from mcp.client.streamable_http import streamablehttp_client
+            return streamablehttp_client(self.config.url, timeout=self.config.timeout)
+
+        from mcp.client.stdio import stdio_client, StdioServerParameters
+        # stdio serves one client per process, so each session gets its own server
+        params = StdioServerParameters(
+            command=self.config.server_command[0],
+            args=self.config.server_command[1:],
+            cwd=str(PROJECT_ROOT)
+        )
+        errlog = open(self.config.server_log or os.devnull, "a")
+        return stdio_client(params, errlog=errlog)
+
+    async def _call(self, session, request: LoadRequest, scheduled: Optional[float] = None) -> RequestResult:
+        from datetime import timedelta
+
+        start = time.perf_counter()
+        queue_delay = start - scheduled if scheduled is not None else 0.0
+        try:
+            result = await session.call_tool(
+                request.tool,
+                request.arguments,
+                read_timeout_seconds=timedelta(seconds=self.config.timeout)
+            )
+            error = _result_error(result)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:200]
+        # Open-loop latency counts from the scheduled arrival, so a saturated
+        # server shows up as latency instead of silently lowering the offered load
+        self._last_done = time.perf_counter()
+        latency = self._last_done - (scheduled if scheduled is not None else start)
+        return RequestResult(request.tool, latency, error, queue_delay)
+
+    def _take_ticket(self) -> bool:
+        """Closed loop: claim the next request slot, False once the run is over"""
+        if self._stop_at is not None:
+            return time.perf_counter() < self._stop_at
+        if self._remaining <= 0:
+            return False
+        self._remaining -= 1
+        return True
+
+    async def _session_worker(self, ready: asyncio.Event, barrier: List[int], work: "asyncio.Queue") -> None:
+        from mcp import ClientSession
+
+        async with self._open_session() as streams:
+            read, write = streams[0], streams[1]
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for request in self.setup:
+                    outcome = await self._call(session, request)
+                    if outcome.error:
+                        logger.warning(f"Setup call {request.tool} failed: {outcome.error}")
+                for _ in range(self.config.warmup):
+                    await self._call(session, self._pick())
+
+                barrier[0] -= 1
+                if barrier[0] == 0:
+                    ready.set()
+                await ready.wait()
+
+                if not self.config.rate:
+                    # Closed loop: each session issues its next request as soon as the last returns
+                    while self._take_ticket():
+                        self.results.append(await self._call(session, self._pick()))
+                    return
+
+                while True:
+                    item = await work.get()
+                    if item is None:
+                        break
+                    request, scheduled = item
+                    self.results.append(await self._call(session, request, scheduled))
+
+    async def _produce_open_loop(self, work: "asyncio.Queue") -> None:
+        """Poisson arrivals at the configured rate, independent of response times"""
+        next_arrival = time.perf_counter()
+        sent = 0
+        while self._stop_at is not None or sent < self.config.requests:
+            next_arrival += self.rng.expovariate(self.config.rate)
+            if self._stop_at is not None and next_arrival > self._stop_at:
+                break
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            work.put_nowait((self._pick(), next_arrival))
+            sent += 1
+
+    async def run(self) -> Dict[str, Any]:
+        """Run the load test and return the summary"""
+        ready = asyncio.Event()
+        barrier = [self.config.sessions]
+        work: asyncio.Queue = asyncio.Queue()
+
+        workers = [
+            asyncio.create_task(self._session_worker(ready, barrier, work))
+            for _ in range(self.config.sessions)
+        ]
+        ready_wait = asyncio.create_task(ready.wait())
+        done, _ = await asyncio.wait([ready_wait, *workers], return_when=asyncio.FIRST_COMPLETED)
+        if ready_wait not in done:
+            # A session died before the run started
+            for task in workers:
+                task.cancel()
+            failed = next(t for t in done if t is not ready_wait)
+            raise RuntimeError(f"Session failed to start: {failed.exception()!r}")
+
+        # Sessions are waiting on the event already set; the clock starts now
+        start = time.perf_counter()
+        self._stop_at = start + self.config.duration if self.config.duration else None
+        logger.info(f"All {self.config.sessions} sessions ready, starting load")
+
+        if self.config.rate:
+            await self._produce_open_loop(work)
+            for _ in workers:
+                await work.put(None)
+        outcomes = await asyncio.gather(*workers, return_exceptions=True)
+        # Measure to the last response, not to session teardown
+        elapsed = max(self._last_done or 0.0, start) - start
+
+        failures = [o for o in outcomes if isinstance(o, BaseException)]
+        summary = summarize(self.results, elapsed, self.config)
+        if failures:
+            summary["session_failures"] = [repr(f)[:200] for f in failures]
+        return summary
+
+
+def run_load_test(config: LoadTestConfig, mix: List[LoadRequest]) -> Dict[str, Any]:
+    """Synchronous entry point used by client.py"""
+    return asyncio.run(LoadGenerator(config, mix).run())
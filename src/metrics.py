@@ -0,0 +1,317 @@
+"""
+Server Metrics for RAG MCP Server
+Per-tool and per-stage latency histograms, counters, cache hit rates and memory gauges,
+exported as JSON (get_server_metrics tool) or Prometheus text format
+"""
+
+import os
+import sys
+import time
+import bisect
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Set while an instrumented tool runs, so tools it calls are not counted again
+_inside_tool: contextvars.ContextVar = contextvars.ContextVar("inside_tool", default=False)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in pairs) + "}"
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return int(peak if sys.platform == "darwin" else peak * 1024)
+    except ImportError:
+        return 0
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                lower = self.buckets[idx - 1] if idx > 0 else 0.0
+                upper = self.buckets[idx] if idx < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50_seconds": round(self.quantile(0.50), 6),
+            "p95_seconds": round(self.quantile(0.95), 6),
+            "p99_seconds": round(self.quantile(0.99), 6),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, histograms and gauges"""
+
+    def __init__(self, namespace: str = "rag"):
+        self.namespace = namespace
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def gauge(self, name: str, func: Callable[[], float], help_text: str = "") -> None:
+        """Register a gauge whose value is read at scrape time"""
+        self._gauges[name] = func
+        if help_text:
+            self._help[name] = help_text
+
+    @contextmanager
+    def stage(self, tool: str, stage: str, bytes_processed: int = 0) -> Iterator[None]:
+        """Time one stage of a tool"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, tool=tool, stage=stage)
+            if bytes_processed:
+                self.inc("bytes_processed_total", bytes_processed, tool=tool, stage=stage)
+
+    def record_stage(self, tool: str, stage: str, seconds: float, bytes_processed: int = 0) -> None:
+        """Record a stage that was timed elsewhere"""
+        self.observe("stage_duration_seconds", seconds, tool=tool, stage=stage)
+        if bytes_processed:
+            self.inc("bytes_processed_total", bytes_processed, tool=tool, stage=stage)
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        self.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def instrument(self, func: Callable) -> Callable:
+        """
+        Wrap a tool so calls, errors and latency are recorded under its name
+
+        Only the outermost instrumented call is recorded: a tool called by
+        another tool (e.g. rag_query inside generate_compliance_report) is
+        part of the caller's call and latency, not a call of its own.
+        """
+        tool_name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _inside_tool.get():
+                return func(*args, **kwargs)
+            token = _inside_tool.set(True)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = isinstance(result, dict) and (result.get("success") is False or "error" in result)
+                return result
+            finally:
+                _inside_tool.reset(token)
+                self.observe("tool_duration_seconds", time.perf_counter() - start, tool=tool_name)
+                self.inc("tool_calls_total", tool=tool_name)
+                if failed:
+                    self.inc("tool_errors_total", tool=tool_name)
+
+        return wrapper
+
+    def _read_gauges(self) -> Dict[str, float]:
+        values = {}
+        for name, func in self._gauges.items():
+            try:
+                values[name] = float(func())
+            except Exception as e:
+                logger.debug(f"Gauge {name} failed: {e}")
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics as a JSON-serializable dict"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: hist.snapshot() for key, hist in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        def by_label(series: Dict[LabelKey, Any], label: str) -> Dict[str, Any]:
+            return {dict(key).get(label, ""): value for key, value in series.items()}
+
+        tools = {}
+        for tool_name, latency in by_label(histograms.get("tool_duration_seconds", {}), "tool").items():
+            tools[tool_name] = {
+                "calls": int(by_label(counters.get("tool_calls_total", {}), "tool").get(tool_name, 0)),
+                "errors": int(by_label(counters.get("tool_errors_total", {}), "tool").get(tool_name, 0)),
+                "latency": latency
+            }
+
+        stages: Dict[str, Dict[str, Any]] = {}
+        for key, latency in histograms.get("stage_duration_seconds", {}).items():
+            labels = dict(key)
+            stages.setdefault(labels["tool"], {})[labels["stage"]] = {
+                **latency,
+                "bytes_processed": int(counters.get("bytes_processed_total", {}).get(key, 0))
+            }
+
+        caches: Dict[str, Dict[str, Any]] = {}
+        for key, value in counters.get("cache_requests_total", {}).items():
+            labels = dict(key)
+            entry = caches.setdefault(labels["cache"], {"hits": 0, "misses": 0})
+            entry["hits" if labels["result"] == "hit" else "misses"] += int(value)
+        for entry in caches.values():
+            total = entry["hits"] + entry["misses"]
+            entry["hit_rate"] = round(entry["hits"] / total, 4) if total else 0.0
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "tools": tools,
+            "stages": stages,
+            "caches": caches,
+            "gauges": self._read_gauges()
+        }
+
+    def render_prometheus(self) -> str:
+        """Metrics in Prometheus text exposition format (version 0.0.4)"""
+        ns = self.namespace
+        lines: List[str] = []
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{ns}_{name}"
+                lines.append(f"# HELP {full} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in series.items():
+                    lines.append(f"{full}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                full = f"{ns}_{name}"
+                lines.append(f"# HELP {full} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in series.items():
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(key, {'le': repr(bound)})} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(key, {'le': '+Inf'})} {hist.count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {hist.total}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+
+        for name, value in sorted(self._read_gauges().items()):
+            full = f"{ns}_{name}"
+            lines.append(f"# HELP {full} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {full} gauge")
+            lines.append(f"{full} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+    """
+    Serve GET /metrics in Prometheus text format from a daemon thread
+
+    Args:
+        registry: Registry to expose
+        host: Interface to bind (loopback by default)
+        port: TCP port
+
+    Returns:
+        The running ThreadingHTTPServer
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format % args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http")
+    thread.start()
+    logger.info(f"Prometheus metrics available at http://{host}:{port}/metrics")
+    return server
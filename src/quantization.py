@@ -0,0 +1,204 @@
+"""
+Quantized Vector Storage for RAG MCP Server
+Scalar (fp16/int8) and binary quantization with exact rescoring from disk
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("fp16", "int8", "binary")
+FULL_PRECISION_FILE = "vectors_f32.npy"
+CODES_FILE = "codes.npy"
+PARAMS_FILE = "quantization.json"
+
+# Rows scored per block so coarse search never materialises a full float32 copy
+_BLOCK_ROWS = 65536
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class QuantizedVectorIndex:
+    """Coarse search over quantized vectors, exact rescoring over a float32 memmap"""
+
+    def __init__(
+        self,
+        mode: str,
+        codes: np.ndarray,
+        full_vectors: np.ndarray,
+        metric: str = "l2",
+        scale: Optional[np.ndarray] = None,
+        norms: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize index (use build() or load() instead of calling directly)
+
+        Args:
+            mode: 'fp16', 'int8' or 'binary'
+            codes: Quantized vectors kept in RAM
+            full_vectors: Full-precision vectors (usually a read-only memmap)
+            metric: 'l2' (squared distance, smaller is better) or 'ip' (inner product)
+            scale: Per-dimension int8 scale factors
+            norms: Squared norms of the full vectors, used for coarse L2 ranking
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}. Use one of {QUANTIZATION_MODES}")
+        if metric not in ("l2", "ip"):
+            raise ValueError(f"Unknown metric: {metric}")
+
+        self.mode = mode
+        self.metric = metric
+        self.codes = codes
+        self.full_vectors = full_vectors
+        self.scale = scale
+        self.norms = norms
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.full_vectors.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.full_vectors.shape[1])
+
+    @property
+    def memory_bytes(self) -> int:
+        """RAM held by the coarse index (the float32 vectors stay on disk)"""
+        extra = sum(a.nbytes for a in (self.scale, self.norms) if a is not None)
+        return int(self.codes.nbytes + extra)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        mode: str,
+        index_dir: Path,
+        metric: str = "l2"
+    ) -> "QuantizedVectorIndex":
+        """
+        Quantize vectors and write full-precision copy plus codes to index_dir
+
+        Args:
+            vectors: (n, dim) float32 embeddings in index order
+            mode: 'fp16', 'int8' or 'binary'
+            index_dir: Directory to store the quantized index in
+            metric: 'l2' or 'ip'
+
+        Returns:
+            QuantizedVectorIndex backed by the files written
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}. Use one of {QUANTIZATION_MODES}")
+
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        scale = None
+        if mode == "fp16":
+            codes = vectors.astype(np.float16)
+        elif mode == "int8":
+            scale = np.abs(vectors).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+        else:
+            codes = np.packbits(vectors > 0, axis=1)
+
+        np.save(index_dir / FULL_PRECISION_FILE, vectors)
+        np.save(index_dir / CODES_FILE, codes)
+        params = {"mode": mode, "metric": metric, "dim": int(vectors.shape[1])}
+        if scale is not None:
+            params["scale"] = scale.tolist()
+        with open(index_dir / PARAMS_FILE, "w") as f:
+            json.dump(params, f)
+
+        return cls.load(index_dir)
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "QuantizedVectorIndex":
+        """Load codes into RAM and memory-map the full-precision vectors"""
+        index_dir = Path(index_dir)
+        with open(index_dir / PARAMS_FILE, "r") as f:
+            params = json.load(f)
+
+        full_vectors = np.load(index_dir / FULL_PRECISION_FILE, mmap_mode="r")
+        codes = np.load(index_dir / CODES_FILE)
+        scale = np.asarray(params["scale"], dtype=np.float32) if "scale" in params else None
+        norms = None
+        if params["metric"] == "l2":
+            norms = np.empty(full_vectors.shape[0], dtype=np.float32)
+            for start in range(0, full_vectors.shape[0], _BLOCK_ROWS):
+                block = np.asarray(full_vectors[start:start + _BLOCK_ROWS])
+                norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+
+        return cls(params["mode"], codes, full_vectors, params["metric"], scale, norms)
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        return (Path(index_dir) / PARAMS_FILE).exists()
+
+    def _coarse_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate scores for every vector, higher is better"""
+        n = self.ntotal
+        scores = np.empty(n, dtype=np.float32)
+
+        if self.mode == "binary":
+            query_bits = np.packbits(query > 0)
+            for start in range(0, n, _BLOCK_ROWS):
+                block = self.codes[start:start + _BLOCK_ROWS]
+                hamming = _POPCOUNT[np.bitwise_xor(block, query_bits)].sum(axis=1, dtype=np.int32)
+                scores[start:start + len(block)] = -hamming
+            return scores
+
+        weighted = query * self.scale if self.mode == "int8" else query
+        for start in range(0, n, _BLOCK_ROWS):
+            block = self.codes[start:start + _BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ weighted
+
+        if self.metric == "l2":
+            # argmin |x - q|^2 == argmax 2 x.q - |x|^2
+            scores = 2 * scores - self.norms
+        return scores
+
+    def search(self, query: np.ndarray, k: int, rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Two-stage search: coarse over codes, exact over the top candidates
+
+        Args:
+            query: (dim,) float32 query vector
+            k: Number of results
+            rescore_factor: Candidates rescored per requested result
+
+        Returns:
+            Tuple of (ids, scores) ordered best first. Scores are squared L2
+            distances for metric 'l2' and inner products for metric 'ip'.
+        """
+        n = self.ntotal
+        if n == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        k = min(k, n)
+        num_candidates = min(n, max(k, k * rescore_factor))
+
+        coarse = self._coarse_scores(query)
+        if num_candidates < n:
+            candidates = np.argpartition(-coarse, num_candidates - 1)[:num_candidates]
+        else:
+            candidates = np.arange(n)
+        candidates.sort()  # sequential reads from the memmap
+
+        exact_vectors = np.asarray(self.full_vectors[candidates], dtype=np.float32)
+        if self.metric == "ip":
+            exact = exact_vectors @ query
+            order = np.argsort(-exact)[:k]
+        else:
+            diff = exact_vectors - query
+            exact = np.einsum("ij,ij->i", diff, diff)
+            order = np.argsort(exact)[:k]
+
+        return candidates[order].astype(np.int64), exact[order].astype(np.float32)
@@ -0,0 +1,177 @@
+"""
+Semantic Query Cache for RAG MCP Server
+Answers paraphrases of recent queries from cache: incoming query embeddings are
+matched against the normalized embeddings of cached queries, scoped per
+document and query options, with TTL and LRU eviction and per-document
+invalidation
+"""
+
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedQuery:
+    """One cached result and the index version it was computed against"""
+    query: str
+    document: str
+    options: Hashable
+    version: Any
+    result: Dict[str, Any]
+    expires: float
+
+
+class SemanticQueryCache:
+    """
+    Bounded cache of query results looked up by embedding similarity.
+
+    Query vectors live in one preallocated (max_entries, dim) matrix; a
+    lookup scores the slots of its (document, options) scope with a single
+    matrix-vector product, which for a few thousand entries is cheaper than
+    maintaining an approximate index. Entries expire after ttl_seconds, the
+    least recently used entry is evicted when the cache is full, and entries
+    for an older index version are never returned.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 600.0,
+        threshold: float = 0.95,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Cached queries kept before LRU eviction
+            ttl_seconds: Lifetime of an entry
+            threshold: Minimum cosine similarity between queries for a hit
+            clock: Time source (seconds)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, CachedQuery]" = OrderedDict()  # slot -> entry, least recent first
+        self._scopes: Dict[Tuple[str, Hashable], List[int]] = {}
+        self._free: List[int] = list(range(max_entries - 1, -1, -1))
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, slot: int, reason: str) -> None:
+        entry = self._entries.pop(slot)
+        scope = self._scopes[(entry.document, entry.options)]
+        scope.remove(slot)
+        if not scope:
+            del self._scopes[(entry.document, entry.options)]
+        self._free.append(slot)
+        self._stats[reason] += 1
+
+    def lookup(
+        self,
+        document: str,
+        options: Hashable,
+        version: Any,
+        query_vector: np.ndarray
+    ) -> Optional[Tuple[CachedQuery, float]]:
+        """
+        Most similar cached query in the same scope, if it clears the threshold
+
+        Args:
+            document: Document the query ran against
+            options: Hashable query options that change the result (top_k, ...)
+            version: Current index version of the document
+            query_vector: Normalized (dim,) embedding of the incoming query
+
+        Returns:
+            (entry, similarity) on a hit, else None
+        """
+        with self._lock:
+            slots = list(self._scopes.get((document, options), ()))
+            now = self._clock()
+            for slot in slots:
+                entry = self._entries[slot]
+                if entry.expires <= now:
+                    self._drop(slot, "expirations")
+                elif entry.version != version:
+                    self._drop(slot, "invalidations")
+            slots = self._scopes.get((document, options))
+            if not slots or self._vectors.shape[1] != len(query_vector):
+                self._stats["misses"] += 1
+                return None
+
+            similarities = self._vectors[slots] @ query_vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            slot = slots[best]
+            self._entries.move_to_end(slot)
+            self._stats["hits"] += 1
+            return self._entries[slot], float(similarities[best])
+
+    def store(
+        self,
+        document: str,
+        options: Hashable,
+        version: Any,
+        query: str,
+        query_vector: np.ndarray,
+        result: Dict[str, Any]
+    ) -> None:
+        """Cache a result, evicting expired entries first and then the least recently used"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != len(query_vector):
+                for slot in list(self._entries):
+                    self._drop(slot, "evictions")
+                self._vectors = np.zeros((self.max_entries, len(query_vector)), dtype=np.float32)
+
+            now = self._clock()
+            for slot in [slot for slot, entry in self._entries.items() if entry.expires <= now]:
+                self._drop(slot, "expirations")
+            if not self._free:
+                self._drop(next(iter(self._entries)), "evictions")
+
+            slot = self._free.pop()
+            self._vectors[slot] = query_vector
+            self._entries[slot] = CachedQuery(query, document, options, version, result, now + self.ttl_seconds)
+            self._scopes.setdefault((document, options), []).append(slot)
+
+    def invalidate(self, document: str) -> int:
+        """Drop every entry for a document; returns how many were dropped"""
+        with self._lock:
+            slots = [slot for slot, entry in self._entries.items() if entry.document == document]
+            for slot in slots:
+                self._drop(slot, "invalidations")
+        return len(slots)
+
+    def clear(self) -> None:
+        with self._lock:
+            for slot in list(self._entries):
+                self._drop(slot, "invalidations")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+            }
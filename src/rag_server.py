@@ -5,59 +5,657 @@ Uses: LangChain + FAISS + Pytesseract + Tabula
 """
 
 import os
+import re
 import json
 import sys
+import time
+import functools
+from dataclasses import asdict
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
+# Project root, for the settings in config/config.py
+sys.path.insert(1, str(Path(__file__).parent.parent))
 
-from mcp.server.fastmcp import FastMCP
-import fitz  # PyMuPDF
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings  # Updated from deprecated langchain_community
-from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
+# Heavy dependencies (the MCP SDK, PyMuPDF, LangChain, FAISS, torch via the
+# embedding backends) are imported where they are first needed, so starting
+# the server or running a cheap CLI command does not pay for them.
 import logging
-from comparison_engine import ComparisonEngine
+import numpy as np
+from comparison_engine import ComparisonEngine, SpecificationParser
+from compliance_matrix import ComplianceMatrix
+from report_writers import REPORT_FORMATS
+from dedup import ChunkDeduplicator, DedupChunk, strip_page_furniture
+from quantization import QuantizedVectorIndex
+from embedding_batcher import LengthBucketedBatcher, StageStats
+from metrics import MetricsRegistry, current_rss_bytes, peak_rss_bytes, start_metrics_server
+from index_sync import (
+    IndexCoordinator, load_vector_store, migrate_vector_store, stage_vector_store, install_staged_store,
+    staging_path, fsync_path, has_current_format, write_store_format
+)
+from similarity import SIMILARITY_METRIC, normalize_rows, cosine_index, reconstruct_all
+from index_wal import IndexWriteAheadLog, stage_json, retire_store
+from corpus_index import CorpusIndex
+from chunking import (
+    FastTextSplitter, StructureAwareChunker, sections_from_content, provenance_table, neighbor_window,
+    TEXT_BLOB_FILE, PROVENANCE_FILE
+)
+from reranker import CrossEncoderReranker, rerank_order
+from diversity import DIVERSITY_MODES, diversify
+from query_cache import SemanticQueryCache
+from context_builder import ContextHit, ContextPassage, merge_hits, pack_passages, context_stats
+from snapshot import SnapshotDocument, write_snapshot, unpack_snapshot, read_snapshot_document, remove_staging
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize MCP server
-mcp = FastMCP("RAG Multi-Format Document Server")
+# Settings: config/config.py is the single source of truth; the environment
+# overrides the ones that differ per deployment or worker process
+from config.config import (
+    SERVER_NAME,
+    CHUNK_SIZE, CHUNK_OVERLAP,
+    DEDUP_ENABLED, DEDUP_NEAR_THRESHOLD, DEDUP_DROP_NEAR_DUPLICATES,
+    EMBEDDING_MODEL, EMBEDDING_DIM, EMBEDDING_BACKEND, EMBEDDING_MAX_BATCH_TOKENS,
+    ONNX_QUANTIZE_INT8, ONNX_INTRA_OP_THREADS, ONNX_INTER_OP_THREADS,
+    EMBEDDING_WORKERS, EMBEDDING_THREADS_PER_WORKER,
+    EMBEDDING_QUANTIZATION, QUANTIZATION_RESCORE_FACTOR,
+    CORPUS_INDEX_ENABLED, CORPUS_COMPACTION_THRESHOLD, CORPUS_COMPACTION_INTERVAL,
+    CORPUS_MEMTABLE_MAX_ROWS, CORPUS_FLUSH_INTERVAL, CORPUS_MERGE_FACTOR,
+    RERANK_ENABLED, RERANK_MODEL, RERANK_BACKEND, RERANK_CANDIDATES,
+    RERANK_TIME_BUDGET_MS, RERANK_BATCH_SIZE, RERANK_THREADS,
+    DIVERSITY_MODE, DIVERSITY_CANDIDATES, MMR_LAMBDA, CLUSTER_THRESHOLD,
+    QUERY_CACHE_ENABLED, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS, QUERY_CACHE_THRESHOLD,
+    REPORT_INLINE_MAX_ITEMS
+)
+from config import config as settings
+
+# MCP server, built on first access (see get_mcp)
+_mcp = None
+_tools = []
+
+
+# Per-tool/per-stage metrics (get_server_metrics tool, optional Prometheus endpoint)
+METRICS_HOST = os.environ.get("RAG_METRICS_HOST", settings.METRICS_HOST)
+METRICS_PORT = int(os.environ.get("RAG_METRICS_PORT", settings.METRICS_PORT))  # 0 disables the HTTP endpoint
+server_metrics = MetricsRegistry(namespace="rag")
+
+
+# HTTP deployment (main.py --transport http); with several workers each one
+# follows the index manifest so writes made by another worker become visible
+HTTP_HOST = os.environ.get("RAG_HTTP_HOST", settings.HTTP_HOST)
+HTTP_PORT = int(os.environ.get("RAG_HTTP_PORT", settings.HTTP_PORT))
+INDEX_SYNC_ENABLED = os.environ.get("RAG_INDEX_SYNC", "0") == "1"
+
+
+def _with_index_sync(func):
+    """Refresh indexes published by other workers before running a tool"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sync_indexes()
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def tool(func):
+    """Register an instrumented function as an MCP tool; registration happens when the server is built"""
+    func = server_metrics.instrument(_with_index_sync(func))
+    _tools.append(func)
+    if _mcp is not None:
+        _mcp.add_tool(func)
+    return func
+
+
+def get_mcp():
+    """Build the FastMCP server and register all tools"""
+    global _mcp
+    
+    if _mcp is None:
+        from mcp.server.fastmcp import FastMCP
+        
+        _mcp = FastMCP(SERVER_NAME, host=HTTP_HOST, port=HTTP_PORT)
+        for func in _tools:
+            _mcp.add_tool(func)
+    return _mcp
+
 
-# Configuration
+def __getattr__(name: str):
+    # Keeps `from src.rag_server import mcp` working without importing the SDK eagerly
+    if name == "mcp":
+        return get_mcp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Data directories (DATA_DIR from the environment, else config/config.py under the project root)
 BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR / "data"
-VECTOR_STORE_DIR = DATA_DIR / "vector_stores"
-DOCUMENT_CACHE_DIR = DATA_DIR / "document_cache"
-METADATA_DIR = DATA_DIR / "metadata"
+DATA_DIR = Path(os.environ.get("DATA_DIR", BASE_DIR / settings.DATA_DIR))
+VECTOR_STORE_DIR = DATA_DIR / settings.VECTOR_STORE_DIR
+DOCUMENT_CACHE_DIR = DATA_DIR / settings.DOCUMENT_CACHE_DIR
+METADATA_DIR = DATA_DIR / settings.METADATA_DIR
+SNAPSHOT_DIR = DATA_DIR / settings.SNAPSHOT_DIR
+COMPLIANCE_MATRIX_DIR = DATA_DIR / settings.COMPLIANCE_MATRIX_DIR
+REPORT_DIR = DATA_DIR / settings.REPORT_DIR
+CORPUS_INDEX_DIR = DATA_DIR / settings.CORPUS_INDEX_DIR
+ONNX_CACHE_DIR = DATA_DIR / settings.ONNX_CACHE_DIR
 
 # Create directories
-for dir_path in [DATA_DIR, VECTOR_STORE_DIR, DOCUMENT_CACHE_DIR, METADATA_DIR]:
+for dir_path in [DATA_DIR, VECTOR_STORE_DIR, DOCUMENT_CACHE_DIR, METADATA_DIR, SNAPSHOT_DIR, COMPLIANCE_MATRIX_DIR, REPORT_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
 # In-memory storage
+_embeddings = None
+_reranker = None
 loaded_documents = {}
 vector_stores = {}
 documents_metadata = {}
 
+# Corpus-wide chunk fingerprints for ingest-time deduplication
+chunk_deduplicator = ChunkDeduplicator(
+    near_threshold=DEDUP_NEAR_THRESHOLD,
+    vector_bytes=EMBEDDING_DIM * 4,
+    drop_near_duplicates=DEDUP_DROP_NEAR_DUPLICATES
+)
+
+# Single-writer coordination and version notifications across worker processes
+index_coordinator = IndexCoordinator(DATA_DIR, VECTOR_STORE_DIR)
+
+# Recent rag_query results, invalidated whenever a document is (re)loaded or removed
+query_cache = SemanticQueryCache(QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS, QUERY_CACHE_THRESHOLD)
+
+# Ingest/delete operation log, replayed or rolled back by recover_indexes()
+index_wal = IndexWriteAheadLog(DATA_DIR, index_coordinator)
+
+# Shared corpus index, opened on first use (see get_corpus_index)
+_corpus_index = None
+
 # Initialize comparison engine (pass rag_query function)
 comparison_engine = None  # Will be initialized after rag_query is defined
 
 
+def get_corpus_index() -> CorpusIndex:
+    """Open the shared corpus index and start its background flush/merge/compaction"""
+    global _corpus_index
+    
+    if _corpus_index is None:
+        import atexit
+        
+        _corpus_index = CorpusIndex(
+            CORPUS_INDEX_DIR,
+            writer=index_coordinator.writer,
+            compaction_threshold=CORPUS_COMPACTION_THRESHOLD,
+            # Worker processes only see each other's chunks once they are on disk
+            memtable_max_rows=0 if INDEX_SYNC_ENABLED else CORPUS_MEMTABLE_MAX_ROWS,
+            flush_interval=CORPUS_FLUSH_INTERVAL,
+            merge_factor=CORPUS_MERGE_FACTOR
+        ).open()
+        _reconcile_corpus_index(_corpus_index)
+        _corpus_index.start_background_maintenance(CORPUS_COMPACTION_INTERVAL)
+        atexit.register(_corpus_index.close)
+    return _corpus_index
+
+
+def _reconcile_corpus_index(corpus_index: CorpusIndex) -> None:
+    """
+    Bring the corpus index in line with the published per-document stores.
+    
+    Memtable rows are not durable, so documents whose latest version was
+    lost in a crash are re-added here from their stores.
+    """
+    with index_coordinator.writer():
+        published = index_coordinator.read_manifest().get("documents", {})
+        indexed = corpus_index.documents()
+        for document_name in set(indexed) - set(published):
+            corpus_index.delete_document(document_name)
+        for document_name, entry in published.items():
+            if indexed.get(document_name, {}).get("version") == entry["version"]:
+                continue
+            try:
+                vector_store = load_vector_store(entry["store_path"], get_embeddings())
+                corpus_index.add_document(document_name, *_corpus_rows(vector_store), version=entry["version"])
+            except Exception as e:
+                logger.error(f"Could not add {document_name} to the corpus index: {e}")
+
+
+def _vector_store_bytes() -> int:
+    """RAM held by loaded vector indexes"""
+    total = 0
+    for entry in list(vector_stores.values()):
+        quantized = entry.get("quantized_index")
+        if quantized is not None:
+            total += quantized.memory_bytes
+        else:
+            index = entry["vector_store"].index
+            total += index.ntotal * index.d * 4
+    return total
+
+
+server_metrics.gauge("process_resident_memory_bytes", current_rss_bytes, "Current resident set size")
+server_metrics.gauge("process_peak_resident_memory_bytes", peak_rss_bytes, "Peak resident set size")
+server_metrics.gauge("vector_store_bytes", _vector_store_bytes, "RAM held by loaded vector indexes")
+server_metrics.gauge("documents_indexed", lambda: len(vector_stores), "Documents with a loaded index")
+server_metrics.gauge(
+    "corpus_index_tombstone_ratio",
+    lambda: _corpus_index.stats()["tombstone_ratio"] if _corpus_index is not None else 0.0,
+    "Fraction of corpus index rows that are deleted but not yet compacted"
+)
+server_metrics.describe("tool_calls_total", "MCP tool invocations")
+server_metrics.describe("tool_errors_total", "MCP tool invocations that returned an error")
+server_metrics.describe("tool_duration_seconds", "MCP tool latency")
+server_metrics.describe("stage_duration_seconds", "Latency of one processing stage inside a tool")
+server_metrics.describe("bytes_processed_total", "Bytes handled by a processing stage")
+server_metrics.describe("cache_requests_total", "Cache lookups by result")
+server_metrics.gauge("query_cache_entries", lambda: len(query_cache), "Queries held by the semantic query cache")
+
+
+def start_metrics_endpoint() -> None:
+    """Start the Prometheus /metrics endpoint if RAG_METRICS_PORT is set"""
+    if METRICS_PORT:
+        start_metrics_server(server_metrics, METRICS_HOST, METRICS_PORT)
+
+
 def get_embeddings():
-    """Initialize HuggingFace embeddings"""
-    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    """
+    Return the shared embedding backend selected by EMBEDDING_BACKEND.
+    
+    With EMBEDDING_WORKERS != 1 this is a process pool of model replicas,
+    shared by ingestion, query embedding and the comparison engine.
+    """
+    global _embeddings
+    
+    server_metrics.record_cache("embedding_model", _embeddings is not None)
+    if _embeddings is None:
+        from embedding_backends import create_embedding_backend
+        from embedding_pool import EmbeddingWorkerPool
+        
+        backend_options = {
+            "cache_dir": ONNX_CACHE_DIR,
+            "quantize_int8": ONNX_QUANTIZE_INT8,
+            "intra_op_threads": ONNX_INTRA_OP_THREADS,
+            "inter_op_threads": ONNX_INTER_OP_THREADS,
+            "max_batch_tokens": EMBEDDING_MAX_BATCH_TOKENS
+        }
+        if EMBEDDING_WORKERS == 1:
+            _embeddings = create_embedding_backend(EMBEDDING_BACKEND, EMBEDDING_MODEL, **backend_options)
+        else:
+            _embeddings = EmbeddingWorkerPool(
+                EMBEDDING_BACKEND,
+                EMBEDDING_MODEL,
+                num_workers=EMBEDDING_WORKERS,
+                threads_per_worker=EMBEDDING_THREADS_PER_WORKER,
+                **backend_options
+            )
+        logger.info(f"Embedding backend ready: {_embeddings.describe()}")
+    return _embeddings
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Return the shared cross-encoder, loaded on first use"""
+    global _reranker
+    
+    server_metrics.record_cache("reranker_model", _reranker is not None)
+    if _reranker is None:
+        _reranker = CrossEncoderReranker(
+            RERANK_MODEL,
+            backend=RERANK_BACKEND,
+            batch_size=RERANK_BATCH_SIZE,
+            threads=RERANK_THREADS,
+            cache_dir=ONNX_CACHE_DIR
+        )
+        logger.info(f"Reranker ready: {_reranker.describe()}")
+    return _reranker
+
+
+def attach_quantized_index(entry: dict, build: bool = False, index_dir: Optional[Path] = None) -> None:
+    """
+    Serve a vector store entry from a quantized index.
+
+    The float32 vectors are written next to the FAISS files and memory-mapped
+    for rescoring, so the in-RAM FAISS index is released afterwards. index_dir
+    overrides the location, e.g. to build inside a staged store.
+    """
+    vector_store = entry["vector_store"]
+    index_dir = Path(index_dir or Path(entry["store_path"]) / "quantized")
+
+    if build:
+        quantized = QuantizedVectorIndex.build(
+            reconstruct_all(vector_store.index), EMBEDDING_QUANTIZATION, index_dir, metric="ip"
+        )
+    elif QuantizedVectorIndex.exists(index_dir):
+        quantized = QuantizedVectorIndex.load(index_dir)
+        if quantized.metric != "ip":
+            # Built before normalized scoring; migrate_indexes() rebuilds it
+            logger.info(f"Serving {entry['store_path']} unquantized until its L2 quantized index is migrated")
+            return
+    else:
+        return
+
+    # Swap in an empty index rather than reset(): mapped read-only indexes cannot be cleared
+    import faiss
+    vector_store.index = faiss.IndexFlatIP(vector_store.index.d)
+    entry["quantized_index"] = quantized
+    logger.info(
+        f"Serving {entry['store_path']} from {quantized.mode} index "
+        f"({quantized.memory_bytes} bytes in RAM for {quantized.ntotal} vectors)"
+    )
+
+
+def _commit_document(
+    document_name: str,
+    vector_store,
+    metadata: dict,
+    store_files: Optional[Dict[str, str]] = None
+) -> dict:
+    """
+    Write a document's store and metadata through the write-ahead log.
+
+    Everything is staged and fsynced before the operation is marked prepared,
+    then renamed into place and published; a crash at any point is undone or
+    completed by recover_indexes(). store_files (name -> text) are written
+    into the store directory, so they are versioned with the index.
+
+    Returns:
+        The in-memory vector store entry for the committed version
+    """
+    store_path = VECTOR_STORE_DIR / document_name
+    metadata_file = METADATA_DIR / f"{document_name}_metadata.json"
+    # Open (and reconcile) the corpus index before this version is published
+    corpus_index = get_corpus_index() if CORPUS_INDEX_ENABLED else None
+    
+    with index_wal.operation("ingest", document_name, store_path, metadata_file) as operation:
+        staging = stage_vector_store(vector_store, store_path)
+        for name, text in (store_files or {}).items():
+            with open(staging / name, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+        entry = {
+            "vector_store": vector_store,
+            "store_path": str(store_path),
+            "num_chunks": len(vector_store.index_to_docstore_id)
+        }
+        if corpus_index is not None:
+            # Read the vectors before quantization releases the FAISS index
+            corpus_rows = _corpus_rows(vector_store)
+        if EMBEDDING_QUANTIZATION:
+            attach_quantized_index(entry, build=True, index_dir=staging / "quantized")
+            for path in (staging / "quantized").iterdir():
+                fsync_path(path)
+        stage_json(metadata, metadata_file)
+        operation.prepared()
+        
+        install_staged_store(staging, store_path)
+        os.replace(staging_path(metadata_file), metadata_file)
+        # Notify other workers that a new version is on disk
+        entry["version"] = index_coordinator.publish(document_name, str(store_path))
+        if corpus_index is not None:
+            corpus_index.add_document(document_name, *corpus_rows, version=entry["version"])
+    return entry
+
+
+def _corpus_rows(vector_store) -> Tuple[np.ndarray, List[dict]]:
+    """Vectors and chunk records of a FAISS store, in index order, for the corpus index"""
+    index = vector_store.index
+    vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.empty((0, index.d), dtype=np.float32)
+    records = []
+    for position in range(index.ntotal):
+        doc = vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+        records.append({"chunk_id": doc.metadata.get("chunk_id", position), "text": doc.page_content, "metadata": doc.metadata})
+    return vectors, records
+
+
+def _register_dedup(document_name: str, vector_store) -> None:
+    """Make a loaded document's chunks visible to corpus-wide deduplication"""
+    if DEDUP_ENABLED and hasattr(vector_store.docstore, '_dict'):
+        chunk_deduplicator.register_document(document_name, {
+            doc.metadata.get("chunk_id", idx): doc.page_content
+            for idx, doc in enumerate(vector_store.docstore._dict.values())
+        })
+
+
+def recover_indexes() -> dict:
+    """
+    Replay or roll back ingest/delete operations interrupted by a crash.
+
+    Call once at startup, before serving; cost is bounded by the length of
+    the write-ahead log, not the corpus size.
+    """
+    return index_wal.recover(VECTOR_STORE_DIR, METADATA_DIR)
+
+
+def migrate_indexes() -> dict:
+    """
+    Convert stores saved before normalized scoring to cosine similarity.
+
+    Each flat L2 index is rewritten in place as an inner-product index over
+    its re-normalized vectors (no re-embedding) and its quantized index is
+    rebuilt from them. Migrated documents are published, so other workers
+    reload them and the corpus index re-adds their vectors. Checked stores
+    get a STORE_FORMAT_FILE marker (new stores are written with one), so at
+    startup stores already migrated cost one small file read and their
+    indexes are never opened.
+    """
+    import shutil
+
+    migrated = []
+    if not VECTOR_STORE_DIR.exists():
+        return {"migrated": migrated}
+    with index_coordinator.writer():
+        published = index_coordinator.read_manifest().get("documents", {})
+        for store_path in sorted(VECTOR_STORE_DIR.iterdir()):
+            if store_path.name.startswith(".") or not (store_path / "index.faiss").exists():
+                continue
+            if has_current_format(store_path):
+                continue
+            try:
+                changed = migrate_vector_store(store_path)
+                quantized_dir = store_path / "quantized"
+                if QuantizedVectorIndex.exists(quantized_dir):
+                    quantized = QuantizedVectorIndex.load(quantized_dir)
+                    if quantized.metric != "ip":
+                        import faiss
+                        vectors = reconstruct_all(faiss.read_index(str(store_path / "index.faiss")))
+                        staging = staging_path(quantized_dir)
+                        shutil.rmtree(staging, ignore_errors=True)
+                        QuantizedVectorIndex.build(vectors, quantized.mode, staging, metric="ip")
+                        for path in staging.iterdir():
+                            fsync_path(path)
+                        install_staged_store(staging, quantized_dir)
+                        changed = True
+                write_store_format(store_path)
+                if not changed:
+                    continue
+                if store_path.name in published:
+                    index_coordinator.publish(store_path.name, published[store_path.name]["store_path"])
+                migrated.append(store_path.name)
+            except Exception as e:
+                logger.error(f"Could not migrate {store_path} to normalized scoring: {e}")
+    if migrated:
+        logger.info(f"Migrated {len(migrated)} store(s) to cosine similarity: {migrated}")
+    return {"migrated": migrated}
+
+
+def _search_document(
+    document_name: str,
+    query: str,
+    top_k: int,
+    query_vector: Optional[np.ndarray] = None
+) -> List[Tuple["Document", float, int]]:
+    """Search one document's index, returning (chunk, cosine similarity, index position) best first"""
+    entry = vector_stores[document_name]
+    vector_store = entry["vector_store"]
+    quantized = entry.get("quantized_index")
+    if query_vector is None:
+        query_vector = vector_store.embedding_function.embed_query(query)
+    query_vector = normalize_rows(query_vector)
+
+    if quantized is None:
+        similarities, ids = vector_store.index.search(query_vector, top_k)
+        similarities, ids = similarities[0], ids[0]
+    else:
+        ids, similarities = quantized.search(query_vector[0], top_k, rescore_factor=QUANTIZATION_RESCORE_FACTOR)
+    return [
+        (vector_store.docstore.search(vector_store.index_to_docstore_id[int(i)]), float(s), int(i))
+        for i, s in zip(ids, similarities) if i >= 0
+    ]
+
+
+def _chunk_vectors(document_name: str, positions: List[int]) -> np.ndarray:
+    """Stored (normalized) vectors of a document's chunks by index position"""
+    entry = vector_stores[document_name]
+    quantized = entry.get("quantized_index")
+    if quantized is not None:
+        return np.asarray(quantized.full_vectors[positions], dtype=np.float32)
+    return entry["vector_store"].index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+
+
+def _rerank_enabled(rerank: Optional[bool]) -> bool:
+    return RERANK_ENABLED if rerank is None else rerank
+
+
+def _diversity_mode(diversity: Optional[str]) -> str:
+    mode = DIVERSITY_MODE if diversity is None else diversity
+    if mode not in DIVERSITY_MODES:
+        raise ValueError(f"Unknown diversity mode: {mode}. Available: {list(DIVERSITY_MODES)}")
+    return mode
+
+
+def _search_many(
+    requests: List[Tuple[str, str]],
+    top_k: int,
+    rerank: Optional[bool] = None,
+    tool: str = "search",
+    diversity: Optional[str] = None,
+    query_vectors: Optional[List[np.ndarray]] = None
+) -> List[List[Tuple["Document", float, float]]]:
+    """
+    Search several (document, query) pairs, reranking all their candidates together.
+    
+    With a diversity mode the candidates are then re-selected by MMR or
+    near-duplicate clustering over their stored vectors; when reranking ran
+    out of time only the rescored candidates take part. query_vectors, when
+    given, are the already computed query embeddings of the pairs.
+    
+    Returns:
+        Per pair, (chunk, score, bi-encoder similarity) best first. score is the
+        cross-encoder probability for reranked candidates, else the similarity.
+    """
+    use_rerank = _rerank_enabled(rerank)
+    mode = _diversity_mode(diversity)
+    fetch = top_k
+    if use_rerank:
+        fetch = max(fetch, RERANK_CANDIDATES)
+    if mode != "none":
+        # Room to skip near-duplicates even for large top_k
+        fetch = max(fetch, DIVERSITY_CANDIDATES, 2 * top_k)
+    retrieved = [
+        _search_document(name, query, fetch, vector)
+        for (name, query), vector in zip(requests, query_vectors or [None] * len(requests))
+    ]
+    
+    # Per pair: (chunk, score, similarity, position) best first, and how many lead with a comparable score
+    ranked = [[(doc, similarity, similarity, position) for doc, similarity, position in hits] for hits in retrieved]
+    comparable = [len(hits) for hits in retrieved]
+    if use_rerank:
+        candidates = [[doc.page_content for doc, _, _ in hits] for hits in retrieved]
+        with server_metrics.stage(tool, "rerank", sum(len(t.encode("utf-8")) for texts in candidates for t in texts)):
+            scores = get_reranker().rerank(
+                [query for _, query in requests],
+                candidates,
+                time_budget=RERANK_TIME_BUDGET_MS / 1000
+            )
+        for i, (hits, rerank_scores) in enumerate(zip(retrieved, scores)):
+            skipped = int(np.isnan(rerank_scores).sum())
+            server_metrics.inc("rerank_pairs_total", len(rerank_scores) - skipped, result="scored")
+            server_metrics.inc("rerank_pairs_total", skipped, result="over_budget")
+            ranked[i] = [
+                (hits[j][0], hits[j][1] if np.isnan(rerank_scores[j]) else float(rerank_scores[j]), hits[j][1], hits[j][2])
+                for j in rerank_order(rerank_scores)
+            ]
+            comparable[i] = len(rerank_scores) - skipped
+    
+    if mode != "none":
+        with server_metrics.stage(tool, "diversity"):
+            for i, ((name, _), hits) in enumerate(zip(requests, ranked)):
+                head = hits[:comparable[i]]
+                if len(head) < 2:
+                    continue
+                keep = diversify(
+                    mode,
+                    np.array([score for _, score, _, _ in head], dtype=np.float32),
+                    _chunk_vectors(name, [position for _, _, _, position in head]),
+                    min(top_k, len(head)),
+                    lambda_mult=MMR_LAMBDA,
+                    threshold=CLUSTER_THRESHOLD
+                )
+                ranked[i] = [head[j] for j in keep] + hits[len(head):]
+    
+    return [[(doc, score, similarity) for doc, score, similarity, _ in hits[:top_k]] for hits in ranked]
+
+
+def _query_result(
+    document_name: str,
+    query: str,
+    hits: List[Tuple["Document", float, float]],
+    reranked: bool,
+    diversity: str = "none"
+) -> dict:
+    """rag_query response for one document's hits"""
+    return {
+        "document_name": document_name,
+        "query": query,
+        "num_results": len(hits),
+        "reranked": reranked,
+        "diversity": diversity,
+        "results": [
+            {
+                "chunk_id": doc.metadata.get("chunk_id", "unknown"),
+                "similarity_score": score,
+                **({"retrieval_score": similarity} if reranked else {}),
+                "content": doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content,
+                "full_content": doc.page_content,
+                **_provenance_fields(doc.metadata)
+            }
+            for doc, score, similarity in hits
+        ]
+    }
+
+
+def _query_many(
+    document_name: str,
+    queries: List[str],
+    top_k: int = 5,
+    rerank: Optional[bool] = None,
+    tool: str = "compare",
+    diversity: Optional[str] = None
+) -> List[dict]:
+    """rag_query responses for several queries on one document, reranked in one pass"""
+    if document_name not in vector_stores:
+        return [{"error": f"Document '{document_name}' is not indexed"} for _ in queries]
+    
+    try:
+        with server_metrics.stage(tool, "search", sum(len(q.encode("utf-8")) for q in queries)):
+            hits = _search_many([(document_name, query) for query in queries], top_k, rerank, tool, diversity)
+        return [
+            _query_result(document_name, query, h, _rerank_enabled(rerank), _diversity_mode(diversity))
+            for query, h in zip(queries, hits)
+        ]
+    
+    except Exception as e:
+        logger.error(f"Error querying document: {e}")
+        return [{"error": str(e)} for _ in queries]
 
 
 def extract_pdf_content(file_path: str) -> dict:
     """Extract text and metadata from PDF using PyMuPDF"""
     try:
-        pdf_content = {"text": "", "pages": [], "tables": [], "images": []}
+        import fitz  # PyMuPDF
+        
+        pdf_content = {"text": "", "pages": [], "tables": [], "images": [], "sections": []}
 
         # Open PDF with PyMuPDF
         doc = fitz.open(file_path)
@@ -70,16 +668,22 @@ def extract_pdf_content(file_path: str) -> dict:
         }
 
         # Extract text from each page
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            page_text = page.get_text()
+        page_texts = [doc[page_num].get_text() for page_num in range(len(doc))]
+        doc.close()
+
+        # Strip headers/footers repeated on most pages
+        if DEDUP_ENABLED:
+            page_texts, furniture = strip_page_furniture(page_texts)
+            pdf_content["furniture_lines"] = furniture
+
+        for page_num, page_text in enumerate(page_texts):
             pdf_content["pages"].append({
                 "page_num": page_num + 1,
                 "text": page_text
             })
             pdf_content["text"] += f"\n--- Page {page_num + 1} ---\n{page_text}"
+            pdf_content["sections"].append({"kind": "page", "label": page_num + 1, "text": page_text})
 
-        doc.close()
         return pdf_content
     except Exception as e:
         logger.error(f"Error extracting PDF: {e}")
@@ -91,7 +695,7 @@ def extract_excel_content(file_path: str) -> dict:
     try:
         import openpyxl
         
-        excel_content = {"text": "", "sheets": [], "tables": []}
+        excel_content = {"text": "", "sheets": [], "tables": [], "sections": []}
         
         workbook = openpyxl.load_workbook(file_path)
         excel_content["metadata"] = {
@@ -105,12 +709,18 @@ def extract_excel_content(file_path: str) -> dict:
         for sheet_name in workbook.sheetnames:
             sheet = workbook[sheet_name]
             sheet_text = f"\n--- Sheet: {sheet_name} ---\n"
+            sheet_rows = []
             sheet_data = []
             
             for row in sheet.iter_rows(values_only=True):
                 row_data = [str(cell) if cell is not None else "" for cell in row]
+                # Header rows repeated further down the sheet only add noise to the index
+                if DEDUP_ENABLED and sheet_data and any(row_data) and row_data == sheet_data[0]:
+                    sheet_data.append(row_data)
+                    continue
                 sheet_data.append(row_data)
-                sheet_text += " | ".join(row_data) + "\n"
+                sheet_rows.append(" | ".join(row_data))
+                sheet_text += sheet_rows[-1] + "\n"
             
             excel_content["sheets"].append({
                 "name": sheet_name,
@@ -122,6 +732,7 @@ def extract_excel_content(file_path: str) -> dict:
                 "data": sheet_data
             })
             excel_content["text"] += sheet_text
+            excel_content["sections"].append({"kind": "sheet", "label": sheet_name, "text": "\n".join(sheet_rows)})
         
         return excel_content
     except Exception as e:
@@ -134,7 +745,7 @@ def extract_word_content(file_path: str) -> dict:
     try:
         from docx import Document as DocxDocument
         
-        word_content = {"text": "", "paragraphs": [], "tables": []}
+        word_content = {"text": "", "paragraphs": [], "tables": [], "sections": []}
         
         doc = DocxDocument(file_path)
         word_content["metadata"] = {
@@ -153,16 +764,19 @@ def extract_word_content(file_path: str) -> dict:
                 "text": para_text
             })
             word_content["text"] += para_text + "\n"
+        word_content["sections"].append({"kind": "text", "label": None, "text": word_content["text"]})
         
         # Extract tables
         for table_idx, table in enumerate(doc.tables):
             table_data = []
             table_text = f"\n--- Table {table_idx + 1} ---\n"
+            table_rows = []
             
             for row in table.rows:
                 row_data = [cell.text for cell in row.cells]
                 table_data.append(row_data)
-                table_text += " | ".join(row_data) + "\n"
+                table_rows.append(" | ".join(row_data))
+                table_text += table_rows[-1] + "\n"
             
             word_content["tables"].append({
                 "index": table_idx,
@@ -170,6 +784,7 @@ def extract_word_content(file_path: str) -> dict:
                 "text": table_text
             })
             word_content["text"] += table_text
+            word_content["sections"].append({"kind": "table", "label": table_idx + 1, "text": "\n".join(table_rows)})
         
         return word_content
     except Exception as e:
@@ -220,7 +835,7 @@ def detect_file_type(file_path: str) -> str:
         raise ValueError(f"Unsupported file type: {ext}")
 
 
-@mcp.tool()
+@tool
 def ingest_document(file_path: str, document_name: str) -> dict:
     """
     Ingest and process document (PDF, Excel, Word, Image with OCR).
@@ -237,7 +852,18 @@ def ingest_document(file_path: str, document_name: str) -> dict:
         FileNotFoundError: If file does not exist
         ValueError: If file type is unsupported or file is too large
     """
+    # One writer at a time across all worker processes sharing DATA_DIR
+    with index_coordinator.writer():
+        return _ingest_document(file_path, document_name)
+
+
+def _ingest_document(file_path: str, document_name: str) -> dict:
+    """Ingest a document; caller holds the index writer lock"""
     try:
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.vectorstores.utils import DistanceStrategy
+        from langchain_core.documents import Document
+        
         # Validate file exists
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
@@ -249,6 +875,8 @@ def ingest_document(file_path: str, document_name: str) -> dict:
 
         file_type = detect_file_type(file_path)
         logger.info(f"Processing {file_type} file: {file_path}")
+        stages = []
+        stage_start = time.perf_counter()
         
         # Extract content based on file type
         if file_type == "pdf":
@@ -262,37 +890,69 @@ def ingest_document(file_path: str, document_name: str) -> dict:
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
         
-        # Create text chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        content_tokens = len(document_content["text"]) // 4
+        stages.append(StageStats("extraction", time.perf_counter() - stage_start, 1, content_tokens))
+        stage_start = time.perf_counter()
         
-        chunks = text_splitter.split_text(document_content["text"])
+        # Create text chunks page by page (sheet, table), recording where each one sits
+        text_splitter = FastTextSplitter(CHUNK_SIZE, CHUNK_OVERLAP, separators=["\n\n", "\n", " ", ""])
+        sections = sections_from_content(document_content)
+        text_blob, spans = StructureAwareChunker(text_splitter).split(sections)
+        chunks = [span.text for span in spans]
+        stages.append(StageStats("splitting", time.perf_counter() - stage_start, len(chunks), content_tokens))
         
-        # Create Document objects with metadata
-        documents = [
-            Document(
-                page_content=chunk,
-                metadata={
-                    "document_name": document_name,
-                    "file_type": file_type,
-                    "chunk_id": i,
-                    "file_path": file_path,
-                    "source": os.path.basename(file_path)
-                }
+        # Store duplicate chunks once, keeping back-references on the survivor
+        if DEDUP_ENABLED:
+            kept_chunks, dedup_report = chunk_deduplicator.deduplicate(
+                document_name,
+                chunks,
+                document_content.get("furniture_lines")
             )
-            for i, chunk in enumerate(chunks)
-        ]
+        else:
+            kept_chunks, dedup_report = [DedupChunk(chunk_id=i, text=c) for i, c in enumerate(chunks)], None
         
-        # Create FAISS vector store
+        # Create Document objects with metadata
+        documents = []
+        for chunk in kept_chunks:
+            chunk_metadata = {
+                "document_name": document_name,
+                "file_type": file_type,
+                "chunk_id": chunk.chunk_id,
+                "file_path": file_path,
+                "source": os.path.basename(file_path),
+                **spans[chunk.chunk_id].provenance(sections)
+            }
+            if chunk.duplicate_chunk_ids:
+                chunk_metadata["duplicate_chunk_ids"] = chunk.duplicate_chunk_ids
+            if chunk.near_duplicate_of is not None:
+                chunk_metadata["near_duplicate_of"] = chunk.near_duplicate_of
+            if chunk.corpus_duplicate_of is not None:
+                chunk_metadata["corpus_duplicate_of"] = asdict(chunk.corpus_duplicate_of)
+            documents.append(Document(page_content=chunk.text, metadata=chunk_metadata))
+        
+        # Embed chunks in length-bucketed batches, then build the FAISS store
         embeddings = get_embeddings()
-        vector_store = FAISS.from_documents(documents, embeddings)
+        texts = [doc.page_content for doc in documents]
+        # A worker pool splits each batch across its replicas, so give it proportionally more
+        replicas = getattr(embeddings, "num_workers", 1)
+        batcher = LengthBucketedBatcher(
+            embeddings,
+            max_batch_tokens=EMBEDDING_MAX_BATCH_TOKENS * replicas,
+            max_batch_size=256 * replicas
+        )
+        vectors, embedding_stages = batcher.embed(texts)
+        stages.extend(embedding_stages)
+        chunk_tokens = embedding_stages[0].tokens
         
-        # Save FAISS index
-        store_path = VECTOR_STORE_DIR / document_name
-        vector_store.save_local(str(store_path))
+        stage_start = time.perf_counter()
+        # Unit vectors under inner product: scores are cosine similarities
+        vector_store = FAISS.from_embeddings(
+            list(zip(texts, normalize_rows(vectors))),
+            embeddings,
+            metadatas=[doc.metadata for doc in documents],
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        stages.append(StageStats("index_build", time.perf_counter() - stage_start, len(documents), chunk_tokens))
         
         # Store metadata
         metadata = {
@@ -300,41 +960,63 @@ def ingest_document(file_path: str, document_name: str) -> dict:
             "file_type": file_type,
             "file_path": file_path,
             "file_name": os.path.basename(file_path),
-            "chunks_created": len(chunks),
+            "chunks_created": len(documents),
             "content_length": len(document_content["text"]),
             **document_content.get("metadata", {})
         }
+        if dedup_report is not None:
+            metadata["deduplication"] = dedup_report.to_dict()
         
-        # Save metadata
+        # Save FAISS index and metadata through the write-ahead log
+        stage_start = time.perf_counter()
+        entry = _commit_document(document_name, vector_store, metadata, {
+            TEXT_BLOB_FILE: text_blob,
+            PROVENANCE_FILE: provenance_table(sections, spans)
+        })
+        store_path = entry["store_path"]
         metadata_file = METADATA_DIR / f"{document_name}_metadata.json"
-        with open(metadata_file, "w") as f:
-            json.dump(metadata, f, indent=2)
+        stages.append(StageStats("save", time.perf_counter() - stage_start, len(documents), chunk_tokens))
+        
+        # Feed stage timings into server metrics
+        stage_bytes = {"extraction": int(file_size_mb * 1024 * 1024), "splitting": len(document_content["text"])}
+        for stage in stages:
+            server_metrics.record_stage("ingest_document", stage.stage, stage.seconds, stage_bytes.get(stage.stage, 0))
         
-        # Store in memory
+        # Store in memory once the new version is committed on disk
         loaded_documents[document_name] = document_content
-        vector_stores[document_name] = {
-            "vector_store": vector_store,
-            "store_path": str(store_path),
-            "num_chunks": len(chunks)
-        }
+        vector_stores[document_name] = entry
+        query_cache.invalidate(document_name)
         documents_metadata[document_name] = metadata
         
         return {
             "success": True,
             "document_name": document_name,
             "file_type": file_type,
-            "chunks_created": len(chunks),
-            "vector_store_path": str(store_path),
-            "metadata_saved": str(metadata_file)
+            "chunks_created": len(documents),
+            "vector_store_path": store_path,
+            "metadata_saved": str(metadata_file),
+            "deduplication": dedup_report.to_dict() if dedup_report is not None else None,
+            "throughput": [stage.to_dict() for stage in stages]
         }
     
     except Exception as e:
+        # Keep the dedup registry in line with the version still on disk
+        if document_name in vector_stores:
+            _register_dedup(document_name, vector_stores[document_name]["vector_store"])
+        else:
+            chunk_deduplicator.forget_document(document_name)
         logger.error(f"Error ingesting document: {e}")
         return {"success": False, "error": str(e)}
 
 
-@mcp.tool()
-def rag_query(document_name: str, query: str, top_k: int = 5) -> dict:
+@tool
+def rag_query(
+    document_name: str,
+    query: str,
+    top_k: int = 5,
+    rerank: Optional[bool] = None,
+    diversity: Optional[str] = None
+) -> dict:
     """
     Query document using RAG (Retrieval-Augmented Generation).
 
@@ -342,9 +1024,13 @@ def rag_query(document_name: str, query: str, top_k: int = 5) -> dict:
         document_name: Name of indexed document
         query: Query string (natural language)
         top_k: Number of results to return
+        rerank: Rescore candidates with the cross-encoder (default: RERANK_ENABLED)
+        diversity: "mmr", "cluster" or "none" to skip near-duplicate hits (default: DIVERSITY_MODE)
 
     Returns:
-        Retrieved relevant content with similarity scores
+        Retrieved relevant content with cosine similarity scores. With the
+        query cache enabled, cache_hit tells whether a recent paraphrase
+        (cached_query) answered it.
 
     Raises:
         ValueError: If document is not indexed
@@ -353,35 +1039,123 @@ def rag_query(document_name: str, query: str, top_k: int = 5) -> dict:
         raise ValueError(f"Document '{document_name}' is not indexed. Available documents: {list(vector_stores.keys())}")
     
     try:
-        vector_store = vector_stores[document_name]["vector_store"]
+        reranked, mode = _rerank_enabled(rerank), _diversity_mode(diversity)
+        options = (top_k, reranked, mode)
+        version = vector_stores[document_name].get("version")
+        query_vector = None
+        if QUERY_CACHE_ENABLED:
+            with server_metrics.stage("rag_query", "cache_lookup", len(query.encode("utf-8"))):
+                query_vector = normalize_rows(get_embeddings().embed_query(query))[0]
+                cached = query_cache.lookup(document_name, options, version, query_vector)
+            server_metrics.record_cache("semantic_query", cached is not None)
+            if cached is not None:
+                entry, similarity = cached
+                return {
+                    **entry.result,
+                    "query": query,
+                    "cache_hit": True,
+                    "cached_query": entry.query,
+                    "cache_similarity": round(similarity, 4)
+                }
         
         # Perform semantic search
-        results = vector_store.similarity_search_with_score(query, k=top_k)
+        with server_metrics.stage("rag_query", "search", len(query.encode("utf-8"))):
+            hits = _search_many(
+                [(document_name, query)], top_k, rerank, "rag_query", diversity,
+                query_vectors=None if query_vector is None else [query_vector]
+            )[0]
+        
+        result = _query_result(document_name, query, hits, reranked, mode)
+        if QUERY_CACHE_ENABLED:
+            query_cache.store(document_name, options, version, query, query_vector, result)
+            return {**result, "cache_hit": False}
+        return result
+    
+    except Exception as e:
+        logger.error(f"Error querying document: {e}")
+        return {"error": str(e)}
+
+
+def _provenance_fields(metadata: dict) -> dict:
+    """Page/sheet/table and blob offsets of a chunk, when it was indexed with them"""
+    return {key: metadata[key] for key in ("page", "sheet", "table", "char_start", "char_end") if key in metadata}
+
+
+@functools.lru_cache(maxsize=16)
+def _read_store_file(path: str, mtime_ns: int, as_json: bool):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f) if as_json else f.read()
+
+
+def _store_file(document_name: str, name: str, as_json: bool = False):
+    """Read a file saved next to a document's index (cached per version), or None"""
+    path = Path(vector_stores[document_name]["store_path"]) / name
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _read_store_file(str(path), mtime_ns, as_json)
+
+
+@tool
+def expand_chunk(document_name: str, chunk_id: int, before: int = 1, after: int = 1, same_section: bool = True) -> dict:
+    """
+    Expand a hit to its neighboring chunks without re-extracting the file.
+
+    Args:
+        document_name: Name of indexed document
+        chunk_id: Chunk to expand (as returned by rag_query)
+        before: Chunks to include before it
+        after: Chunks to include after it
+        same_section: Stay within the chunk's page, sheet or table
+
+    Returns:
+        Contiguous text around the chunk, its neighbors and the chunk's offsets within that text
+    """
+    if document_name not in vector_stores:
+        return {"success": False, "error": f"Document '{document_name}' is not indexed"}
+    
+    try:
+        provenance = _store_file(document_name, PROVENANCE_FILE, as_json=True)
+        text_blob = _store_file(document_name, TEXT_BLOB_FILE)
+        if provenance is None or text_blob is None:
+            return {"success": False, "error": f"{document_name} was indexed without provenance; re-ingest it"}
         
-        retrieved_content = {
+        ids = neighbor_window(provenance, chunk_id, before, after, same_section)
+        chunks = provenance["chunks"]
+        start = chunks[ids[0]][0]
+        end = max(chunks[i][1] for i in ids)
+        target_start, target_end, section = chunks[chunk_id]
+        section_info = provenance["sections"][section]
+        
+        return {
+            "success": True,
             "document_name": document_name,
-            "query": query,
-            "num_results": len(results),
-            "results": [
-                {
-                    "chunk_id": doc.metadata.get("chunk_id", "unknown"),
-                    "similarity_score": float(1 - score),  # Convert distance to similarity
-                    "content": doc.page_content[:300] + "..." if len(doc.page_content) > 300 else doc.page_content,
-                    "full_content": doc.page_content
-                }
-                for doc, score in results
+            "chunk_id": chunk_id,
+            "section": {section_info["kind"]: section_info["label"]},
+            "char_start": start,
+            "char_end": end,
+            "text": text_blob[start:end],
+            "highlight": {"start": target_start - start, "end": target_end - start},
+            "neighbors": [
+                {"chunk_id": i, "char_start": chunks[i][0], "char_end": chunks[i][1]}
+                for i in ids
             ]
         }
-        
-        return retrieved_content
     
     except Exception as e:
-        logger.error(f"Error querying document: {e}")
-        return {"error": str(e)}
+        logger.error(f"Error expanding chunk: {e}")
+        return {"success": False, "error": str(e)}
 
 
-@mcp.tool()
-def rag_batch_query(document_names: List[str], query: str, top_k: int = 3) -> dict:
+@tool
+def rag_batch_query(
+    document_names: List[str],
+    query: str,
+    top_k: int = 3,
+    rerank: Optional[bool] = None,
+    diversity: Optional[str] = None
+) -> dict:
     """
     Query multiple documents using RAG.
     
@@ -389,18 +1163,24 @@ def rag_batch_query(document_names: List[str], query: str, top_k: int = 3) -> di
         document_names: List of document names
         query: Query string
         top_k: Results per document
+        rerank: Rescore candidates with the cross-encoder (default: RERANK_ENABLED)
+        diversity: "mmr", "cluster" or "none" to skip near-duplicate hits (default: DIVERSITY_MODE)
         
     Returns:
         Results from all documents
     """
-    results = {}
+    results = {doc_name: {"error": f"Document not indexed"} for doc_name in document_names}
+    indexed = [doc_name for doc_name in document_names if doc_name in vector_stores]
     
-    for doc_name in document_names:
-        if doc_name in vector_stores:
-            result = rag_query(doc_name, query, top_k)
-            results[doc_name] = result
-        else:
-            results[doc_name] = {"error": f"Document not indexed"}
+    try:
+        with server_metrics.stage("rag_batch_query", "search", len(query.encode("utf-8")) * len(indexed)):
+            hits = _search_many([(doc_name, query) for doc_name in indexed], top_k, rerank, "rag_batch_query", diversity)
+        for doc_name, doc_hits in zip(indexed, hits):
+            results[doc_name] = _query_result(doc_name, query, doc_hits, _rerank_enabled(rerank), _diversity_mode(diversity))
+    except Exception as e:
+        logger.error(f"Error querying documents: {e}")
+        for doc_name in indexed:
+            results[doc_name] = {"error": str(e)}
     
     return {
         "query": query,
@@ -410,7 +1190,84 @@ def rag_batch_query(document_names: List[str], query: str, top_k: int = 3) -> di
     }
 
 
-@mcp.tool()
+@tool
+def corpus_query(query: str, top_k: int = 5, document_names: Optional[List[str]] = None) -> dict:
+    """
+    Query all indexed documents at once through the shared corpus index.
+
+    Args:
+        query: Query string (natural language)
+        top_k: Number of results to return across all documents
+        document_names: Optional subset of documents to search
+
+    Returns:
+        Best matching chunks from any document, with similarity scores
+    """
+    if not CORPUS_INDEX_ENABLED:
+        return {"error": "The corpus index is disabled (CORPUS_INDEX_ENABLED)"}
+
+    try:
+        with server_metrics.stage("corpus_query", "search", len(query.encode("utf-8"))):
+            query_vector = np.asarray(get_embeddings().embed_query(query), dtype=np.float32)
+            results = get_corpus_index().search(query_vector, top_k, document_names)
+
+        return {
+            "query": query,
+            "num_results": len(results),
+            "results": [
+                {
+                    "document_name": record["document"],
+                    "chunk_id": record["chunk_id"],
+                    "similarity_score": float(similarity),
+                    "content": record["text"][:300] + "..." if len(record["text"]) > 300 else record["text"],
+                    "full_content": record["text"],
+                    **_provenance_fields(record["metadata"])
+                }
+                for record, similarity in results
+            ]
+        }
+
+    except Exception as e:
+        logger.error(f"Error querying corpus index: {e}")
+        return {"error": str(e)}
+
+
+@tool
+def compact_corpus_index(min_tombstone_ratio: Optional[float] = None) -> dict:
+    """
+    Flush, merge and compact the corpus index now.
+
+    The same work runs in the background every CORPUS_COMPACTION_INTERVAL
+    seconds; queries keep running meanwhile.
+
+    Args:
+        min_tombstone_ratio: Compact segments at or above this ratio (default: the configured threshold)
+
+    Returns:
+        Flushed, merged and compacted segments plus index statistics
+    """
+    if not CORPUS_INDEX_ENABLED:
+        return {"success": False, "error": "The corpus index is disabled (CORPUS_INDEX_ENABLED)"}
+
+    try:
+        corpus_index = get_corpus_index()
+        flushed = corpus_index.flush()
+        merged = corpus_index.merge()
+        compacted = corpus_index.compact(min_tombstone_ratio)
+        return {
+            "success": True,
+            "flushed_segment": flushed,
+            "merged": merged,
+            "compacted": compacted,
+            "stats": corpus_index.stats()
+        }
+
+    except Exception as e:
+        logger.error(f"Error compacting corpus index: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@tool
 def extract_tables_from_document(document_name: str) -> dict:
     """
     Extract all tables from a document.
@@ -433,7 +1290,7 @@ def extract_tables_from_document(document_name: str) -> dict:
     }
 
 
-@mcp.tool()
+@tool
 def extract_images_from_document(document_name: str) -> dict:
     """
     Get information about extracted images/OCR data.
@@ -457,7 +1314,7 @@ def extract_images_from_document(document_name: str) -> dict:
     }
 
 
-@mcp.tool()
+@tool
 def get_document_summary(document_name: str) -> dict:
     """
     Get summary and metadata for a document.
@@ -481,7 +1338,7 @@ def get_document_summary(document_name: str) -> dict:
     }
 
 
-@mcp.tool()
+@tool
 def list_indexed_documents() -> dict:
     """
     List all indexed documents.
@@ -505,7 +1362,86 @@ def list_indexed_documents() -> dict:
     }
 
 
-@mcp.tool()
+def _load_document_index(document_name: str, store_path: str, version: Optional[int] = None) -> None:
+    """Load a saved store (memory-mapped, read-only) and its metadata into memory"""
+    vector_store = load_vector_store(store_path, get_embeddings())
+    query_cache.invalidate(document_name)
+    
+    vector_stores[document_name] = {
+        "vector_store": vector_store,
+        "store_path": store_path,
+        "num_chunks": len(vector_store.docstore._dict) if hasattr(vector_store.docstore, '_dict') else 0,
+        "version": version
+    }
+    attach_quantized_index(vector_stores[document_name])
+    
+    metadata_file = METADATA_DIR / f"{document_name}_metadata.json"
+    if metadata_file.exists() and document_name not in documents_metadata:
+        with open(metadata_file, "r") as f:
+            documents_metadata[document_name] = json.load(f)
+    
+    _register_dedup(document_name, vector_store)
+
+
+def _unload_document(document_name: str) -> None:
+    """Drop a document from the in-memory state"""
+    vector_stores.pop(document_name, None)
+    query_cache.invalidate(document_name)
+    documents_metadata.pop(document_name, None)
+    loaded_documents.pop(document_name, None)
+    chunk_deduplicator.forget_document(document_name)
+
+
+def sync_indexes() -> None:
+    """
+    Apply index versions published by other worker processes.
+    
+    Costs one stat() per call while nothing changed; documents whose
+    published version differs from the loaded one are reloaded, and
+    documents removed from the manifest are unloaded.
+    """
+    if not INDEX_SYNC_ENABLED:
+        return
+    
+    if _corpus_index is not None:
+        _corpus_index.refresh()
+    
+    manifest = index_coordinator.poll()
+    if manifest is None:
+        return
+    
+    published = manifest.get("documents", {})
+    for document_name in [name for name in vector_stores if name not in published]:
+        logger.info(f"Unloading {document_name}: deleted by another worker")
+        _unload_document(document_name)
+    
+    for document_name, entry in published.items():
+        if vector_stores.get(document_name, {}).get("version") == entry["version"]:
+            continue
+        try:
+            documents_metadata.pop(document_name, None)
+            loaded_documents.pop(document_name, None)
+            _load_document_index(document_name, entry["store_path"], entry["version"])
+            logger.info(f"Loaded {document_name} version {entry['version']}")
+        except Exception as e:
+            logger.error(f"Error loading {document_name} version {entry['version']}: {e}")
+
+
+def create_http_app():
+    """
+    ASGI app serving MCP over streamable HTTP (uvicorn factory).
+    
+    Stateless mode lets any worker answer any request; published indexes
+    are loaded when the worker starts.
+    """
+    server = get_mcp()
+    server.settings.stateless_http = True
+    server.settings.json_response = True
+    sync_indexes()
+    return server.streamable_http_app()
+
+
+@tool
 def load_existing_index(document_name: str, store_path: str) -> dict:
     """
     Load previously saved FAISS index.
@@ -520,15 +1456,11 @@ def load_existing_index(document_name: str, store_path: str) -> dict:
     try:
         if not os.path.exists(store_path):
             return {"success": False, "error": f"Store not found: {store_path}"}
+        missing = [name for name in ("index.faiss", "index.pkl") if not os.path.exists(os.path.join(store_path, name))]
+        if missing:
+            return {"success": False, "error": f"Incomplete store {store_path}: missing {', '.join(missing)}"}
         
-        embeddings = get_embeddings()
-        vector_store = FAISS.load_local(store_path, embeddings)
-        
-        vector_stores[document_name] = {
-            "vector_store": vector_store,
-            "store_path": store_path,
-            "num_chunks": len(vector_store.docstore._dict) if hasattr(vector_store.docstore, '_dict') else 0
-        }
+        _load_document_index(document_name, store_path)
         
         return {
             "success": True,
@@ -541,7 +1473,7 @@ def load_existing_index(document_name: str, store_path: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
-@mcp.tool()
+@tool
 def delete_document_index(document_name: str) -> dict:
     """
     Delete document index and metadata.
@@ -553,25 +1485,22 @@ def delete_document_index(document_name: str) -> dict:
         Deletion status
     """
     try:
-        if document_name in vector_stores:
-            store_path = vector_stores[document_name]["store_path"]
-            del vector_stores[document_name]
-            
-            # Remove from disk
-            if os.path.exists(store_path):
-                import shutil
-                shutil.rmtree(store_path)
-        
-        if document_name in documents_metadata:
-            del documents_metadata[document_name]
+        store_path = Path(vector_stores.get(document_name, {}).get("store_path", VECTOR_STORE_DIR / document_name))
+        metadata_file = METADATA_DIR / f"{document_name}_metadata.json"
         
-        if document_name in loaded_documents:
-            del loaded_documents[document_name]
+        with index_wal.operation("delete", document_name, store_path, metadata_file):
+            # Rename first so the store disappears atomically, then clean up
+            retired = retire_store(store_path)
+            if metadata_file.exists():
+                metadata_file.unlink()
+            index_coordinator.publish(document_name, None)
+            if CORPUS_INDEX_ENABLED:
+                get_corpus_index().delete_document(document_name)
+            if retired is not None:
+                import shutil
+                shutil.rmtree(retired, ignore_errors=True)
         
-        # Remove metadata file
-        metadata_file = METADATA_DIR / f"{document_name}_metadata.json"
-        if metadata_file.exists():
-            metadata_file.unlink()
+        _unload_document(document_name)
         
         return {
             "success": True,
@@ -584,7 +1513,7 @@ def delete_document_index(document_name: str) -> dict:
         return {"success": False, "error": str(e)}
 
 
-@mcp.tool()
+@tool
 def generate_rag_report(document_name: str, queries: List[str]) -> dict:
     """
     Generate comprehensive RAG report with multiple queries.
@@ -606,8 +1535,7 @@ def generate_rag_report(document_name: str, queries: List[str]) -> dict:
             "query_results": []
         }
         
-        for query in queries:
-            result = rag_query(document_name, query, top_k=3)
+        for result in _query_many(document_name, queries, top_k=3, tool="generate_rag_report"):
             if "error" not in result:
                 report["query_results"].append(result)
         
@@ -618,12 +1546,105 @@ def generate_rag_report(document_name: str, queries: List[str]) -> dict:
         return {"error": str(e)}
 
 
-@mcp.tool()
+@tool
+def build_context(
+    queries: List[str],
+    document_names: Optional[List[str]] = None,
+    token_budget: int = 2000,
+    top_k: int = 5,
+    order: str = "relevance"
+) -> dict:
+    """
+    Build a prompt-ready context for one or more queries within a token budget.
+
+    Hits that overlap or sit next to each other in the same page, sheet or
+    table are merged into one passage by their offsets, so text shared by
+    neighboring chunks appears once; chunks hit by several queries are kept once.
+
+    Args:
+        queries: Query strings
+        document_names: Documents to search (default: all indexed documents)
+        token_budget: Maximum estimated tokens of the returned context
+        top_k: Chunks retrieved per query and document
+        order: "relevance" (best passage first) or "position" (document order)
+
+    Returns:
+        Context text, the passages it contains and size/coverage statistics
+    """
+    names = document_names or list(vector_stores.keys())
+    missing = [name for name in names if name not in vector_stores]
+    if missing:
+        return {"success": False, "error": f"Documents not indexed: {missing}"}
+    
+    try:
+        blobs = {}
+        provenance = {}
+        for name in names:
+            table = _store_file(name, PROVENANCE_FILE, as_json=True)
+            blob = _store_file(name, TEXT_BLOB_FILE)
+            if table is not None and blob is not None:
+                provenance[name] = table
+                blobs[name] = blob
+        
+        requests = [(name, query) for query in queries for name in names]
+        with server_metrics.stage("build_context", "search", sum(len(q.encode("utf-8")) for q in queries)):
+            results = _search_many(requests, top_k, tool="build_context")
+        
+        hits = []
+        for (name, query), request_hits in zip(requests, results):
+            for doc, score, _ in request_hits:
+                chunk_id = doc.metadata.get("chunk_id")
+                hit = ContextHit(name, chunk_id, score, doc.page_content, query)
+                if name in provenance and "char_start" in doc.metadata:
+                    hit.start = doc.metadata["char_start"]
+                    hit.end = doc.metadata["char_end"]
+                    hit.section = provenance[name]["chunks"][chunk_id][2]
+                hits.append(hit)
+        
+        def describe(passage: ContextPassage) -> str:
+            label = passage.document
+            if passage.section is not None:
+                section = provenance[passage.document]["sections"][passage.section]
+                if section["kind"] != "text":
+                    label += f" | {section['kind']} {section['label']}"
+            return f"[{label}]"
+        
+        passages = merge_hits(hits, blobs)
+        selected, dropped, used = pack_passages(passages, token_budget, order, names, describe=describe)
+        
+        return {
+            "success": True,
+            "queries": queries,
+            "token_budget": token_budget,
+            "tokens_used": used,
+            "context": "\n\n".join(f"{p.header}\n{p.text}" for p in selected),
+            "passages": [
+                {
+                    "document_name": p.document,
+                    "chunk_ids": p.chunk_ids,
+                    "queries": p.queries,
+                    "score": round(p.score, 4),
+                    "tokens": p.tokens,
+                    **({"char_start": p.start, "char_end": p.end} if p.start is not None else {})
+                }
+                for p in selected
+            ],
+            "dropped_passages": len(dropped),
+            **context_stats(hits, selected)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error building context: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@tool
 def compare_document_to_specification(
     document_name: str,
     specifications: List[str],
     spec_name: str = "Specification",
-    threshold: float = 0.7
+    threshold: float = 0.7,
+    diversity: Optional[str] = None
 ) -> dict:
     """
     Compare document against specifications using RAG.
@@ -632,7 +1653,8 @@ def compare_document_to_specification(
         document_name: Name of indexed document
         specifications: List of specification requirements
         spec_name: Name of specification set
-        threshold: Similarity threshold (0.0-1.0)
+        threshold: Minimum cosine similarity (or rerank probability) of the best match
+        diversity: "mmr", "cluster" or "none" for the evidence of each requirement (default: DIVERSITY_MODE)
         
     Returns:
         Compliance report with detailed findings
@@ -640,49 +1662,26 @@ def compare_document_to_specification(
     global comparison_engine
     
     if comparison_engine is None:
-        comparison_engine = ComparisonEngine(rag_query)
+        comparison_engine = ComparisonEngine(rag_query, _query_many)
     
     try:
         result = comparison_engine.compare_document_to_spec(
             document_name,
             specifications,
             spec_name,
-            threshold
+            threshold,
+            diversity
         )
         
         # Convert to dict for JSON serialization
-        return {
-            "success": True,
-            "document_name": result.document_name,
-            "spec_name": result.spec_name,
-            "compliance_percentage": result.compliance_percentage,
-            "summary": result.summary,
-            "statistics": {
-                "total_requirements": result.total_requirements,
-                "compliant": result.compliant_items,
-                "partial": result.partial_items,
-                "non_compliant": result.non_compliant_items,
-                "unknown": result.unknown_items
-            },
-            "items": [
-                {
-                    "requirement_id": item.requirement_id,
-                    "requirement_text": item.requirement_text,
-                    "status": item.status.value,
-                    "found_value": item.found_value,
-                    "evidence": item.evidence,
-                    "notes": item.notes
-                }
-                for item in result.items
-            ]
-        }
+        return {"success": True, **result.to_dict()}
     
     except Exception as e:
         logger.error(f"Error comparing document: {e}")
         return {"success": False, "error": str(e)}
 
 
-@mcp.tool()
+@tool
 def compare_multiple_documents_to_spec(
     document_names: List[str],
     specifications: List[str],
@@ -702,7 +1701,7 @@ def compare_multiple_documents_to_spec(
     global comparison_engine
     
     if comparison_engine is None:
-        comparison_engine = ComparisonEngine(rag_query)
+        comparison_engine = ComparisonEngine(rag_query, _query_many)
     
     try:
         results = {}
@@ -718,18 +1717,9 @@ def compare_multiple_documents_to_spec(
                 spec_name
             )
             
-            results[doc_name] = {
-                "document_name": result.document_name,
-                "compliance_percentage": result.compliance_percentage,
-                "summary": result.summary,
-                "statistics": {
-                    "total_requirements": result.total_requirements,
-                    "compliant": result.compliant_items,
-                    "partial": result.partial_items,
-                    "non_compliant": result.non_compliant_items,
-                    "unknown": result.unknown_items
-                }
-            }
+            summary = result.to_dict(include_items=False)
+            del summary["spec_name"]
+            results[doc_name] = summary
         
         return {
             "success": True,
@@ -743,45 +1733,73 @@ def compare_multiple_documents_to_spec(
         return {"success": False, "error": str(e)}
 
 
-@mcp.tool()
+@tool
 def generate_compliance_report(
     document_name: str,
     specifications: List[str],
     spec_name: str = "Specification",
-    format: str = "text"
+    format: str = "text",
+    to_file: Optional[bool] = None
 ) -> dict:
     """
     Generate detailed compliance report in specified format.
     
+    Reports are streamed to a file under data/reports (and only the path
+    and summary returned) for 'csv' and 'parquet', when to_file is True, or
+    by default when the specification has more than REPORT_INLINE_MAX_ITEMS
+    requirements.
+    
     Args:
         document_name: Document to report on
         specifications: Specification requirements
         spec_name: Name of specification
-        format: Report format ('text', 'json', or 'html')
+        format: Report format ('text', 'json', 'html', 'csv' or 'parquet')
+        to_file: Write the report to a file (default: only large reports)
         
     Returns:
-        Formatted compliance report
+        Formatted compliance report, or the report file path and summary
     """
     global comparison_engine
     
     if comparison_engine is None:
-        comparison_engine = ComparisonEngine(rag_query)
+        comparison_engine = ComparisonEngine(rag_query, _query_many)
     
     try:
+        if format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown format: {format}. Available: {list(REPORT_FORMATS)}")
         result = comparison_engine.compare_document_to_spec(
             document_name,
             specifications,
             spec_name
         )
         
-        report_text = comparison_engine.generate_compliance_report(result, format)
+        if to_file is None:
+            to_file = len(result.items) > REPORT_INLINE_MAX_ITEMS
+        if not to_file and format not in ("csv", "parquet"):
+            with server_metrics.stage("generate_compliance_report", "report_formatting"):
+                report_text = comparison_engine.generate_compliance_report(result, format)
+            
+            return {
+                "success": True,
+                "document_name": document_name,
+                "spec_name": spec_name,
+                "format": format,
+                "report": report_text
+            }
+        
+        stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{document_name}_{spec_name}").lstrip(".")
+        path = REPORT_DIR / f"{stem}_{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{REPORT_FORMATS[format]}"
+        start = time.perf_counter()
+        written = comparison_engine.write_compliance_report(result, format, path)
+        server_metrics.record_stage("generate_compliance_report", "report_writing", time.perf_counter() - start, written["bytes"])
         
         return {
             "success": True,
-            "document_name": document_name,
-            "spec_name": spec_name,
+            **result.to_dict(include_items=False),
             "format": format,
-            "report": report_text
+            "report_path": written["path"],
+            "bytes": written["bytes"],
+            "items": written["items"]
         }
     
     except Exception as e:
@@ -789,10 +1807,333 @@ def generate_compliance_report(
         return {"success": False, "error": str(e)}
 
 
+def _document_version(document_name: str) -> Any:
+    """Published version of a loaded document (index file mtime for stores loaded by path)"""
+    entry = vector_stores[document_name]
+    if entry.get("version") is not None:
+        return entry["version"]
+    return f"mtime:{os.stat(Path(entry['store_path']) / 'index.faiss').st_mtime_ns}"
+
+
+def _matrix_path(matrix_name: str) -> Path:
+    if not matrix_name or matrix_name.startswith(".") or Path(matrix_name).name != matrix_name:
+        raise ValueError(f"Invalid matrix name: {matrix_name!r}")
+    return COMPLIANCE_MATRIX_DIR / f"{matrix_name}.npz"
+
+
+@tool
+def compliance_matrix(
+    document_names: List[str],
+    specifications: List[str],
+    matrix_name: str = "default",
+    spec_name: str = "Specification",
+    threshold: float = 0.7,
+    recompute: bool = False
+) -> dict:
+    """
+    Compute which documents meet which requirements as one status/score matrix.
+    
+    The matrix is saved under matrix_name. On later calls only cells whose
+    document was re-ingested since, or whose requirement text was added or
+    edited, are searched again; unchanged requirements reuse their stored
+    embeddings and a new threshold only reclassifies stored scores.
+    
+    Args:
+        document_names: Documents (rows)
+        specifications: Specification requirements (columns)
+        matrix_name: Name the matrix is persisted under
+        spec_name: Name of specification set
+        threshold: Best-hit score for compliance (70% of it counts as partial)
+        recompute: Ignore the saved matrix and search every cell
+        
+    Returns:
+        Status and score per document and requirement, per-document statistics and what was recomputed
+    """
+    try:
+        path = _matrix_path(matrix_name)
+        if isinstance(specifications, list):
+            requirements = SpecificationParser.parse_list_spec(specifications)
+        else:
+            requirements = SpecificationParser.parse_json_spec(specifications)
+        versions = [_document_version(doc) if doc in vector_stores else None for doc in document_names]
+        # Everything a stored score depends on; any change recomputes the whole matrix
+        score_settings = {
+            "embedding_model": EMBEDDING_MODEL,
+            "embedding_backend": EMBEDDING_BACKEND,
+            "onnx_int8": ONNX_QUANTIZE_INT8 if EMBEDDING_BACKEND == "onnx" else None,
+            "metric": SIMILARITY_METRIC,
+            "quantization": EMBEDDING_QUANTIZATION,
+            "rescore_factor": QUANTIZATION_RESCORE_FACTOR if EMBEDDING_QUANTIZATION else None,
+            "rerank_model": RERANK_MODEL if RERANK_ENABLED else None,
+            "rerank_candidates": RERANK_CANDIDATES if RERANK_ENABLED else None
+        }
+        
+        previous = None
+        if path.exists() and not recompute:
+            try:
+                previous = ComplianceMatrix.load(path)
+            except Exception as e:
+                logger.warning(f"Could not read compliance matrix {path}, recomputing: {e}")
+        if previous is None:
+            matrix = ComplianceMatrix(matrix_name, document_names, versions, requirements, threshold, score_settings, spec_name)
+        else:
+            matrix = previous.reconcile(document_names, versions, requirements, threshold, score_settings, spec_name)
+        
+        errors = {}
+        missing = [row for row, version in enumerate(versions) if version is None]
+        for row in missing:
+            matrix.record_unknown(row)
+            errors[document_names[row]] = f"Document '{document_names[row]}' is not indexed"
+        stale = ~matrix.computed
+        stale[missing] = False
+        
+        # Embed each requirement at most once, and only if it has no stored vector
+        texts = [req.get("text", "") for req in requirements]
+        columns = np.nonzero(stale.any(axis=0))[0]
+        vectors = matrix.requirement_vectors
+        to_embed = [int(j) for j in columns if vectors is None or np.isnan(vectors[j, 0])]
+        if to_embed:
+            with server_metrics.stage("compliance_matrix", "embed", sum(len(texts[j].encode("utf-8")) for j in to_embed)):
+                embedded = normalize_rows(get_embeddings().embed_array([texts[j] for j in to_embed]))
+            if vectors is None or vectors.shape[1] != embedded.shape[1]:
+                vectors = matrix.requirement_vectors = np.full((len(texts), embedded.shape[1]), np.nan, dtype=np.float32)
+            vectors[to_embed] = embedded
+        
+        for row in np.nonzero(stale.any(axis=1))[0]:
+            cols = np.nonzero(stale[row])[0]
+            doc = document_names[row]
+            try:
+                with server_metrics.stage("compliance_matrix", "search", sum(len(texts[j].encode("utf-8")) for j in cols)):
+                    hits = _search_many(
+                        [(doc, texts[j]) for j in cols], 1, tool="compliance_matrix", diversity="none",
+                        query_vectors=[vectors[j] for j in cols]
+                    )
+                matrix.record_row(
+                    row,
+                    cols,
+                    np.array([h[0][1] if h else np.nan for h in hits], dtype=np.float32),
+                    np.array([h[0][0].metadata.get("chunk_id", -1) if h else -1 for h in hits], dtype=np.int32)
+                )
+            except Exception as e:
+                logger.error(f"Error computing compliance row for {doc}: {e}")
+                matrix.record_unknown(row, cols)
+                errors[doc] = str(e)
+        
+        matrix.save(path)
+        
+        return {
+            "success": True,
+            **matrix.to_dict(),
+            "recomputed": {
+                "cells": int(stale.sum()),
+                "documents": [document_names[row] for row in np.nonzero(stale.any(axis=1))[0]],
+                "requirements": [requirements[j].get("id", "UNKNOWN") for j in columns],
+                "embedded": len(to_embed)
+            },
+            "errors": errors,
+            "path": str(path)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error computing compliance matrix: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def _snapshot_document(document_name: str) -> "SnapshotDocument":
+    """Describe a loaded document for export, reading vectors block by block"""
+    entry = vector_stores[document_name]
+    vector_store = entry["vector_store"]
+    quantized = entry.get("quantized_index")
+    index = vector_store.index
+
+    if quantized is not None:
+        num_vectors, dim = quantized.ntotal, quantized.dim
+        read_vectors = lambda start, stop: np.asarray(quantized.full_vectors[start:stop], dtype=np.float32)
+    else:
+        num_vectors, dim = index.ntotal, index.d
+        read_vectors = lambda start, stop: index.reconstruct_n(start, stop - start)
+
+    def chunks():
+        for position in range(num_vectors):
+            docstore_id = vector_store.index_to_docstore_id[position]
+            doc = vector_store.docstore.search(docstore_id)
+            yield docstore_id, doc.page_content, doc.metadata
+
+    metadata = documents_metadata.get(document_name)
+    if metadata is None:
+        metadata_file = METADATA_DIR / f"{document_name}_metadata.json"
+        metadata = json.loads(metadata_file.read_text()) if metadata_file.exists() else {"document_name": document_name}
+
+    return SnapshotDocument(document_name, metadata, num_vectors, dim, chunks, read_vectors, Path(entry["store_path"]))
+
+
+def _rebuild_vector_store(chunks: list, vectors: np.ndarray):
+    """Build an in-memory FAISS store from snapshot chunks and vectors"""
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.utils import DistanceStrategy
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
+
+    # Vectors from snapshots taken before normalized scoring are normalized here
+    index = cosine_index(vectors)
+    docstore = InMemoryDocstore({
+        docstore_id: Document(page_content=text, metadata=metadata)
+        for docstore_id, text, metadata in chunks
+    })
+    index_to_docstore_id = {position: chunk[0] for position, chunk in enumerate(chunks)}
+    return FAISS(
+        get_embeddings(), index, docstore, index_to_docstore_id,
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+
+@tool
+def export_snapshot(output_path: str = "", document_names: Optional[List[str]] = None) -> dict:
+    """
+    Export indexed documents as one compressed, checksummed snapshot archive.
+
+    The archive holds the catalog, raw float32 vectors and chunk text, and is
+    streamed to disk so memory use does not grow with the corpus.
+
+    Args:
+        output_path: Archive path (default: data/snapshots/snapshot-<timestamp>.tar.gz)
+        document_names: Documents to export (default: all loaded documents)
+
+    Returns:
+        Archive path, size and per-document counts
+    """
+    try:
+        names = document_names or sorted(vector_stores)
+        missing = [name for name in names if name not in vector_stores]
+        if missing:
+            return {"success": False, "error": f"Documents not found: {', '.join(missing)}"}
+
+        if not output_path:
+            output_path = str(SNAPSHOT_DIR / f"snapshot-{time.strftime('%Y%m%d-%H%M%S')}.tar.gz")
+
+        start = time.perf_counter()
+        with server_metrics.stage("export_snapshot", "write"):
+            manifest = write_snapshot(
+                Path(output_path),
+                [_snapshot_document(name) for name in names],
+                {"embedding_model": EMBEDDING_MODEL, "metric": SIMILARITY_METRIC}
+            )
+
+        return {
+            "success": True,
+            "snapshot_path": output_path,
+            "size_bytes": os.path.getsize(output_path),
+            "seconds": round(time.perf_counter() - start, 3),
+            "documents": manifest["documents"]
+        }
+
+    except Exception as e:
+        logger.error(f"Error exporting snapshot: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@tool
+def import_snapshot(snapshot_path: str, overwrite: bool = False) -> dict:
+    """
+    Restore documents from a snapshot created by export_snapshot.
+
+    Checksums are verified before anything is replaced. Indexes are rebuilt
+    in parallel from the stored vectors (no re-embedding) and are queryable
+    as soon as the call returns.
+
+    Args:
+        snapshot_path: Path to the snapshot archive
+        overwrite: Replace documents that are already indexed
+
+    Returns:
+        Restored and skipped documents
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    staging_dir = SNAPSHOT_DIR / f".import-{os.getpid()}-{time.time_ns()}"
+    try:
+        if not os.path.exists(snapshot_path):
+            return {"success": False, "error": f"Snapshot not found: {snapshot_path}"}
+
+        start = time.perf_counter()
+        with server_metrics.stage("import_snapshot", "unpack", os.path.getsize(snapshot_path)):
+            manifest = unpack_snapshot(Path(snapshot_path), staging_dir)
+
+        if manifest.get("embedding_model") != EMBEDDING_MODEL:
+            return {
+                "success": False,
+                "error": f"Snapshot was built with {manifest.get('embedding_model')}, server uses {EMBEDDING_MODEL}"
+            }
+
+        entries = manifest["documents"]
+        skipped = [entry["name"] for entry in entries if entry["name"] in vector_stores and not overwrite]
+        entries = [entry for entry in entries if entry["name"] not in skipped]
+
+        def rebuild(entry):
+            metadata, chunks, vectors, store_files = read_snapshot_document(staging_dir, entry)
+            return entry, metadata, _rebuild_vector_store(chunks, vectors), store_files
+
+        with server_metrics.stage("import_snapshot", "rebuild"):
+            with ThreadPoolExecutor(max_workers=min(8, max(1, len(entries)))) as executor:
+                rebuilt = list(executor.map(rebuild, entries))
+
+        restored = []
+        for entry, metadata, vector_store, store_files in rebuilt:
+            document_name = entry["name"]
+            committed = _commit_document(document_name, vector_store, metadata, store_files)
+            _unload_document(document_name)
+            vector_stores[document_name] = committed
+            documents_metadata[document_name] = metadata
+            _register_dedup(document_name, vector_store)
+            restored.append({"document_name": document_name, "chunks": entry["chunks"]})
+
+        return {
+            "success": True,
+            "snapshot_path": snapshot_path,
+            "created_at": manifest.get("created_at"),
+            "restored": restored,
+            "skipped": skipped,
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    except Exception as e:
+        logger.error(f"Error importing snapshot: {e}")
+        return {"success": False, "error": str(e)}
+
+    finally:
+        remove_staging(staging_dir)
+
+
+@tool
+def get_server_metrics(format: str = "json") -> dict:
+    """
+    Get server performance metrics.
+    
+    Per-tool call counts, errors and latency percentiles; per-stage latency
+    and bytes processed (extraction, splitting, embedding, index build,
+    save, search, report formatting); cache hit rates; semantic query cache
+    evictions and expirations; memory footprint.
+    
+    Args:
+        format: 'json' for a structured snapshot or 'prometheus' for text exposition format
+        
+    Returns:
+        Metrics snapshot
+    """
+    if format == "prometheus":
+        return {"format": "prometheus", "text": server_metrics.render_prometheus()}
+    if format != "json":
+        return {"error": f"Unknown format: {format}. Use 'json' or 'prometheus'."}
+    return {**server_metrics.snapshot(), "query_cache": query_cache.stats()}
+
+
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1 and sys.argv[1] == "dev":
         logger.info("Starting RAG MCP Server in development mode...")
     
-    mcp.run()
+    recover_indexes()
+    migrate_indexes()
+    start_metrics_endpoint()
+    get_mcp().run()
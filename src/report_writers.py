@@ -0,0 +1,245 @@
+"""
+Compliance Report Writers for RAG MCP Server
+Stream comparison results to text, HTML (escaped), JSON, CSV or Parquet one
+item at a time, so writing time is linear in the number of requirements and
+large reports never exist as one string
+"""
+
+import io
+import os
+import csv
+import json
+import math
+import logging
+import textwrap
+from dataclasses import asdict
+from html import escape
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, TextIO
+
+from index_sync import staging_path
+
+if TYPE_CHECKING:
+    from comparison_engine import ComparisonResult
+
+logger = logging.getLogger(__name__)
+
+# Format -> file extension
+REPORT_FORMATS = {"text": ".txt", "json": ".json", "html": ".html", "csv": ".csv", "parquet": ".parquet"}
+# Formats written to a binary file rather than a text stream
+BINARY_FORMATS = {"parquet"}
+TABULAR_COLUMNS = [
+    "document_name", "spec_name", "requirement_id", "requirement_text", "expected_value",
+    "status", "score", "found_value", "evidence", "notes"
+]
+PARQUET_BATCH_ROWS = 4096
+# Leading characters that make spreadsheet applications evaluate a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+RULE = "=" * 70
+
+HTML_HEAD = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Compliance Report - {document_name}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        h1, h2 {{ color: #333; }}
+        .summary {{ background-color: #f5f5f5; padding: 15px; border-radius: 5px; }}
+        .compliant {{ color: green; font-weight: bold; }}
+        .partial {{ color: orange; font-weight: bold; }}
+        .non-compliant {{ color: red; font-weight: bold; }}
+        .unknown {{ color: gray; font-weight: bold; }}
+        .item {{ margin: 20px 0; padding: 10px; border-left: 4px solid #ddd; }}
+        .item.compliant {{ border-left-color: green; }}
+        .item.partial {{ border-left-color: orange; }}
+        .item.non-compliant {{ border-left-color: red; }}
+        .evidence {{ margin-left: 20px; font-size: 0.9em; color: #666; }}
+    </style>
+</head>
+<body>
+    <h1>Compliance Report</h1>
+    <div class="summary">
+        <h2>{document_name}</h2>
+        <p><strong>Specification:</strong> {spec_name}</p>
+        <p><strong>Compliance:</strong> <span style="font-size: 1.5em;">{compliance_percentage:.1f}%</span></p>
+        <p>Compliant: {compliant} | Partial: {partial} | Non-Compliant: {non_compliant} | Unknown: {unknown}</p>
+    </div>
+
+    <h2>Detailed Findings</h2>
+"""
+
+
+def write_text_report(result: "ComparisonResult", out: TextIO) -> None:
+    """Plain text report"""
+    out.write(f"\n{RULE}\nCOMPLIANCE REPORT\n{RULE}\n\n{result.summary}\n\n{RULE}\nDETAILED FINDINGS\n{RULE}\n\n")
+    for item in result.items:
+        lines = [f"\n[{item.requirement_id}] {item.status.value.upper()}", f"Requirement: {item.requirement_text}"]
+        if item.expected_value:
+            lines.append(f"Expected: {item.expected_value}")
+        if item.found_value:
+            lines.append(f"Found: {item.found_value}")
+        if item.evidence:
+            lines.append("Evidence:")
+            lines.extend(f"  {i}. {ev}" for i, ev in enumerate(item.evidence, 1))
+        if item.notes:
+            lines.append(f"Notes: {item.notes}")
+        out.write("\n".join(lines) + "\n\n")
+    out.write(f"\n{RULE}\nReport generated: {result.comparison_timestamp}\n")
+
+
+def write_html_report(result: "ComparisonResult", out: TextIO) -> None:
+    """HTML report; every document-derived value is escaped"""
+    out.write(HTML_HEAD.format(
+        document_name=escape(result.document_name),
+        spec_name=escape(result.spec_name),
+        compliance_percentage=result.compliance_percentage,
+        compliant=result.compliant_items,
+        partial=result.partial_items,
+        non_compliant=result.non_compliant_items,
+        unknown=result.unknown_items
+    ))
+    for item in result.items:
+        status = item.status.value
+        parts = [
+            f"""
+    <div class="item {status}">
+        <h3>[{escape(str(item.requirement_id))}] <span class="{status}">{status.upper()}</span></h3>
+        <p><strong>Requirement:</strong> {escape(item.requirement_text)}</p>
+"""
+        ]
+        if item.expected_value:
+            parts.append(f"        <p><strong>Expected:</strong> {escape(str(item.expected_value))}</p>\n")
+        if item.found_value:
+            parts.append(f"        <p><strong>Found:</strong> {escape(item.found_value)}</p>\n")
+        if item.evidence:
+            parts.append("        <div class='evidence'><strong>Evidence:</strong><ul>\n")
+            parts.extend(f"            <li>{escape(ev)}</li>\n" for ev in item.evidence)
+            parts.append("        </ul></div>\n")
+        if item.notes:
+            parts.append(f"        <p><strong>Notes:</strong> {escape(item.notes)}</p>\n")
+        parts.append("    </div>\n")
+        out.write("".join(parts))
+    out.write(f"""
+    <p><em>Report generated: {escape(result.comparison_timestamp)}</em></p>
+</body>
+</html>
+""")
+
+
+def write_json_report(result: "ComparisonResult", out: TextIO) -> None:
+    """JSON report, identical to json.dumps(..., indent=2) of the whole result, written item by item"""
+    out.write("{\n")
+    for name in result.__dataclass_fields__:
+        if name != "items":
+            out.write(f"  {json.dumps(name)}: {json.dumps(getattr(result, name))},\n")
+    out.write('  "items": [')
+    for i, item in enumerate(result.items):
+        out.write(",\n" if i else "\n")
+        out.write(textwrap.indent(json.dumps({**asdict(item), "status": item.status.value}, indent=2), "    "))
+    out.write("\n  ]\n}" if len(result.items) else "]\n}")
+
+
+def report_rows(result: "ComparisonResult") -> Iterator[Dict[str, Any]]:
+    """One flat record per requirement, in TABULAR_COLUMNS order"""
+    scores = result.items.scores
+    for row, item in enumerate(result.items):
+        score = float(scores[row])
+        yield {
+            "document_name": result.document_name,
+            "spec_name": result.spec_name,
+            "requirement_id": str(item.requirement_id),
+            "requirement_text": item.requirement_text,
+            "expected_value": None if item.expected_value is None else str(item.expected_value),
+            "status": item.status.value,
+            "score": None if math.isnan(score) else round(score, 4),
+            "found_value": item.found_value,
+            "evidence": " | ".join(item.evidence),
+            "notes": item.notes
+        }
+
+
+def csv_safe(value: Any) -> Any:
+    """Prefix strings a spreadsheet would run as a formula with a quote, so they open as text"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def write_csv_report(result: "ComparisonResult", out: TextIO) -> None:
+    """One CSV row per requirement; document text is escaped against formula injection"""
+    writer = csv.DictWriter(out, fieldnames=TABULAR_COLUMNS)
+    writer.writeheader()
+    writer.writerows({name: csv_safe(value) for name, value in record.items()} for record in report_rows(result))
+
+
+def write_parquet_report(result: "ComparisonResult", out, batch_rows: int = PARQUET_BATCH_ROWS) -> None:
+    """Parquet file with one row per requirement, written in row groups of batch_rows (requires pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet reports require pyarrow (pip install pyarrow)") from e
+
+    schema = pa.schema([(name, pa.float64() if name == "score" else pa.string()) for name in TABULAR_COLUMNS])
+    with pq.ParquetWriter(out, schema) as writer:
+        batch: List[Dict[str, Any]] = []
+        for record in report_rows(result):
+            batch.append(record)
+            if len(batch) == batch_rows:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                batch = []
+        if batch or not len(result.items):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+
+
+WRITERS = {
+    "text": write_text_report,
+    "json": write_json_report,
+    "html": write_html_report,
+    "csv": write_csv_report,
+    "parquet": write_parquet_report
+}
+
+
+def render_report(result: "ComparisonResult", output_format: str) -> str:
+    """Report as one string (text formats only)"""
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown format: {output_format}")
+    if output_format in BINARY_FORMATS:
+        raise ValueError(f"{output_format} reports can only be written to a file")
+    out = io.StringIO()
+    WRITERS[output_format](result, out)
+    return out.getvalue()
+
+
+def write_report(result: "ComparisonResult", output_format: str, path: Path) -> Dict[str, Any]:
+    """
+    Stream a report to path, atomically
+
+    Returns:
+        Path, format, size in bytes and number of items written
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown format: {output_format}. Available: {list(WRITERS)}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = staging_path(path)
+    try:
+        if output_format in BINARY_FORMATS:
+            with open(staging, "wb") as f:
+                WRITERS[output_format](result, f)
+        else:
+            # newline="" keeps the csv module's \r\n row endings as written
+            with open(staging, "w", encoding="utf-8", newline="" if output_format == "csv" else None) as f:
+                WRITERS[output_format](result, f)
+        os.replace(staging, path)
+    except BaseException:
+        staging.unlink(missing_ok=True)
+        raise
+    return {
+        "path": str(path),
+        "format": output_format,
+        "bytes": path.stat().st_size,
+        "items": len(result.items)
+    }
@@ -0,0 +1,188 @@
+"""
+Cross-Encoder Reranking for RAG MCP Server
+Rescores bi-encoder candidates with a small cross-encoder on CPU, batched
+across every query of a request and bounded by a candidate count and time budget
+"""
+
+import time
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def sigmoid(logits: np.ndarray) -> np.ndarray:
+    """Map cross-encoder logits to relevance probabilities in (0, 1)"""
+    return 1.0 / (1.0 + np.exp(-np.clip(logits, -30.0, 30.0)))
+
+
+class CrossEncoderReranker:
+    """Query/passage relevance from a cross-encoder (PyTorch or ONNX Runtime, CPU only)"""
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        backend: str = "pytorch",
+        batch_size: int = 32,
+        max_length: int = 256,
+        threads: int = 0,
+        cache_dir: Optional[Path] = None
+    ):
+        """
+        Initialize reranker
+
+        Args:
+            model_name: Hugging Face id of a single-logit cross-encoder
+            backend: 'pytorch' (transformers) or 'onnx' (ONNX Runtime)
+            batch_size: Query/passage pairs per forward pass
+            max_length: Truncation length of a query + passage pair in tokens
+            threads: CPU threads for inference (0 = runtime default)
+            cache_dir: Where the ONNX export is kept
+        """
+        from transformers import AutoTokenizer
+
+        if backend not in ("pytorch", "onnx"):
+            raise ValueError(f"Unknown reranker backend: {backend}. Available: ['pytorch', 'onnx']")
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.threads = threads
+        self.cache_dir = Path(cache_dir or Path.home() / ".cache" / "rag-mcp" / "onnx")
+        self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        if backend == "onnx":
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if threads:
+                options.intra_op_num_threads = threads
+            self._session = ort.InferenceSession(
+                str(self._ensure_onnx_model()), options, providers=["CPUExecutionProvider"]
+            )
+            self._input_names = {i.name for i in self._session.get_inputs()}
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+
+            if threads:
+                torch.set_num_threads(threads)
+            self._model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+
+    def _ensure_onnx_model(self) -> Path:
+        """Use the ONNX export published with the model, or export it once"""
+        model_path = self.cache_dir / self.model_name.replace("/", "__") / "model.onnx"
+        if model_path.exists():
+            return model_path
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            import shutil
+            from huggingface_hub import hf_hub_download
+
+            shutil.copyfile(hf_hub_download(self.model_name, "onnx/model.onnx"), model_path)
+            return model_path
+        except Exception as e:
+            logger.info(f"No prebuilt ONNX model for {self.model_name} ({e}), exporting locally")
+
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name).eval()
+        sample = self._tokenizer(["query"], ["passage"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                str(model_path),
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        return model_path
+
+    def _logits(self, queries: List[str], passages: List[str]) -> np.ndarray:
+        """Raw relevance logits for one batch of pairs"""
+        if self.backend == "onnx":
+            encoded = self._tokenizer(
+                queries, passages, padding=True, truncation=True,
+                max_length=self.max_length, return_tensors="np"
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+            return self._session.run(None, feeds)[0][:, 0]
+
+        import torch
+
+        encoded = self._tokenizer(
+            queries, passages, padding=True, truncation=True,
+            max_length=self.max_length, return_tensors="pt"
+        )
+        with torch.inference_mode():
+            return self._model(**encoded).logits[:, 0].float().numpy()
+
+    def score(self, queries: List[str], passages: List[str]) -> np.ndarray:
+        """Relevance probability of each (query, passage) pair"""
+        scores = np.empty(len(queries), dtype=np.float32)
+        for start in range(0, len(queries), self.batch_size):
+            stop = start + self.batch_size
+            scores[start:stop] = sigmoid(self._logits(queries[start:stop], passages[start:stop]))
+        return scores
+
+    def rerank(
+        self,
+        queries: List[str],
+        candidates: List[List[str]],
+        time_budget: Optional[float] = None
+    ) -> List[np.ndarray]:
+        """
+        Score every query's candidates in shared batches
+
+        Pairs are scored best bi-encoder rank first across all queries, so
+        when time_budget (seconds) runs out every query has had its top
+        candidates rescored; pairs never scored are NaN.
+
+        Returns:
+            One score array per query, aligned with its candidates
+        """
+        scores = [np.full(len(c), np.nan, dtype=np.float32) for c in candidates]
+        order = sorted(
+            ((rank, q) for q, texts in enumerate(candidates) for rank in range(len(texts))),
+            key=lambda pair: pair[0]
+        )
+        start_time = time.perf_counter()
+        for start in range(0, len(order), self.batch_size):
+            if time_budget is not None and start and time.perf_counter() - start_time >= time_budget:
+                logger.info(f"Rerank time budget reached after {start}/{len(order)} pairs")
+                break
+            batch = order[start:start + self.batch_size]
+            probabilities = sigmoid(self._logits(
+                [queries[q] for _, q in batch],
+                [candidates[q][rank] for rank, q in batch]
+            ))
+            for (rank, q), probability in zip(batch, probabilities):
+                scores[q][rank] = probability
+        return scores
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "batch_size": self.batch_size,
+            "max_length": self.max_length,
+            "threads": self.threads
+        }
+
+
+def rerank_order(scores: np.ndarray) -> List[int]:
+    """Candidate indices by rerank score, unscored candidates last in their original order"""
+    scored = np.flatnonzero(~np.isnan(scores))
+    unscored = np.flatnonzero(np.isnan(scores))
+    return [int(i) for i in scored[np.argsort(-scores[scored], kind="stable")]] + [int(i) for i in unscored]
@@ -0,0 +1,433 @@
+"""
+Shard Coordinator for RAG MCP Server
+Scatter-gather search over several RAG-MCP nodes, each serving one shard of the
+corpus. Queries fan out under a deadline; slow or missing shards yield partial
+results instead of failures.
+
+    python src/shard_coordinator.py --shards http://127.0.0.1:8101/mcp,http://127.0.0.1:8102/mcp --port 8100
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(1, str(Path(__file__).parent.parent))
+
+from comparison_engine import ComparisonEngine, SpecificationParser
+from config.config import SHARD_DEADLINE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE = SHARD_DEADLINE_SECONDS
+INGEST_TIMEOUT = 900.0
+CATALOG_TTL = 30.0
+RECONNECT_DELAY = 1.0
+
+
+class ShardToolError(Exception):
+    """A shard answered, but the tool reported an error"""
+
+
+class ShardUnavailableError(Exception):
+    """The shard's session dropped before the call could be sent"""
+
+
+class ShardClient:
+    """Persistent MCP session to one shard, reconnected in the background when it drops"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.session = None
+        self.last_error: Optional[str] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._reconnect: Optional[asyncio.Event] = None
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the connection task (call from inside the serving event loop)"""
+        self._ready = asyncio.Event()
+        self._reconnect = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=f"shard:{self.url}")
+
+    async def _run(self) -> None:
+        """Own the transport in a single task (anyio scopes must exit where they were entered)"""
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+
+        while not self._closed:
+            try:
+                async with streamablehttp_client(self.url) as (read, write, _):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        self.session = session
+                        self.last_error = None
+                        self._ready.set()
+                        logger.info(f"Connected to shard {self.url}")
+                        await self._reconnect.wait()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Shard {self.url} unavailable: {self.last_error}")
+            finally:
+                self._drop_session()
+                self._reconnect.clear()
+            if not self._closed:
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    def _drop_session(self) -> None:
+        """Forget the current session so callers wait for the next connection instead of using it"""
+        self.session = None
+        self._ready.clear()
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
+
+    async def call(self, tool: str, arguments: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Call a tool on the shard
+
+        Raises:
+            asyncio.TimeoutError: No connection or no answer within timeout
+            ShardUnavailableError: The connection dropped while the call was waiting for it
+            ShardToolError: The tool returned an error
+        """
+        if self._ready is None:
+            raise RuntimeError(f"Shard client for {self.url} was not started")
+        deadline = time.monotonic() + timeout
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        session = self.session
+        if session is None:
+            raise ShardUnavailableError(f"Shard {self.url} unavailable: {self.last_error or 'connection dropped'}")
+        try:
+            result = await asyncio.wait_for(
+                session.call_tool(tool, arguments),
+                max(0.0, deadline - time.monotonic())
+            )
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            # Transport failure: drop the session so the owner task reconnects
+            self.last_error = f"{type(e).__name__}: {e}"
+            if self.session is session:
+                self._drop_session()
+            self._reconnect.set()
+            raise
+
+        text = "".join(getattr(item, "text", "") for item in result.content)
+        if result.isError:
+            raise ShardToolError(text)
+        payload = json.loads(text) if text else {}
+        return payload
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reconnect is not None:
+            self._reconnect.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+class ShardCoordinator:
+    """Fans tool calls out to shard nodes and merges their answers"""
+
+    def __init__(self, shard_urls: List[str], deadline: float = DEFAULT_DEADLINE, catalog_ttl: float = CATALOG_TTL):
+        """
+        Initialize coordinator
+
+        Args:
+            shard_urls: Streamable HTTP MCP endpoints, one per shard
+            deadline: Seconds a fan-out waits before returning partial results
+            catalog_ttl: Seconds between refreshes of the document -> shard map
+        """
+        if not shard_urls:
+            raise ValueError("At least one shard URL is required")
+        self.shards = [ShardClient(url) for url in shard_urls]
+        self.deadline = deadline
+        self.catalog_ttl = catalog_ttl
+        self.catalog: Dict[str, Set[int]] = {}
+        self._catalog_time = 0.0
+        self._started = False
+
+    async def start(self) -> None:
+        """Connect to the shards from the current event loop (idempotent)"""
+        if self._started:
+            return
+        self._started = True
+        for shard in self.shards:
+            shard.start()
+
+    async def close(self) -> None:
+        await asyncio.gather(*(shard.close() for shard in self.shards))
+
+    async def __aenter__(self) -> "ShardCoordinator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _fan_out(self, shard_ids: List[int], tool: str, arguments: Dict[str, Any],
+                       timeout: Optional[float] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Call one tool on several shards concurrently under a shared deadline
+
+        Returns:
+            shard index -> {"status": ok|no_document|timeout|error, "latency_ms", "result"|"error"}
+        """
+        timeout = self.deadline if timeout is None else timeout
+        await self.start()
+
+        async def one(idx: int) -> Dict[str, Any]:
+            start = time.perf_counter()
+            try:
+                result = await self.shards[idx].call(tool, arguments, timeout)
+                outcome = {"status": "ok", "result": result}
+            except asyncio.TimeoutError:
+                outcome = {"status": "timeout", "error": f"no answer within {timeout:.2f}s"}
+            except ShardToolError as e:
+                status = "no_document" if "not indexed" in str(e) else "error"
+                outcome = {"status": status, "error": str(e)[:300]}
+            except Exception as e:
+                outcome = {"status": "error", "error": f"{type(e).__name__}: {e}"[:300]}
+            outcome["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return outcome
+
+        outcomes = await asyncio.gather(*(one(idx) for idx in shard_ids))
+        return dict(zip(shard_ids, outcomes))
+
+    def _shard_report(self, outcomes: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        report = {
+            self.shards[idx].url: {k: v for k, v in outcome.items() if k != "result"}
+            for idx, outcome in outcomes.items()
+        }
+        failed = [url for url, outcome in report.items() if outcome["status"] in ("timeout", "error")]
+        return {"partial": bool(failed), "failed_shards": failed, "shards": report}
+
+    async def refresh_catalog(self, force: bool = False) -> Dict[str, Set[int]]:
+        """Rebuild the document -> shard map from list_indexed_documents on every shard"""
+        if not force and time.monotonic() - self._catalog_time < self.catalog_ttl:
+            return self.catalog
+        outcomes = await self._fan_out(list(range(len(self.shards))), "list_indexed_documents", {})
+        catalog: Dict[str, Set[int]] = {}
+        for idx, outcome in outcomes.items():
+            if outcome["status"] == "ok":
+                for name in outcome["result"].get("documents", {}):
+                    catalog.setdefault(name, set()).add(idx)
+            else:
+                # Keep what we knew about an unreachable shard
+                for name, owners in self.catalog.items():
+                    if idx in owners:
+                        catalog.setdefault(name, set()).add(idx)
+        self.catalog = catalog
+        self._catalog_time = time.monotonic()
+        return catalog
+
+    async def _owners(self, document_name: str) -> List[int]:
+        """Shards holding a document; all shards if the catalog does not know it"""
+        catalog = await self.refresh_catalog()
+        if document_name not in catalog:
+            catalog = await self.refresh_catalog(force=True)
+        return sorted(catalog.get(document_name, range(len(self.shards))))
+
+    def home_shard(self, document_name: str) -> int:
+        """Shard a new document is written to (stable hash of its name)"""
+        owners = self.catalog.get(document_name)
+        if owners:
+            return min(owners)
+        return zlib.crc32(document_name.encode("utf-8")) % len(self.shards)
+
+    async def rag_query(self, document_name: str, query: str, top_k: int = 5) -> Dict[str, Any]:
+        """Search every shard holding the document and merge the top_k results by score"""
+        owners = await self._owners(document_name)
+        outcomes = await self._fan_out(owners, "rag_query", {
+            "document_name": document_name, "query": query, "top_k": top_k
+        })
+
+        merged = []
+        for idx, outcome in outcomes.items():
+            if outcome["status"] == "ok":
+                for result in outcome["result"].get("results", []):
+                    merged.append({**result, "shard": self.shards[idx].url})
+        merged.sort(key=lambda r: r.get("similarity_score", 0.0), reverse=True)
+
+        report = self._shard_report(outcomes)
+        response = {
+            "document_name": document_name,
+            "query": query,
+            "num_results": min(top_k, len(merged)),
+            "results": merged[:top_k],
+            **report
+        }
+        if not merged and not report["partial"] and all(o["status"] == "no_document" for o in outcomes.values()):
+            response["error"] = f"Document '{document_name}' is not indexed on any shard"
+        elif not merged and report["failed_shards"] and len(report["failed_shards"]) == len(outcomes):
+            response["error"] = "No shard answered before the deadline"
+        return response
+
+    async def rag_batch_query(self, document_names: List[str], query: str, top_k: int = 3) -> Dict[str, Any]:
+        """Query several documents at once; each document is a scatter-gather of its own"""
+        answers = await asyncio.gather(*(self.rag_query(name, query, top_k) for name in document_names))
+        return {
+            "query": query,
+            "documents_queried": len(document_names),
+            "results_per_document": top_k,
+            "partial": any(a["partial"] for a in answers),
+            "findings": dict(zip(document_names, answers))
+        }
+
+    async def compare_document_to_specification(
+        self,
+        document_name: str,
+        specifications: List[str],
+        spec_name: str = "Specification",
+        threshold: float = 0.7,
+        max_concurrency: int = 16
+    ) -> Dict[str, Any]:
+        """
+        Compliance check with every requirement searched across shards concurrently
+
+        The requirement searches run first (bounded concurrency), then the
+        regular ComparisonEngine scores them from the gathered answers.
+        """
+        if isinstance(specifications, list):
+            requirements = SpecificationParser.parse_list_spec(specifications)
+        else:
+            requirements = SpecificationParser.parse_json_spec(specifications)
+        texts = list(dict.fromkeys(req.get("text", "") for req in requirements))
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def search(text: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.rag_query(document_name, text, 5)
+
+        answers = dict(zip(texts, await asyncio.gather(*(search(t) for t in texts))))
+        engine = ComparisonEngine(lambda doc, query, top_k=5: answers[query])
+        result = engine.compare_document_to_spec(document_name, specifications, spec_name, threshold)
+
+        failed = sorted({url for a in answers.values() for url in a.get("failed_shards", [])})
+        response = {"success": True, **result.to_dict()}
+        response.update(partial=bool(failed), failed_shards=failed)
+        return response
+
+    async def ingest_document(self, file_path: str, document_name: str) -> Dict[str, Any]:
+        """Ingest on the document's home shard (the file must be readable by that node)"""
+        await self.refresh_catalog()
+        idx = self.home_shard(document_name)
+        outcome = (await self._fan_out([idx], "ingest_document", {
+            "file_path": file_path, "document_name": document_name
+        }, timeout=INGEST_TIMEOUT))[idx]
+        if outcome["status"] != "ok":
+            return {"success": False, "shard": self.shards[idx].url, "error": outcome["error"]}
+        self.catalog.setdefault(document_name, set()).add(idx)
+        return {**outcome["result"], "shard": self.shards[idx].url}
+
+    async def list_indexed_documents(self) -> Dict[str, Any]:
+        """Union of the shard catalogs"""
+        outcomes = await self._fan_out(list(range(len(self.shards))), "list_indexed_documents", {})
+        documents: Dict[str, Any] = {}
+        for idx, outcome in outcomes.items():
+            if outcome["status"] != "ok":
+                continue
+            for name, info in outcome["result"].get("documents", {}).items():
+                entry = documents.setdefault(name, {**info, "chunks": 0, "shards": []})
+                entry["chunks"] += info.get("chunks", 0)
+                entry["shards"].append(self.shards[idx].url)
+        return {"total_documents": len(documents), "documents": documents, **self._shard_report(outcomes)}
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "deadline_seconds": self.deadline,
+            "shards": [
+                {
+                    "url": shard.url,
+                    "connected": shard.connected,
+                    "last_error": shard.last_error,
+                    "documents": sorted(name for name, owners in self.catalog.items() if i in owners)
+                }
+                for i, shard in enumerate(self.shards)
+            ]
+        }
+
+
+def build_coordinator_server(coordinator: ShardCoordinator, host: str = "127.0.0.1", port: int = 8100):
+    """FastMCP server exposing the coordinator with the same tool names as a shard node"""
+    from mcp.server.fastmcp import FastMCP
+
+    # Shard connections are opened on first use inside the serving loop; a
+    # FastMCP lifespan would run per client session, not once per process
+    server = FastMCP("RAG Shard Coordinator", host=host, port=port)
+
+    @server.tool()
+    async def rag_query(document_name: str, query: str, top_k: int = 5) -> dict:
+        """Query a document across all shards; results are merged by similarity score"""
+        return await coordinator.rag_query(document_name, query, top_k)
+
+    @server.tool()
+    async def rag_batch_query(document_names: List[str], query: str, top_k: int = 3) -> dict:
+        """Query multiple documents across all shards"""
+        return await coordinator.rag_batch_query(document_names, query, top_k)
+
+    @server.tool()
+    async def compare_document_to_specification(
+        document_name: str,
+        specifications: List[str],
+        spec_name: str = "Specification",
+        threshold: float = 0.7
+    ) -> dict:
+        """Compare a sharded document against specifications"""
+        return await coordinator.compare_document_to_specification(document_name, specifications, spec_name, threshold)
+
+    @server.tool()
+    async def ingest_document(file_path: str, document_name: str) -> dict:
+        """Ingest a document on its home shard"""
+        return await coordinator.ingest_document(file_path, document_name)
+
+    @server.tool()
+    async def list_indexed_documents() -> dict:
+        """List documents on all shards"""
+        return await coordinator.list_indexed_documents()
+
+    @server.tool()
+    async def shard_status() -> dict:
+        """Connection state and document placement of each shard"""
+        await coordinator.refresh_catalog()
+        return coordinator.status()
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG MCP shard coordinator")
+    parser.add_argument("--shards", default=os.environ.get("RAG_SHARDS", ""),
+                        help="Comma-separated shard MCP URLs (env: RAG_SHARDS)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--deadline", type=float, default=float(os.environ.get("RAG_SHARD_DEADLINE", DEFAULT_DEADLINE)),
+                        help="Seconds to wait for shards before returning partial results")
+    parser.add_argument("--transport", choices=["http", "stdio"], default="http")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    urls = [url.strip() for url in args.shards.split(",") if url.strip()]
+    coordinator = ShardCoordinator(urls, deadline=args.deadline)
+    server = build_coordinator_server(coordinator, args.host, args.port)
+    logger.info(f"Coordinating {len(urls)} shard(s), deadline {args.deadline}s")
+    server.run(transport="streamable-http" if args.transport == "http" else "stdio")
+
+
+if __name__ == "__main__":
+    main()
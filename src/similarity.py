@@ -0,0 +1,52 @@
+"""
+Cosine Similarity Helpers for RAG MCP Server
+Indexes hold L2-normalized vectors and are searched by inner product, so every
+score is a cosine similarity in [-1, 1] whatever the document or model
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Reported metric of indexes built by this server (snapshot catalogs, tool output)
+SIMILARITY_METRIC = "cosine"
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """float32 copy of vectors with each row scaled to unit length (zero rows stay zero)"""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def is_cosine_index(index) -> bool:
+    """True for inner-product indexes; flat L2 indexes predate normalized scoring"""
+    import faiss
+
+    return index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+
+def cosine_index(vectors: np.ndarray):
+    """Flat inner-product index over the normalized (n, dim) vectors"""
+    import faiss
+
+    vectors = normalize_rows(vectors)
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    if len(vectors):
+        index.add(np.ascontiguousarray(vectors))
+    return index
+
+
+def l2_to_cosine(distances: np.ndarray) -> np.ndarray:
+    """Cosine similarity from squared L2 distances between unit vectors: 1 - d / 2"""
+    return 1.0 - np.asarray(distances, dtype=np.float32) / 2.0
+
+
+def reconstruct_all(index) -> np.ndarray:
+    """Every vector of a flat FAISS index, in index order"""
+    if index.ntotal == 0:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
@@ -0,0 +1,249 @@
+"""
+Corpus Snapshots for RAG MCP Server
+Exports indexed documents as one streamed, checksummed tar.gz (catalog, raw
+float32 vectors, chunk text as JSON lines) and restores them without pickles
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import hashlib
+import tarfile
+import logging
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from chunking import TEXT_BLOB_FILE, PROVENANCE_FILE
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "rag-snapshot/1"
+MANIFEST_NAME = "manifest.json"
+STREAM_BLOCK_BYTES = 1 << 20
+VECTOR_BLOCK_ROWS = 16384
+# chunks.jsonl is spooled in memory up to this size, then on disk
+SPOOL_MAX_BYTES = 8 << 20
+# Files kept next to an index that travel with it
+STORE_FILES = (TEXT_BLOB_FILE, PROVENANCE_FILE)
+
+
+@dataclass
+class SnapshotDocument:
+    """One document to export"""
+    name: str
+    metadata: Dict[str, Any]
+    num_vectors: int
+    dim: int
+    # Yields (docstore_id, text, metadata) in index order
+    chunks: Callable[[], Iterable[Tuple[str, str, Dict[str, Any]]]]
+    # Returns float32 rows [start, stop)
+    vectors: Callable[[int, int], np.ndarray]
+    # Directory holding STORE_FILES, if any
+    store_path: Optional[Path] = None
+
+
+class _HashingReader(io.RawIOBase):
+    """File-like view over a block iterator that hashes what it hands out"""
+
+    def __init__(self, blocks: Iterator[bytes]):
+        self._blocks = blocks
+        self._buffer = b""
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self._buffer += block
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.sha256.update(data)
+        return data
+
+
+def _add_stream(tar: tarfile.TarFile, name: str, size: int, blocks: Iterator[bytes]) -> Dict[str, Any]:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(time.time())
+    reader = _HashingReader(blocks)
+    tar.addfile(info, reader)
+    return {"sha256": reader.sha256.hexdigest(), "size": size}
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes) -> Dict[str, Any]:
+    return _add_stream(tar, name, len(data), iter([data]))
+
+
+def _file_blocks(f) -> Iterator[bytes]:
+    while True:
+        block = f.read(STREAM_BLOCK_BYTES)
+        if not block:
+            return
+        yield block
+
+
+def _vector_blocks(document: SnapshotDocument) -> Iterator[bytes]:
+    for start in range(0, document.num_vectors, VECTOR_BLOCK_ROWS):
+        stop = min(start + VECTOR_BLOCK_ROWS, document.num_vectors)
+        yield np.ascontiguousarray(document.vectors(start, stop), dtype="<f4").tobytes()
+
+
+def write_snapshot(output_path: Path, documents: List[SnapshotDocument], catalog: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stream documents into a compressed snapshot archive
+
+    Memory use is bounded by one vector block and the chunk spool, whatever
+    the corpus size. The manifest (with a sha256 per member) is written last.
+
+    Args:
+        output_path: Destination .tar.gz (written to a temp name, then renamed)
+        documents: Documents to export
+        catalog: Extra catalog fields (embedding model, metric, ...)
+
+    Returns:
+        The manifest
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = output_path.with_name(output_path.name + ".partial")
+
+    files: Dict[str, Dict[str, Any]] = {}
+    entries = []
+    with tarfile.open(str(partial_path), "w|gz") as tar:
+        for i, document in enumerate(documents):
+            prefix = f"documents/{i:06d}"
+
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+                num_chunks = 0
+                for docstore_id, text, metadata in document.chunks():
+                    line = json.dumps({"id": docstore_id, "text": text, "metadata": metadata}, ensure_ascii=False)
+                    spool.write(line.encode("utf-8") + b"\n")
+                    num_chunks += 1
+                size = spool.tell()
+                spool.seek(0)
+                files[f"{prefix}/chunks.jsonl"] = _add_stream(tar, f"{prefix}/chunks.jsonl", size, _file_blocks(spool))
+
+            files[f"{prefix}/vectors.f32"] = _add_stream(
+                tar, f"{prefix}/vectors.f32", document.num_vectors * document.dim * 4, _vector_blocks(document)
+            )
+            files[f"{prefix}/metadata.json"] = _add_bytes(
+                tar, f"{prefix}/metadata.json", json.dumps(document.metadata, indent=2).encode("utf-8")
+            )
+            for name in STORE_FILES:
+                path = Path(document.store_path or "") / name
+                if document.store_path is not None and path.exists():
+                    with open(path, "rb") as f:
+                        files[f"{prefix}/{name}"] = _add_stream(tar, f"{prefix}/{name}", path.stat().st_size, _file_blocks(f))
+            entries.append({
+                "name": document.name,
+                "path": prefix,
+                "chunks": num_chunks,
+                "vectors": document.num_vectors,
+                "dim": document.dim
+            })
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            **catalog,
+            "documents": entries,
+            "files": files
+        }
+        _add_bytes(tar, MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    os.replace(partial_path, output_path)
+    return manifest
+
+
+def unpack_snapshot(snapshot_path: Path, staging_dir: Path) -> Dict[str, Any]:
+    """
+    Stream a snapshot into staging_dir and verify every checksum
+
+    Raises:
+        ValueError: Unknown format, unexpected member, or checksum mismatch
+    """
+    staging_dir = Path(staging_dir)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    digests: Dict[str, Dict[str, Any]] = {}
+    manifest = None
+
+    with tarfile.open(str(snapshot_path), "r|gz") as tar:
+        for member in tar:
+            name = member.name
+            if not member.isfile():
+                raise ValueError(f"Unexpected archive member: {name}")
+            source = tar.extractfile(member)
+            if name == MANIFEST_NAME:
+                manifest = json.loads(source.read().decode("utf-8"))
+                continue
+
+            parts = name.split("/")
+            if len(parts) != 3 or parts[0] != "documents" or not parts[1].isdigit() \
+                    or parts[2] not in ("chunks.jsonl", "vectors.f32", "metadata.json") + STORE_FILES:
+                raise ValueError(f"Unexpected archive member: {name}")
+
+            target = staging_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            sha256 = hashlib.sha256()
+            with open(target, "wb") as out:
+                for block in _file_blocks(source):
+                    sha256.update(block)
+                    out.write(block)
+            digests[name] = {"sha256": sha256.hexdigest(), "size": member.size}
+
+    if manifest is None:
+        raise ValueError("Snapshot has no manifest")
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+    for name, expected in manifest["files"].items():
+        actual = digests.get(name)
+        if actual is None:
+            raise ValueError(f"Snapshot is missing {name}")
+        if actual["sha256"] != expected["sha256"] or actual["size"] != expected["size"]:
+            raise ValueError(f"Checksum mismatch for {name}")
+    return manifest
+
+
+def read_snapshot_document(staging_dir: Path, entry: Dict[str, Any]):
+    """
+    Load one unpacked document
+
+    Returns:
+        Tuple of (metadata, [(docstore_id, text, metadata)], (n, dim) float32 vectors
+        memory-mapped, {store file name: text})
+    """
+    doc_dir = Path(staging_dir) / entry["path"]
+    with open(doc_dir / "metadata.json", "r") as f:
+        metadata = json.load(f)
+    chunks = []
+    with open(doc_dir / "chunks.jsonl", "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            chunks.append((record["id"], record["text"], record["metadata"]))
+    if entry["vectors"]:
+        vectors = np.memmap(doc_dir / "vectors.f32", dtype="<f4", mode="r", shape=(entry["vectors"], entry["dim"]))
+    else:
+        vectors = np.empty((0, entry["dim"]), dtype=np.float32)
+    if len(chunks) != len(vectors):
+        raise ValueError(f"{entry['name']}: {len(chunks)} chunks but {len(vectors)} vectors")
+    store_files = {
+        name: (doc_dir / name).read_text(encoding="utf-8")
+        for name in STORE_FILES if (doc_dir / name).exists()
+    }
+    return metadata, chunks, vectors, store_files
+
+
+def remove_staging(staging_dir: Path) -> None:
+    shutil.rmtree(staging_dir, ignore_errors=True)
@@ -1,57 +1,101 @@
-"""Create test files for testing the RAG server"""
-from PyPDF2 import PdfWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import openpyxl
+"""Create test files for testing the RAG server
+
+Run without arguments to (re)create the small fixtures used by run_tests.py.
+With --corpus DIR it also writes a deterministic synthetic benchmark corpus
+(N-page PDF, large XLSX and DOCX, requirements list) used by
+benchmarks/run_benchmarks.py.
+"""
+import json
+import random
+import argparse
 from pathlib import Path
+from typing import Dict, List
+
+# Vocabulary for synthetic technical prose
+SUBJECTS = [
+    "The control system", "Each pump station", "The backup generator", "The fire alarm panel",
+    "The network switch", "The cooling unit", "The access control reader", "The data logger",
+    "The electrical switchboard", "The ventilation fan", "The water treatment skid", "The UPS module"
+]
+VERBS = [
+    "shall provide", "must support", "is rated for", "shall maintain", "must report",
+    "shall include", "is designed for", "must withstand", "shall comply with", "is tested against"
+]
+OBJECTS = [
+    "continuous operation at 40 degrees Celsius", "redundant power supplies",
+    "remote monitoring over Modbus TCP", "an IP65 enclosure rating", "a response time under 200 ms",
+    "automatic failover within 10 seconds", "IEC 61131-3 programming", "event logging for 90 days",
+    "a minimum efficiency of 92 percent", "seismic zone 4 mounting", "encrypted remote access",
+    "hot-swappable modules", "a mean time between failures of 100000 hours",
+    "audible alarms above 85 dB", "a noise level below 55 dBA", "surge protection to 20 kA"
+]
+QUALIFIERS = [
+    "under normal operating conditions", "during scheduled maintenance", "at full load",
+    "in accordance with the project specification", "as verified during factory acceptance testing",
+    "without manual intervention", "for the design life of the installation", ""
+]
+
+
+def synthetic_sentence(rng: random.Random) -> str:
+    qualifier = rng.choice(QUALIFIERS)
+    sentence = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+    return f"{sentence} {qualifier}." if qualifier else f"{sentence}."
+
+
+def synthetic_paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(synthetic_sentence(rng) for _ in range(sentences))
 
-# Create test_data directory
-test_dir = Path("test_data")
-test_dir.mkdir(exist_ok=True)
-
-# Create a simple PDF with text using reportlab
-try:
-    from reportlab.pdfgen import canvas
-    pdf_path = test_dir / "test_document.pdf"
-    c = canvas.Canvas(str(pdf_path), pagesize=letter)
-    c.drawString(100, 750, "Test Document for RAG Server")
-    c.drawString(100, 730, "")
-    c.drawString(100, 710, "This is a test document containing sample text.")
-    c.drawString(100, 690, "It includes information about artificial intelligence.")
-    c.drawString(100, 670, "Machine learning is a subset of AI.")
-    c.drawString(100, 650, "Natural language processing helps computers understand text.")
-    c.drawString(100, 630, "This document is used for testing PDF ingestion.")
-    c.save()
-    print(f"[OK] Created PDF: {pdf_path}")
-except ImportError:
-    print("! reportlab not installed, creating blank PDF")
-    pdf_path = test_dir / "test_document.pdf"
-    pdf = PdfWriter()
-    pdf.add_blank_page(width=612, height=792)
-    with open(pdf_path, 'wb') as f:
-        pdf.write(f)
-    print(f"[OK] Created blank PDF: {pdf_path}")
-
-# Create a simple Excel file
-excel_path = test_dir / "test_spreadsheet.xlsx"
-wb = openpyxl.Workbook()
-ws = wb.active
-ws.title = "Test Data"
-ws['A1'] = "Item"
-ws['B1'] = "Value"
-ws['A2'] = "Compliance Score"
-ws['B2'] = 95
-ws['A3'] = "Total Items"
-ws['B3'] = 10
-ws['A4'] = "Status"
-ws['B4'] = "COMPLIANT"
-wb.save(excel_path)
-print(f"[OK] Created Excel: {excel_path}")
-
-# Create a test requirements file
-req_path = test_dir / "test_requirements.txt"
-with open(req_path, 'w') as f:
-    f.write("""Test Requirements Specification
+
+def create_fixtures(test_dir: Path) -> None:
+    """Create the small fixtures used by run_tests.py"""
+    test_dir.mkdir(exist_ok=True)
+
+    # Create a simple PDF with text using reportlab
+    try:
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import letter
+        pdf_path = test_dir / "test_document.pdf"
+        c = canvas.Canvas(str(pdf_path), pagesize=letter)
+        c.drawString(100, 750, "Test Document for RAG Server")
+        c.drawString(100, 730, "")
+        c.drawString(100, 710, "This is a test document containing sample text.")
+        c.drawString(100, 690, "It includes information about artificial intelligence.")
+        c.drawString(100, 670, "Machine learning is a subset of AI.")
+        c.drawString(100, 650, "Natural language processing helps computers understand text.")
+        c.drawString(100, 630, "This document is used for testing PDF ingestion.")
+        c.save()
+        print(f"[OK] Created PDF: {pdf_path}")
+    except ImportError:
+        from PyPDF2 import PdfWriter
+        print("! reportlab not installed, creating blank PDF")
+        pdf_path = test_dir / "test_document.pdf"
+        pdf = PdfWriter()
+        pdf.add_blank_page(width=612, height=792)
+        with open(pdf_path, 'wb') as f:
+            pdf.write(f)
+        print(f"[OK] Created blank PDF: {pdf_path}")
+
+    # Create a simple Excel file
+    import openpyxl
+    excel_path = test_dir / "test_spreadsheet.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Test Data"
+    ws['A1'] = "Item"
+    ws['B1'] = "Value"
+    ws['A2'] = "Compliance Score"
+    ws['B2'] = 95
+    ws['A3'] = "Total Items"
+    ws['B3'] = 10
+    ws['A4'] = "Status"
+    ws['B4'] = "COMPLIANT"
+    wb.save(excel_path)
+    print(f"[OK] Created Excel: {excel_path}")
+
+    # Create a test requirements file
+    req_path = test_dir / "test_requirements.txt"
+    with open(req_path, 'w') as f:
+        f.write("""Test Requirements Specification
 
 1. The system must support PDF document processing
 2. The system must provide semantic search capabilities
@@ -59,6 +103,184 @@ with open(req_path, 'w') as f:
 4. Response time must be under 200ms for queries
 5. The system must handle documents up to 500MB
 """)
-print(f"[OK] Created requirements: {req_path}")
+    print(f"[OK] Created requirements: {req_path}")
+
+
+def create_large_pdf(path: Path, pages: int, seed: int = 0) -> Path:
+    """N-page PDF of synthetic specification text, with a running header and page footer"""
+    import fitz
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 40), "Synthetic Technical Specification - Rev B", fontsize=8)
+        body = "\n\n".join(
+            f"{page_num}.{section} {synthetic_paragraph(rng)}" for section in range(1, 5)
+        )
+        page.insert_textbox(fitz.Rect(72, 60, 540, 740), body, fontsize=9)
+        page.insert_text((280, 770), f"Page {page_num} of {pages}", fontsize=8)
+    doc.save(str(path), garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def create_large_spreadsheet(path: Path, rows: int, seed: int = 0, sheets: int = 2) -> Path:
+    """Equipment-schedule style workbook with `rows` data rows spread over `sheets` sheets"""
+    import openpyxl
+
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    per_sheet = max(1, rows // sheets)
+    for sheet_num in range(sheets):
+        ws = wb.create_sheet(f"Schedule {sheet_num + 1}")
+        ws.append(["Tag", "Description", "Requirement", "Rating", "Status"])
+        for row in range(per_sheet):
+            ws.append([
+                f"EQ-{sheet_num + 1}{row:05d}",
+                rng.choice(SUBJECTS),
+                f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+                round(rng.uniform(1, 500), 1),
+                rng.choice(["COMPLIANT", "PARTIAL", "OPEN"])
+            ])
+    wb.save(str(path))
+    return path
+
+
+def create_large_docx(path: Path, paragraphs: int, seed: int = 0) -> Path:
+    """Word document of synthetic paragraphs with a heading every 20 paragraphs"""
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            doc.add_heading(f"Section {i // 20 + 1}", level=1)
+        doc.add_paragraph(synthetic_paragraph(rng))
+    doc.save(str(path))
+    return path
+
+
+def synthetic_requirements(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}" for _ in range(count)]
+
+
+def synthetic_queries(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(OBJECTS)} {rng.choice(QUALIFIERS)}".strip() for _ in range(count)]
+
+
+def create_relevance_fixture(path: Path, queries: int = 60, passages: int = 400, seed: int = 0) -> Path:
+    """
+    Labeled retrieval fixture: passages, queries and the passages relevant to each
+
+    A query names one piece of equipment and one requirement; a passage is
+    relevant only if a single sentence pairs the two. For every query two
+    hard negatives mention both, but in different sentences about other
+    equipment, which a bag-of-words ranking cannot tell apart.
+    """
+    rng = random.Random(seed)
+
+    def sentence(subject: str, obj: str) -> str:
+        return f"{subject} {rng.choice(VERBS)} {obj}."
+
+    texts = []
+    for _ in range(passages):
+        texts.append(" ".join(sentence(rng.choice(SUBJECTS), rng.choice(OBJECTS)) for _ in range(3)))
+
+    labeled = []
+    for _ in range(queries):
+        subject, obj = rng.choice(SUBJECTS), rng.choice(OBJECTS)
+        position = rng.randrange(len(texts))
+        parts = [sentence(rng.choice(SUBJECTS), rng.choice(OBJECTS)) for _ in range(2)]
+        parts.insert(rng.randrange(3), sentence(subject, obj))
+        texts[position] = " ".join(parts)
+        for _ in range(2):
+            other_subject = rng.choice([s for s in SUBJECTS if s != subject])
+            other_obj = rng.choice([o for o in OBJECTS if o != obj])
+            texts.append(" ".join([sentence(subject, other_obj), sentence(other_subject, obj),
+                                   sentence(rng.choice(SUBJECTS), rng.choice(OBJECTS))]))
+        name = subject.split(" ", 1)[1]
+        labeled.append({"query": f"Which {name} requirement covers {obj}?", "subject": subject, "object": obj})
+
+    # Label after all passages are final, so later rewrites cannot invalidate earlier labels
+    for item in labeled:
+        item["relevant"] = [
+            i for i, text in enumerate(texts)
+            if any(s.startswith(item["subject"] + " ") and s.endswith(" " + item["object"])
+                   for s in text.rstrip(".").split(". "))
+        ]
+
+    fixture = {
+        "seed": seed,
+        "passages": texts,
+        "queries": [{"query": item["query"], "relevant": item["relevant"]} for item in labeled if item["relevant"]]
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(fixture, f, indent=2)
+    return path
+
+
+def create_benchmark_corpus(
+    corpus_dir: Path,
+    pdf_pages: int = 200,
+    xlsx_rows: int = 20000,
+    docx_paragraphs: int = 2000,
+    requirements: int = 50,
+    seed: int = 0
+) -> Dict[str, str]:
+    """
+    Write the synthetic benchmark corpus
+
+    Returns:
+        Mapping of corpus role to file path (also written to manifest.json)
+    """
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    files = {
+        "pdf": str(create_large_pdf(corpus_dir / f"spec_{pdf_pages}p.pdf", pdf_pages, seed)),
+        "excel": str(create_large_spreadsheet(corpus_dir / f"schedule_{xlsx_rows}r.xlsx", xlsx_rows, seed)),
+        "word": str(create_large_docx(corpus_dir / f"narrative_{docx_paragraphs}p.docx", docx_paragraphs, seed)),
+    }
+    req_path = corpus_dir / "requirements.txt"
+    req_path.write_text("\n".join(synthetic_requirements(requirements, seed)) + "\n")
+    files["requirements"] = str(req_path)
+
+    manifest = {
+        "seed": seed,
+        "pdf_pages": pdf_pages,
+        "xlsx_rows": xlsx_rows,
+        "docx_paragraphs": docx_paragraphs,
+        "requirements": requirements,
+        "files": files
+    }
+    with open(corpus_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create RAG server test fixtures and benchmark corpus")
+    parser.add_argument("--corpus", help="Also write a synthetic benchmark corpus to this directory")
+    parser.add_argument("--pdf-pages", type=int, default=200)
+    parser.add_argument("--xlsx-rows", type=int, default=20000)
+    parser.add_argument("--docx-paragraphs", type=int, default=2000)
+    parser.add_argument("--requirements", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    create_fixtures(Path("test_data"))
+
+    if args.corpus:
+        files = create_benchmark_corpus(
+            Path(args.corpus), args.pdf_pages, args.xlsx_rows, args.docx_paragraphs, args.requirements, args.seed
+        )
+        for role, path in files.items():
+            print(f"[OK] Created {role}: {path}")
+
+    print("\nAll test files created successfully!")
+
 
-print("\nAll test files created successfully!")
+if __name__ == "__main__":
+    main()